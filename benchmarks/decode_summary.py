@@ -0,0 +1,75 @@
+"""Compares decoding a large account summary with the standard library and with orjson, and decoding it once
+against decoding it for each consumer as the client used to.
+
+Run with `python benchmarks/decode_summary.py --positions 5000`.
+"""
+import argparse
+import json
+import timeit
+
+from requests.models import Response
+
+from tradingTOT.utils import decoding
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def summary(positions: int) -> bytes:
+    items = [{
+        "positionId": str(i), "humanId": str(i), "created": "2024-02-02T10:00:00.000Z", "averagePrice": 101.25,
+        "averagePriceConverted": 80.1, "currentPrice": 103.5, "value": 1035.0, "investment": 1012.5,
+        "code": f"T{i}_US_EQ", "margin": 0.0, "ppl": 22.5, "quantity": 10.0, "maxBuy": 100.0, "maxSell": 10.0,
+        "maxOpenBuy": 100.0, "maxOpenSell": 10.0, "frontend": "WEB", "autoInvestQuantity": 0.0, "fxPpl": 0.1,
+    } for i in range(positions)]
+    orders = [{"orderId": str(10 ** 10 + i), "type": "MARKET", "code": f"T{i}_US_EQ", "value": 10,
+               "filledValue": 0, "status": "NEW", "currencyCode": "GBP", "created": "2024-02-02T10:00:00.000Z",
+               "frontend": "WEB"} for i in range(positions // 10)]
+    cash = {"free": 1000.0, "total": 2000.0, "interest": 0.0, "indicator": 0.0, "commission": 0.0, "cash": 1000.0,
+            "ppl": 22.5, "result": 0.0, "spreadBack": 0.0, "nonRefundable": 0.0, "dividend": 0.0,
+            "stockInvestment": 1012.5, "freeForStocks": 1000.0, "totalCashForWithdraw": 1000.0,
+            "blockedForStocks": 0.0, "pieCash": 0}
+    return json.dumps({"cash": cash, "open": {"unfilteredCount": positions, "items": items},
+                       "orders": {"unfilteredCount": 0, "items": []},
+                       "valueOrders": {"unfilteredCount": len(orders), "items": orders}}).encode()
+
+
+def response(body: bytes) -> Response:
+    result = Response()
+    result._content = body
+    result.status_code = 200
+    result.encoding = "utf-8"
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--positions", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--consumers", type=int, default=3, help="Decodes of the same response per request before.")
+    args = parser.parse_args()
+
+    body = summary(args.positions)
+    print(f"Summary of {args.positions} positions, {len(body) / 1024:.0f}KB")
+
+    def report(name, func):
+        seconds = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"{name:<40}{seconds * 1000:>10.2f} ms")
+
+    report("requests Response.json()", lambda: response(body).json())
+    report("json.loads", lambda: json.loads(body))
+    if orjson:
+        report("orjson.loads", lambda: orjson.loads(body))
+    else:
+        print("orjson is not installed.")
+
+    report(f"Response.json() x {args.consumers}",
+           lambda: [r.json() for r in [response(body)] for _ in range(args.consumers)])
+    report(f"decoding.decode x {args.consumers}",
+           lambda: [decoding.decode(r) for r in [response(body)] for _ in range(args.consumers)])
+
+
+if __name__ == "__main__":
+    main()
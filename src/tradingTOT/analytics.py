@@ -0,0 +1,171 @@
+from dataclasses import dataclass
+from typing import Union, Dict, List, Mapping, Optional
+
+import numpy as np
+import requests
+from requests.models import Response
+
+from tradingTOT.schemas.api_responses import SummarySchema
+from tradingTOT.utils.decoding import decode
+
+
+POSITION_COLUMNS = ("quantity", "currentPrice", "averagePrice", "ppl", "fxPpl", "value", "investment")
+
+
+@dataclass(frozen=True)
+class PortfolioSnapshot:
+    """Columnar view of the open positions in a Trading212 account summary.
+
+    Every array is aligned with `codes`, so position `i` is described by `codes[i]`, `quantity[i]` etc.
+    Prices are in the instrument currency while `value`, `ppl`, `fx_ppl` and `investment` are in the account currency.
+    """
+    codes: np.ndarray
+    quantity: np.ndarray
+    current_price: np.ndarray
+    average_price: np.ndarray
+    ppl: np.ndarray
+    fx_ppl: np.ndarray
+    value: np.ndarray
+    investment: np.ndarray
+    cash: float = 0.0
+
+    @classmethod
+    def from_summary(cls, response: Union[Response, Dict]) -> "PortfolioSnapshot":
+        """Loads the open positions of a summary response.
+
+        Args:
+            response: The response (or its decoded body) of `endpoints.ACCOUNT_SUMMARY_URL_SERVICES`.
+
+        Returns:
+            Portfolio snapshot.
+        """
+        response = decode(response)
+
+        SummarySchema.model_validate(response)
+        positions = response.get("open", {}).get("items", [])
+        cash = response.get("cash", {}).get("freeForStocks", 0.0)
+        return cls.from_positions(positions, cash=cash)
+
+    @classmethod
+    def from_positions(cls, positions: List[Dict], cash: float = 0.0) -> "PortfolioSnapshot":
+        """Loads a list of position dicts, such as the output of `tradingTOT.get_positions`.
+
+        Args:
+            positions: Position dicts.
+            cash: Free cash in the account currency.
+
+        Returns:
+            Portfolio snapshot.
+        """
+        columns = np.array([[position.get(column, 0.0) for column in POSITION_COLUMNS] for position in positions],
+                           dtype=np.float64).reshape(len(positions), len(POSITION_COLUMNS))
+        codes = np.array([position["code"] for position in positions], dtype=object)
+        quantity, current_price, average_price, ppl, fx_ppl, value, investment = columns.T
+        return cls(codes=codes, quantity=quantity, current_price=current_price, average_price=average_price,
+                   ppl=ppl, fx_ppl=fx_ppl, value=value, investment=investment, cash=float(cash))
+
+    @property
+    def tickers(self) -> np.ndarray:
+        """Ticker symbols of the positions e.g. `MSFT` for `MSFT_US_EQ`."""
+        return np.array([code.split("_", 1)[0] for code in self.codes], dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def exposure(self) -> np.ndarray:
+        """Market exposure of each position in the instrument currency."""
+        return self.quantity * self.current_price
+
+    def unrealized_pnl(self) -> np.ndarray:
+        """Unrealized profit or loss of each position in the account currency."""
+        return self.ppl
+
+    def fx_pnl(self) -> np.ndarray:
+        """Profit or loss of each position caused by exchange rate moves, in the account currency."""
+        return self.fx_ppl
+
+    def returns(self) -> np.ndarray:
+        """Unrealized return of each position relative to the amount invested."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.investment != 0, self.ppl / self.investment, 0.0)
+
+    def weights(self, include_cash: bool = False) -> np.ndarray:
+        """Share of each position in the portfolio value.
+
+        Args:
+            include_cash: Whether free cash counts towards the portfolio value.
+
+        Returns:
+            Position weights.
+        """
+        total = self.value.sum() + (self.cash if include_cash else 0.0)
+        if total == 0:
+            return np.zeros_like(self.value)
+        return self.value / total
+
+    def concentration(self) -> float:
+        """Herfindahl-Hirschman index of the position weights.
+
+        The value is 1 for a single position portfolio and 1/N for N equally weighted positions.
+        """
+        weights = self.weights()
+        return float(np.dot(weights, weights))
+
+    def top(self, n: int = 5) -> Dict[str, float]:
+        """The `n` largest positions by weight.
+
+        Args:
+            n: Number of positions.
+
+        Returns:
+            Mapping of instrument code to weight, largest first.
+        """
+        weights = self.weights()
+        order = np.argsort(weights)[::-1][:n]
+        return {self.codes[i]: float(weights[i]) for i in order}
+
+    def rebalance_deltas(self, target_weights: Union[Mapping[str, float], np.ndarray],
+                         total: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Computes the trades needed to move the portfolio to the target weights.
+
+        Args:
+            target_weights: Weights aligned with `codes`, or a mapping of ticker or code to weight.
+                Positions missing from the mapping are targeted at zero.
+            total: Portfolio value to rebalance. Defaults to the current value of the positions.
+
+        Returns:
+            The `value` delta in the account currency and the `quantity` delta for each position.
+        """
+        if isinstance(target_weights, Mapping):
+            weights = np.zeros(len(self), dtype=np.float64)
+            lookup = {code: i for i, code in enumerate(self.codes)}
+            lookup.update({ticker: i for i, ticker in enumerate(self.tickers)})
+            for key, weight in target_weights.items():
+                if key not in lookup:
+                    raise ValueError(f"No open position for {key}.")
+                weights[lookup[key]] = weight
+        else:
+            weights = np.asarray(target_weights, dtype=np.float64)
+            if weights.shape != self.value.shape:
+                raise ValueError(f"Expected {len(self)} target weights, got {weights.shape}.")
+
+        if total is None:
+            total = self.value.sum()
+
+        value_delta = weights * total - self.value
+        with np.errstate(divide="ignore", invalid="ignore"):
+            unit_value = np.where(self.quantity != 0, self.value / self.quantity, 0.0)
+            quantity_delta = np.where(unit_value != 0, value_delta / unit_value, 0.0)
+
+        return {"value": value_delta, "quantity": quantity_delta}
+
+    def totals(self) -> Dict[str, float]:
+        """Portfolio wide aggregates in the account currency."""
+        return {
+            "value": float(self.value.sum()),
+            "investment": float(self.investment.sum()),
+            "ppl": float(self.ppl.sum()),
+            "fxPpl": float(self.fx_ppl.sum()),
+            "cash": self.cash,
+            "concentration": self.concentration(),
+        }
@@ -0,0 +1,199 @@
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from tradingTOT.enums import CandlePeriod
+from tradingTOT.utils.storage import DEFAULT_CANDLES_DIRECTORY
+
+
+PERIOD_MILLISECONDS = {
+    CandlePeriod.ONE_MINUTE: 60_000,
+    CandlePeriod.FIVE_MINUTES: 5 * 60_000,
+    CandlePeriod.TEN_MINUTES: 10 * 60_000,
+    CandlePeriod.FIFTEEN_MINUTES: 15 * 60_000,
+    CandlePeriod.THIRTY_MINUTES: 30 * 60_000,
+    CandlePeriod.ONE_HOUR: 60 * 60_000,
+    CandlePeriod.FOUR_HOURS: 4 * 60 * 60_000,
+    CandlePeriod.ONE_DAY: 24 * 60 * 60_000,
+    CandlePeriod.ONE_WEEK: 7 * 24 * 60 * 60_000,
+}
+
+# Timestamp (milliseconds), open, high, low, close.
+CANDLE_FIELDS = ("timestamp", "open", "high", "low", "close")
+
+
+class CandleBuffer:
+    """Fixed-size ring buffer of OHLC candles for one ticker and period.
+
+    Appending beyond the capacity overwrites the oldest candles. The columns are exposed in chronological order.
+    """
+    def __init__(self, capacity: int = 500, period: Union[CandlePeriod, str] = CandlePeriod.ONE_MINUTE):
+        if capacity <= 0:
+            raise ValueError("The capacity must be positive.")
+
+        self.capacity = capacity
+        self.period = CandlePeriod(period)
+        self._data = np.zeros((capacity, len(CANDLE_FIELDS)), dtype=np.float64)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        if not self._size:
+            return None
+        return int(self._data[(self._start + self._size - 1) % self.capacity, 0])
+
+    def missing(self, now: int) -> int:
+        """Number of candles to request so that the buffer is up to date at `now`.
+
+        The latest stored candle is always included as it may still have been in progress when it was fetched. A
+        buffer that is not full, e.g. after growing or loading a shorter file, requests its whole capacity so that
+        `extend` can backfill its head.
+
+        Args:
+            now: Current time as a unix timestamp in milliseconds.
+
+        Returns:
+            The number of candles to fetch.
+        """
+        last_timestamp = self.last_timestamp
+        if last_timestamp is None or self._size < self.capacity:
+            return self.capacity
+
+        elapsed = max(now - last_timestamp, 0) // PERIOD_MILLISECONDS[self.period]
+        return int(min(elapsed + 1, self.capacity))
+
+    def extend(self, candles: np.ndarray) -> int:
+        """Adds candles to the buffer.
+
+        Candles older than the latest stored one are ignored and a candle with the same timestamp replaces it,
+        except that candles older than the first stored one fill the free space of a buffer that is not full.
+
+        Args:
+            candles: Array with one row per candle and the columns in `CANDLE_FIELDS`.
+
+        Returns:
+            The number of new candles added.
+        """
+        candles = np.asarray(candles, dtype=np.float64).reshape(-1, len(CANDLE_FIELDS))
+        candles = candles[np.argsort(candles[:, 0], kind="stable")]
+
+        backfilled = 0
+        if 0 < self._size < self.capacity and len(candles) and candles[0, 0] < self._data[self._start, 0]:
+            stored = self.to_array()
+            head = candles[candles[:, 0] < stored[0, 0]][-(self.capacity - self._size):]
+            backfilled = len(head)
+            self._data[:backfilled + self._size] = np.concatenate([head, stored])
+            self._start = 0
+            self._size += backfilled
+
+        last_timestamp = self.last_timestamp
+        if last_timestamp is not None:
+            if len(candles) and candles[0, 0] <= last_timestamp:
+                same = candles[:, 0] == last_timestamp
+                if same.any():
+                    self._data[(self._start + self._size - 1) % self.capacity] = candles[same][-1]
+            candles = candles[candles[:, 0] > last_timestamp]
+
+        candles = candles[-self.capacity:]
+        count = len(candles)
+        if not count:
+            return backfilled
+
+        end = (self._start + self._size) % self.capacity
+        indices = (end + np.arange(count)) % self.capacity
+        self._data[indices] = candles
+
+        overflow = max(self._size + count - self.capacity, 0)
+        self._start = (self._start + overflow) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+        return backfilled + count
+
+    def to_array(self) -> np.ndarray:
+        """The stored candles in chronological order, one row per candle."""
+        indices = (self._start + np.arange(self._size)) % self.capacity
+        return self._data[indices]
+
+    def resized(self, capacity: int) -> "CandleBuffer":
+        """A copy of the buffer with a different capacity, keeping the latest candles."""
+        buffer = CandleBuffer(capacity, self.period)
+        buffer.extend(self.to_array())
+        return buffer
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        return self.to_array()[:, 0].astype(np.int64)
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.to_array()[:, 1]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.to_array()[:, 2]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.to_array()[:, 3]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.to_array()[:, 4]
+
+    def save(self, path: Path) -> Path:
+        np.save(path, self.to_array(), allow_pickle=False)
+        return path
+
+    @classmethod
+    def load(cls, path: Path, capacity: int, period: Union[CandlePeriod, str]) -> "CandleBuffer":
+        buffer = cls(capacity, period)
+        buffer.extend(np.load(path, allow_pickle=False))
+        return buffer
+
+
+class CandleStore:
+    """Keeps one `CandleBuffer` per ticker and period in memory, persisted as `.npy` files."""
+    def __init__(self, candles_dir: Path = DEFAULT_CANDLES_DIRECTORY) -> None:
+        self.dir = candles_dir
+        self.buffers: Dict[Tuple[str, CandlePeriod], CandleBuffer] = {}
+        self.lock = Lock()
+
+    def _path(self, object_id: str, period: CandlePeriod) -> Path:
+        return Path(self.dir, f"{object_id}_{period.value}.npy")
+
+    def get(self, object_id: str, period: Union[CandlePeriod, str], capacity: int) -> CandleBuffer:
+        """Gets the buffer for a ticker, loading it from disk on first use.
+
+        Args:
+            object_id: Trading212 object id e.g. MSFT_US_EQ.
+            period: Candle period.
+            capacity: Number of candles to keep.
+
+        Returns:
+            The candle buffer.
+        """
+        period = CandlePeriod(period)
+        key = (object_id, period)
+        with self.lock:
+            buffer = self.buffers.get(key)
+            if buffer is None:
+                path = self._path(object_id, period)
+                if path.exists():
+                    buffer = CandleBuffer.load(path, capacity, period)
+                else:
+                    buffer = CandleBuffer(capacity, period)
+            elif buffer.capacity != capacity:
+                buffer = buffer.resized(capacity)
+
+            self.buffers[key] = buffer
+            return buffer
+
+    def save(self, object_id: str, period: Union[CandlePeriod, str]) -> Path:
+        period = CandlePeriod(period)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        return self.buffers[(object_id, period)].save(self._path(object_id, period))
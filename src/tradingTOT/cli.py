@@ -0,0 +1,136 @@
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, TextIO
+
+from tradingTOT.tradingTOT import tradingTOT
+
+
+def read_inputs(values: List[str], path: Optional[str], stdin: TextIO = sys.stdin) -> List[str]:
+    """Collects tickers or order ids from the arguments, a file ("-" for stdin) or piped stdin.
+
+    Blank lines and lines starting with "#" are skipped.
+    """
+    lines = list(values)
+    if path == "-" or (path is None and not values and not stdin.isatty()):
+        lines.extend(stdin.read().splitlines())
+    elif path:
+        with open(path) as handler:
+            lines.extend(handler.read().splitlines())
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+class JSONLWriter:
+    """Writes one JSON object per line, from any thread."""
+    def __init__(self, stream: TextIO = sys.stdout) -> None:
+        self.stream = stream
+        self.lock = Lock()
+        self.errors = 0
+
+    def write(self, record: Dict) -> None:
+        line = json.dumps(record, default=str)
+        with self.lock:
+            if "error" in record:
+                self.errors += 1
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def run_concurrently(func: Callable, inputs: Iterable, writer: JSONLWriter, concurrency: int) -> None:
+    """Calls `func` on every input from `concurrency` threads and writes each result as soon as it is ready."""
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="tradingTOT-cli") as executor:
+        futures = {executor.submit(func, value): value for value in inputs}
+        for future in as_completed(futures):
+            value = futures[future]
+            try:
+                writer.write({"input": value, "result": future.result()})
+            except Exception as err:
+                writer.write({"input": value, "error": f"{type(err).__name__}: {err}"})
+
+
+def _batches(values: List[str], size: int) -> List[List[str]]:
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+
+def quotes(client, inputs: List[str], writer: JSONLWriter, args: argparse.Namespace) -> None:
+    # Quotes are fetched in batches with one request each, then written one line per ticker.
+    def write_batch(batch: List[str]) -> None:
+        prices = client.get_ask_prices(batch)
+        for ticker in batch:
+            if ticker in prices:
+                writer.write({"input": ticker, "result": prices[ticker]})
+            else:
+                writer.write({"input": ticker, "error": "No price returned."})
+
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="tradingTOT-cli") as executor:
+        futures = {executor.submit(write_batch, batch): batch for batch in _batches(inputs, args.batch_size)}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as err:
+                for ticker in futures[future]:
+                    writer.write({"input": ticker, "error": f"{type(err).__name__}: {err}"})
+
+
+def status(client, inputs: List[str], writer: JSONLWriter, args: argparse.Namespace) -> None:
+    run_concurrently(client.get_status, inputs, writer, args.concurrency)
+
+
+def positions(client, inputs: List[str], writer: JSONLWriter, args: argparse.Namespace) -> None:
+    # One summary holds every position, so there is nothing to run concurrently.
+    for position in client.get_positions(set(inputs) or None):
+        writer.write({"input": position["code"].split("_", 1)[0], "result": position})
+
+
+def resolve(client, inputs: List[str], writer: JSONLWriter, args: argparse.Namespace) -> None:
+    def get_equity_data(ticker: str) -> Dict:
+        data = client.get_equity_data(ticker)
+        if not data:
+            raise ValueError(f"No supported stock found for {ticker}.")
+        return data
+
+    run_concurrently(get_equity_data, inputs, writer, args.concurrency)
+
+
+def cancel(client, inputs: List[str], writer: JSONLWriter, args: argparse.Namespace) -> None:
+    run_concurrently(client.cancel_order, inputs, writer, args.concurrency)
+
+
+COMMANDS = {
+    "quotes": (quotes, "Fetch the ask prices of tickers."),
+    "status": (status, "Get the statuses of order ids."),
+    "positions": (positions, "Export open positions, all of them if no tickers are given."),
+    "resolve": (resolve, "Resolve tickers to their Trading212 instrument data."),
+    "cancel": (cancel, "Cancel order ids."),
+}
+
+
+def parser() -> argparse.ArgumentParser:
+    root = argparse.ArgumentParser(prog="tradingtot", description="Bulk Trading212 operations, written as JSONL.")
+    subparsers = root.add_subparsers(dest="command", required=True)
+    for name, (_, help_) in COMMANDS.items():
+        command = subparsers.add_parser(name, help=help_, description=help_)
+        command.add_argument("inputs", nargs="*", help="Tickers or order ids. Read from stdin when it is piped.")
+        command.add_argument("-f", "--file", help='File with one ticker or order id per line, "-" for stdin.')
+        command.add_argument("-c", "--concurrency", type=int, default=4, help="Maximum concurrent requests.")
+        if name == "quotes":
+            command.add_argument("--batch-size", type=int, default=50, help="Tickers per price request.")
+    return root
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parser().parse_args(argv)
+    inputs = read_inputs(args.inputs, args.file)
+    if not inputs and args.command != "positions":
+        print(f"No tickers or order ids were given to `{args.command}`.", file=sys.stderr)
+        return 2
+
+    writer = JSONLWriter()
+    COMMANDS[args.command][0](tradingTOT(), inputs, writer, args)
+    return 1 if writer.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import math
+import time
+from collections import deque
+from threading import Lock
+from typing import Dict, Optional
+
+from tradingTOT.fx import FXRateCache
+
+
+# Observed fee for orders in instruments that are not in the account currency.
+DEFAULT_CONVERSION_FEE_RATE = 0.0015
+CURRENCY_CONVERSION_FEE = "CURRENCY_CONVERSION_FEE"
+# Seconds a quote is used for in estimates before it is fetched again.
+DEFAULT_QUOTE_MAX_AGE = 60
+
+
+class CostDrift:
+    """Tracks how far local cost estimates are from the costs returned by Trading212's order review."""
+    def __init__(self, window: int = 100):
+        self.quantity_errors = deque(maxlen=window)
+        self.total_errors = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self.quantity_errors)
+
+    def record(self, estimate: Dict, review: Dict) -> None:
+        reviewed_quantity = review.get("orderQuantity") or 0
+        if reviewed_quantity:
+            error = abs(estimate["orderQuantity"] - reviewed_quantity) / abs(reviewed_quantity)
+        else:
+            error = 0.0 if not estimate["orderQuantity"] else math.inf
+        self.quantity_errors.append(error)
+        self.total_errors.append(abs(estimate["total"] - review.get("total", 0)))
+
+    def summary(self) -> Dict:
+        """Relative `orderQuantity` errors and absolute `total` errors over the recorded reviews."""
+        if not self:
+            return {"samples": 0, "meanQuantityError": None, "maxQuantityError": None, "maxTotalError": None}
+
+        return {
+            "samples": len(self),
+            "meanQuantityError": sum(self.quantity_errors) / len(self),
+            "maxQuantityError": max(self.quantity_errors),
+            "maxTotalError": max(self.total_errors),
+        }
+
+    def is_trustworthy(self, tolerance: float = 0.01, min_samples: int = 5) -> bool:
+        """Whether recent estimates stayed within `tolerance` relative error of the reviewed quantity.
+
+        Args:
+            tolerance: Maximum relative error of `orderQuantity`.
+            min_samples: Minimum number of reviews that must have been compared.
+
+        Returns:
+            True if the estimates can be trusted.
+        """
+        return len(self) >= min_samples and max(self.quantity_errors) <= tolerance
+
+
+class CostEstimator:
+    """Estimates the costs of value orders locally, returning the fields of the order review response.
+
+    The estimate is built from cached instrument metadata, the latest quote of the instrument and the exchange rate
+    between the instrument and account currencies. Quotes older than `quote_max_age` are not used. Exchange rates are learned from the order reviews passed to
+    `observe_review` and kept in an `fx.FXRateCache`, which can be shared with the client.
+    """
+    def __init__(self, account_currency: str = "GBP", conversion_fee_rate: float = DEFAULT_CONVERSION_FEE_RATE,
+                 fx_rates: Optional[FXRateCache] = None,
+                 quote_max_age: Optional[float] = DEFAULT_QUOTE_MAX_AGE):
+        self.account_currency = account_currency
+        self.conversion_fee_rate = conversion_fee_rate
+        self.quote_max_age = quote_max_age
+        self.currencies: Dict[str, str] = {}
+        self.quotes: Dict[str, float] = {}
+        self.quoted_at: Dict[str, float] = {}
+        self.fx_rates = fx_rates if fx_rates is not None else FXRateCache()
+        self.drift = CostDrift()
+        self.lock = Lock()
+
+    def update_instrument(self, object_id: str, data: Dict) -> None:
+        if data.get("currencyCode"):
+            self.currencies[object_id] = data["currencyCode"]
+
+    def update_quote(self, object_id: str, price: float, observed_at: Optional[float] = None) -> None:
+        self.quotes[object_id] = price
+        self.quoted_at[object_id] = time.monotonic() if observed_at is None else observed_at
+
+    def has_fresh_quote(self, object_id: str) -> bool:
+        """Whether the instrument has a quote younger than `quote_max_age`."""
+        if object_id not in self.quotes:
+            return False
+        return self.quote_max_age is None or time.monotonic() - self.quoted_at[object_id] <= self.quote_max_age
+
+    def update_fx_rate(self, from_currency: str, to_currency: str, rate: float) -> None:
+        self.fx_rates.update(from_currency, to_currency, rate)
+
+    def get_fx_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        # Stale rates are not used, so estimates fall back to a review that refreshes them.
+        return self.fx_rates.get(from_currency, to_currency)
+
+    def can_estimate(self, object_id: str) -> bool:
+        currency = self.currencies.get(object_id)
+        return (currency is not None and self.has_fresh_quote(object_id)
+                and self.get_fx_rate(currency, self.account_currency) is not None)
+
+    def estimate(self, object_id: str, value: float) -> Dict:
+        """Estimates the costs of a value order.
+
+        Args:
+            object_id: Trading212 object id e.g. MSFT_US_EQ.
+            value: Signed order value in the account currency, negative for sells.
+
+        Returns:
+            Costs data in the format of the order review response.
+        """
+        if not self.can_estimate(object_id):
+            raise ValueError(f"Missing instrument data, quote or exchange rate to estimate costs for {object_id}.")
+
+        currency = self.currencies[object_id]
+        rate = self.get_fx_rate(currency, self.account_currency)
+        price = self.quotes[object_id] * rate
+
+        costs = {}
+        if currency != self.account_currency:
+            costs[CURRENCY_CONVERSION_FEE] = math.floor(abs(value) * self.conversion_fee_rate * 100) / 100
+
+        shares_value = math.copysign(abs(value) - sum(costs.values()), value)
+        return {
+            "orderQuantity": shares_value / price,
+            "sharesValue": round(shares_value, 2),
+            "total": value,
+            "exchangeRate": {"fromCurrency": currency, "toCurrency": self.account_currency, "rate": rate},
+            "costs": costs,
+        }
+
+    def observe_review(self, object_id: str, value: float, review: Dict) -> None:
+        """Records an order review, comparing it with the local estimate and learning its rates.
+
+        Args:
+            object_id: Trading212 object id e.g. MSFT_US_EQ.
+            value: Signed order value that was reviewed.
+            review: Response of `endpoints.ORDER_COSTS_URL`.
+        """
+        with self.lock:
+            if self.can_estimate(object_id):
+                self.drift.record(self.estimate(object_id, value), review)
+
+            exchange_rate = review.get("exchangeRate") or {}
+            if exchange_rate.get("rate"):
+                self.update_fx_rate(exchange_rate["fromCurrency"], exchange_rate["toCurrency"], exchange_rate["rate"])
+                self.currencies.setdefault(object_id, exchange_rate["fromCurrency"])
@@ -18,6 +18,7 @@ PLACE_ORDER_URL = f"https://{environment}.trading212.com/rest/v1/equity/value-or
 ORDER_COSTS_URL = f"https://{environment}.trading212.com/rest/v1/equity/value-order/review"
 TICKER_PRICE_URL = f"https://{environment}.trading212.com/charting/v1/watchlist/batch/deviations"
 TICKER_PRICE_URL_V2 = f"https://{environment}.services.trading212.com/charting/v2/json/{{object_id}}/preview/extended/deviation"
+TICKER_CANDLES_URL = f"https://{environment}.services.trading212.com/charting/v3/candles"
 AUTHENTICATE_URL = f"https://{environment}.trading212.com/rest/v1/webclient/authenticate"
 ORDER_HISTORY = f"https://{environment}.trading212.com/rest/history/orders"
 ACCOUNT_SUMMARY_URL = f"https://{environment}.trading212.com/rest/trading/v1/accounts/summary"
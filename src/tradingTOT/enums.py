@@ -13,6 +13,22 @@ class OrderType(str, Enum):
     SELL = "SELL"
 
 
+class OrderPriority(int, Enum):
+    CRITICAL = 0
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+
+class AccountEventType(str, Enum):
+    CASH_CHANGED = "CASH_CHANGED"
+    POSITION_OPENED = "POSITION_OPENED"
+    POSITION_CHANGED = "POSITION_CHANGED"
+    POSITION_CLOSED = "POSITION_CLOSED"
+    ORDER_ADDED = "ORDER_ADDED"
+    ORDER_REMOVED = "ORDER_REMOVED"
+
+
 class Environment(str, Enum):
     demo = "demo"
     live = "live"
@@ -21,3 +37,16 @@ class Environment(str, Enum):
 class FailureTypes(str, Enum):
     InsufficientValueForStocksSell = "InsufficientValueForStocksSell"
     ValuePrecisionMismatch = "ValuePrecisionMismatch"
+    InsufficientFundsForStocksBuy = "InsufficientFundsForStocksBuy"
+
+
+class CandlePeriod(str, Enum):
+    ONE_MINUTE = "ONE_MINUTE"
+    FIVE_MINUTES = "FIVE_MINUTES"
+    TEN_MINUTES = "TEN_MINUTES"
+    FIFTEEN_MINUTES = "FIFTEEN_MINUTES"
+    THIRTY_MINUTES = "THIRTY_MINUTES"
+    ONE_HOUR = "ONE_HOUR"
+    FOUR_HOURS = "FOUR_HOURS"
+    ONE_DAY = "ONE_DAY"
+    ONE_WEEK = "ONE_WEEK"
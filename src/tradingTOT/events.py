@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import queue
+import time
+from dataclasses import dataclass, field
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, List, Optional, Sequence
+
+from tradingTOT.enums import AccountEventType
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CASH_FIELDS = ("free", "freeForStocks", "blockedForStocks")
+DEFAULT_POSITION_FIELDS = ("quantity",)
+
+
+@dataclass(frozen=True)
+class AccountEvent:
+    type: AccountEventType
+    # positionId of position events, orderId of order events and None for cash events.
+    key: Optional[str]
+    previous: Optional[Dict]
+    current: Optional[Dict]
+    # Changed fields with their previous and current values.
+    changes: Dict[str, tuple] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+
+def _changes(previous: Dict, current: Dict, fields: Sequence[str]) -> Dict[str, tuple]:
+    return {name: (previous.get(name), current.get(name)) for name in fields
+            if previous.get(name) != current.get(name)}
+
+
+def _by_key(items: List[Dict], key: str) -> Dict[str, Dict]:
+    return {str(item[key]): item for item in items if item.get(key) is not None}
+
+
+class SummaryDiffer:
+    """Turns successive account summaries into the changes between them.
+
+    Positions are matched by `positionId` and orders by `orderId`, so each diff is one dictionary lookup per item.
+    Only the tracked fields of cash and positions raise change events, leaving out the values that move with every
+    price tick.
+    """
+    def __init__(self, cash_fields: Sequence[str] = DEFAULT_CASH_FIELDS,
+                 position_fields: Sequence[str] = DEFAULT_POSITION_FIELDS) -> None:
+        self.cash_fields = tuple(cash_fields)
+        self.position_fields = tuple(position_fields)
+        self.cash: Optional[Dict] = None
+        self.positions: Dict[str, Dict] = {}
+        self.orders: Dict[str, Dict] = {}
+
+    def diff(self, summary: Dict) -> List[AccountEvent]:
+        """Compares a summary with the previous one.
+
+        Args:
+            summary: Decoded response of `endpoints.ACCOUNT_SUMMARY_URL_SERVICES`.
+
+        Returns:
+            The change events, none for the first summary.
+        """
+        cash = summary.get("cash") or {}
+        positions = _by_key(summary.get("open", {}).get("items", []), "positionId")
+        orders = _by_key(summary.get("valueOrders", {}).get("items", []) + summary.get("orders", {}).get("items", []),
+                         "orderId")
+
+        events = []
+        if self.cash is not None:
+            changes = _changes(self.cash, cash, self.cash_fields)
+            if changes:
+                events.append(AccountEvent(AccountEventType.CASH_CHANGED, None, self.cash, cash, changes))
+
+            for key, position in positions.items():
+                previous = self.positions.get(key)
+                if previous is None:
+                    events.append(AccountEvent(AccountEventType.POSITION_OPENED, key, None, position))
+                    continue
+                changes = _changes(previous, position, self.position_fields)
+                if changes:
+                    events.append(AccountEvent(AccountEventType.POSITION_CHANGED, key, previous, position, changes))
+            events.extend(AccountEvent(AccountEventType.POSITION_CLOSED, key, position, None)
+                          for key, position in self.positions.items() if key not in positions)
+
+            events.extend(AccountEvent(AccountEventType.ORDER_ADDED, key, None, order)
+                          for key, order in orders.items() if key not in self.orders)
+            events.extend(AccountEvent(AccountEventType.ORDER_REMOVED, key, order, None)
+                          for key, order in self.orders.items() if key not in orders)
+
+        self.cash, self.positions, self.orders = cash, positions, orders
+        return events
+
+
+class AccountEventStream:
+    """Polls the account summary at a fixed cadence and publishes what changed between polls.
+
+    Events are delivered to callbacks, to the queues of subscribers and to async iterators over the stream, so
+    consumers only handle changes instead of re-walking every summary. Each subscriber and async iterator gets its own
+    queue, which keeps the latest `max_queued` events and drops the oldest when it is not drained. Events are only
+    queued while there is a subscriber.
+
+    Example:
+        with tot.account_events(interval=2) as stream:
+            stream.add_callback(print)
+    """
+    def __init__(self, client, interval: float = 5.0, cash_fields: Sequence[str] = DEFAULT_CASH_FIELDS,
+                 position_fields: Sequence[str] = DEFAULT_POSITION_FIELDS, max_queued: int = 1000) -> None:
+        """
+        Args:
+            client: `tradingTOT` instance.
+            interval: Seconds between summary fetches.
+            cash_fields: Cash fields whose changes raise `CASH_CHANGED`.
+            position_fields: Position fields whose changes raise `POSITION_CHANGED`.
+            max_queued: Maximum number of undelivered events kept for each subscriber.
+        """
+        self.client = client
+        self.interval = interval
+        self.differ = SummaryDiffer(cash_fields, position_fields)
+        self.max_queued = max_queued
+        self.subscribers: List["queue.Queue[AccountEvent]"] = []
+        self.lock = Lock()
+        self.callbacks: List[Callable[[AccountEvent], None]] = []
+        self.stopped = Event()
+        self.thread: Optional[Thread] = None
+
+    def add_callback(self, callback: Callable[[AccountEvent], None]) -> None:
+        self.callbacks.append(callback)
+
+    def subscribe(self) -> "queue.Queue[AccountEvent]":
+        """Creates a queue that receives every event from now on, until it is passed to `unsubscribe`."""
+        subscriber: "queue.Queue[AccountEvent]" = queue.Queue(maxsize=self.max_queued)
+        with self.lock:
+            self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: "queue.Queue[AccountEvent]") -> None:
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    @staticmethod
+    def _enqueue(subscriber: "queue.Queue[AccountEvent]", event: AccountEvent) -> None:
+        while True:
+            try:
+                subscriber.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def poll(self) -> List[AccountEvent]:
+        """Fetches the summary once and publishes the changes since the previous poll."""
+        events = self.differ.diff(self.client._get_summary())
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for event in events:
+            for subscriber in subscribers:
+                self._enqueue(subscriber, event)
+            for callback in self.callbacks:
+                try:
+                    callback(event)
+                except Exception:
+                    logger.exception(f"Account event callback failed for {event.type.value}.")
+        return events
+
+    def _run(self) -> None:
+        while not self.stopped.is_set():
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Account event poll failed.")
+            self.stopped.wait(max(self.interval - (time.monotonic() - started), 0))
+
+    def start(self) -> "AccountEventStream":
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = Thread(target=self._run, name="tradingTOT-account-events", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self) -> "AccountEventStream":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        subscriber = self.subscribe()
+        try:
+            while not self.stopped.is_set():
+                try:
+                    yield await loop.run_in_executor(None, subscriber.get, True, 0.5)
+                except queue.Empty:
+                    continue
+        finally:
+            self.unsubscribe(subscriber)
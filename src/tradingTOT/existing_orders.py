@@ -1,4 +1,6 @@
-from typing import Union, Dict, List
+import time
+from threading import Lock
+from typing import Union, Dict, List, Optional, Set
 
 import requests
 from requests.models import Response
@@ -6,12 +8,53 @@ from requests.models import Response
 from tradingTOT.endpoints import AUTHENTICATE_URL, ACCOUNT_SUMMARY_URL, ACCOUNT_SUMMARY_URL_SERVICES
 from tradingTOT.schemas.api_responses import SummarySchema, AfterOrderSchema
 from tradingTOT.utils.browser import enforce_auth
+from tradingTOT.utils.decoding import decode
 
 
 class ExistingOrdersHandler:
-    """The ExistingOrdersHandler"""
-    def __init__(self, session):
-        self.session = session
+    """The ExistingOrdersHandler
+
+    It also keeps the ids of the open value orders from the latest summary or execution response it handled, so that
+    orders created by a placement can be told apart without fetching the summary first.
+    """
+    def __init__(self, session=None, max_age: float = 60, client=None):
+        """
+        Args:
+            session: Session used to fetch the summary when there is no client.
+            max_age: Seconds the known order ids are trusted for.
+            client: Client whose current session is used, so the session that replaces it after a re-login is too.
+        """
+        self.client = client
+        self._session = session
+        self.max_age = max_age
+        self.known_order_ids: Set[str] = set()
+        self.refreshed_at: Optional[float] = None
+        self.lock = Lock()
+
+    @property
+    def session(self):
+        return self.client.session if self.client is not None else self._session
+
+    @session.setter
+    def session(self, session) -> None:
+        if self.client is not None:
+            self.client.session = session
+        else:
+            self._session = session
+
+    def is_stale(self) -> bool:
+        """Whether the known order ids are missing or older than `max_age` seconds."""
+        return self.refreshed_at is None or time.monotonic() - self.refreshed_at > self.max_age
+
+    def _remember(self, orders: List) -> None:
+        # Both the summary and the execution response list every open value order of the account.
+        with self.lock:
+            self.known_order_ids = {order.get("orderId") for order in orders}
+            self.refreshed_at = time.monotonic()
+
+    def observe_summary(self, response: Dict) -> None:
+        """Updates the known order ids from an already decoded summary response."""
+        self._remember(response.get("valueOrders", {}).get("items", []))
 
     def from_summary(self, response: Union[Response, Dict, None] = None) -> List:
         """Extracts existing orders using the Trading212 summary response or endpoint.
@@ -22,14 +65,15 @@ class ExistingOrdersHandler:
         Returns:
         """
         if not response:
-            enforce_auth(lambda x: x)(self)
-            response = self.session.post(ACCOUNT_SUMMARY_URL_SERVICES, json=[]).json()
+            # The client logs in with its own session factory and auth storage.
+            enforce_auth(lambda x: x)(self.client if self.client is not None else self)
+            response = decode(self.session.post(ACCOUNT_SUMMARY_URL_SERVICES, json=[]))
 
-        if isinstance(response, requests.models.Response):
-            response = response.json()
+        response = decode(response)
 
         SummarySchema.model_validate(response)
         existing_orders = response.get("valueOrders", {}).get("items", [])
+        self._remember(existing_orders)
         return existing_orders
 
     def from_execution_response(self, response: Union[Response, Dict]) -> List:
@@ -40,9 +84,28 @@ class ExistingOrdersHandler:
 
         Returns:
         """
-        if isinstance(response, requests.models.Response):
-            response = response.json()
+        response = decode(response)
 
         AfterOrderSchema.model_validate(response)
         existing_orders = response.get("account", {}).get("equityValueOrders", [])
-        return existing_orders
\ No newline at end of file
+        self._remember(existing_orders)
+        return existing_orders
+
+    def snapshot(self) -> Set[str]:
+        """Copy of the known order ids, to take before placing an order and pass to `new_orders`."""
+        with self.lock:
+            return set(self.known_order_ids)
+
+    def new_orders(self, response: Union[Response, Dict], known_order_ids: Optional[Set[str]] = None) -> List:
+        """Extracts the orders in the response from placing an order that were not known before it.
+
+        Args:
+            response: The response of an order placed using `endpoints.PLACE_ORDER_URL`.
+            known_order_ids: `snapshot` taken before the order was placed. Defaults to the ids known now, which a
+                summary fetched concurrently with the placement may already include the new order in.
+
+        Returns:
+        """
+        known_order_ids = self.snapshot() if known_order_ids is None else known_order_ids
+        existing_orders = self.from_execution_response(response)
+        return [order for order in existing_orders if order.get("orderId") not in known_order_ids]
\ No newline at end of file
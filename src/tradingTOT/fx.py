@@ -0,0 +1,90 @@
+import time
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+
+# Seconds an observed exchange rate is used for before it is considered stale.
+DEFAULT_FX_TTL = 15 * 60
+
+
+class FXRateCache:
+    """Exchange rates between currencies, learned from the rates Trading212 already returns.
+
+    Rates come from order reviews and from the order history, so converting values between the instrument and
+    account currencies does not need a request of its own. A rate is fresh for `ttl` seconds after it was observed
+    and the inverse of a known pair is used when only the other direction was seen.
+
+    Example:
+        fx = FXRateCache(ttl=600)
+        fx.update("USD", "GBP", 0.79)
+        fx.convert(100, "USD", "GBP")
+    """
+    def __init__(self, ttl: Optional[float] = DEFAULT_FX_TTL) -> None:
+        """
+        Args:
+            ttl: Seconds a rate stays fresh. Rates never go stale if None.
+        """
+        self.ttl = ttl
+        self.rates: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self.lock = Lock()
+
+    def update(self, from_currency: str, to_currency: str, rate: float, observed_at: Optional[float] = None) -> None:
+        """Records the rate that converts an amount in `from_currency` to `to_currency`.
+
+        Args:
+            from_currency: Currency code, e.g. USD.
+            to_currency: Currency code, e.g. GBP.
+            rate: Amount of `to_currency` for one unit of `from_currency`.
+            observed_at: `time.monotonic()` time the rate was observed at. Defaults to now.
+        """
+        if not rate or from_currency == to_currency:
+            return
+        with self.lock:
+            self.rates[(from_currency, to_currency)] = (rate, time.monotonic() if observed_at is None else observed_at)
+            self.rates.pop((to_currency, from_currency), None)
+
+    def _lookup(self, from_currency: str, to_currency: str) -> Optional[Tuple[float, float]]:
+        with self.lock:
+            if (from_currency, to_currency) in self.rates:
+                return self.rates[(from_currency, to_currency)]
+            if (to_currency, from_currency) in self.rates:
+                rate, observed_at = self.rates[(to_currency, from_currency)]
+                return 1 / rate, observed_at
+        return None
+
+    def is_fresh(self, from_currency: str, to_currency: str) -> bool:
+        """Whether the rate is known and younger than `ttl`."""
+        if from_currency == to_currency:
+            return True
+        found = self._lookup(from_currency, to_currency)
+        return found is not None and (self.ttl is None or time.monotonic() - found[1] <= self.ttl)
+
+    def get(self, from_currency: str, to_currency: str, allow_stale: bool = False) -> Optional[float]:
+        """Rate that converts an amount in `from_currency` to `to_currency`.
+
+        Args:
+            from_currency: Currency code, e.g. USD.
+            to_currency: Currency code, e.g. GBP.
+            allow_stale: Return a rate older than `ttl` instead of None.
+
+        Returns:
+            The rate, or None if it is unknown or stale.
+        """
+        if from_currency == to_currency:
+            return 1.0
+        if not allow_stale and not self.is_fresh(from_currency, to_currency):
+            return None
+        found = self._lookup(from_currency, to_currency)
+        return found[0] if found else None
+
+    def convert(self, amount: float, from_currency: str, to_currency: str,
+                allow_stale: bool = False) -> Optional[float]:
+        """Converts an amount with the cached rate, returning None if the rate is unknown or stale."""
+        rate = self.get(from_currency, to_currency, allow_stale)
+        return None if rate is None else amount * rate
+
+    def observe_review(self, review: Dict) -> None:
+        """Records the exchange rate of an order review response of `endpoints.ORDER_COSTS_URL`."""
+        exchange_rate = review.get("exchangeRate") or {}
+        if exchange_rate.get("rate") and exchange_rate.get("fromCurrency") and exchange_rate.get("toCurrency"):
+            self.update(exchange_rate["fromCurrency"], exchange_rate["toCurrency"], exchange_rate["rate"])
@@ -0,0 +1,130 @@
+import json
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from tradingTOT.utils.storage import DEFAULT_INSTRUMENTS_DIRECTORY
+
+
+INSTRUMENT_INDEX_NAME = "instrument.ld4.EN"
+SEARCH_FIELDS = ("name", "shortName", "exchangeName")
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"[^0-9a-z]+", " ", text.lower()).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    """Splits text into trigrams, padding each word so that prefixes get their own trigrams."""
+    grams = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class InstrumentIndex:
+    """Local search index over the instruments in Trading212's Algolia index.
+
+    Exact lookups by `shortName` or `objectID` are dictionary hits, while fuzzy searches over `SEARCH_FIELDS`
+    rank instruments by trigram similarity.
+    """
+    def __init__(self, instruments: Optional[List[Dict]] = None):
+        self.instruments: List[Dict] = []
+        self.by_short_name: Dict[str, List[int]] = defaultdict(list)
+        self.by_object_id: Dict[str, int] = {}
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        self.gram_counts: List[int] = []
+        self.add(instruments or [])
+
+    def __len__(self) -> int:
+        return len(self.instruments)
+
+    def add(self, instruments: List[Dict]) -> None:
+        for instrument in instruments:
+            object_id = instrument.get("objectID")
+            if object_id in self.by_object_id:
+                continue
+
+            # Algolia adds ranking and highlighting data that is only relevant to the query that returned the hit.
+            instrument = {k: v for k, v in instrument.items() if not k.startswith("_")}
+            position = len(self.instruments)
+            self.instruments.append(instrument)
+            self.by_object_id[object_id] = position
+            self.by_short_name[(instrument.get("shortName") or "").upper()].append(position)
+
+            grams = set()
+            for field in SEARCH_FIELDS:
+                grams |= trigrams(instrument.get(field) or "")
+            for gram in grams:
+                self.postings[gram].append(position)
+            self.gram_counts.append(len(grams))
+
+    def get(self, object_id: str) -> Optional[Dict]:
+        position = self.by_object_id.get(object_id)
+        return None if position is None else self.instruments[position]
+
+    def lookup(self, short_name: str) -> List[Dict]:
+        """Instruments whose `shortName` matches exactly, ignoring case."""
+        return [self.instruments[i] for i in self.by_short_name.get(short_name.upper(), [])]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Fuzzy search over the name, short name and exchange name of the instruments.
+
+        Args:
+            query: Company name, ticker or a part of either.
+            limit: Maximum number of results.
+
+        Returns:
+            Matching instruments, best match first.
+        """
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        overlaps = Counter()
+        for gram in query_grams:
+            overlaps.update(self.postings.get(gram, []))
+
+        exact = set(self.by_short_name.get(query.upper(), []))
+
+        def score(position: int) -> float:
+            overlap = overlaps[position]
+            similarity = overlap / (len(query_grams) + self.gram_counts[position] - overlap)
+            return similarity + (1 if position in exact else 0)
+
+        ranked = sorted(set(overlaps) | exact, key=score, reverse=True)
+        return [self.instruments[i] for i in ranked[:limit]]
+
+    def save(self, path: Optional[Path] = None) -> Path:
+        path = path or default_index_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as handler:
+            json.dump(self.instruments, handler)
+        return path
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> Optional["InstrumentIndex"]:
+        path = path or default_index_path()
+        if not path.exists():
+            return None
+
+        with open(path) as handler:
+            return cls(json.load(handler))
+
+
+def default_index_path() -> Path:
+    return Path(DEFAULT_INSTRUMENTS_DIRECTORY, f"{INSTRUMENT_INDEX_NAME}.json")
+
+
+def main() -> None:
+    """Downloads every instrument from Algolia and saves the local index."""
+    from tradingTOT.tradingTOT import tradingTOT
+
+    index = tradingTOT().build_instrument_index()
+    print(f"Indexed {len(index)} instruments into {default_index_path()}.")
+
+
+if __name__ == "__main__":
+    main()
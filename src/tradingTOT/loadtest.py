@@ -0,0 +1,509 @@
+import argparse
+import asyncio
+import json
+import random
+import re
+import tempfile
+import time
+import uuid
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+from requests import PreparedRequest, Response, Session
+from requests.adapters import BaseAdapter
+
+from tradingTOT.endpoints import (VALIDATE_URL, PLACE_ORDER_URL, ORDER_COSTS_URL, TICKER_PRICE_URL,
+                                  TICKER_PRICE_URL_V2, AUTHENTICATE_URL, ORDER_HISTORY, ACCOUNT_SUMMARY_URL_SERVICES,
+                                  ALGOLIA_CONFIG_URL)
+from tradingTOT.enums import OrderStatus, OrderType
+from tradingTOT.exceptions import BrokerOrderError, OrderOperationError
+from tradingTOT.paper import PaperTradingTOT, SyntheticPriceFeed
+from tradingTOT.sequencing import OrderClaims, OrderSequencer, ThreadOrderSequencer
+from tradingTOT.utils.storage import AuthData, Storage
+
+
+DEFAULT_MIX = {"place_order": 1, "get_status": 2, "get_positions": 2, "get_ask_price": 4}
+DEFAULT_TICKERS = ("MSFT", "AAPL", "TSLA", "NVDA", "AMZN")
+
+
+def _pattern(url: str) -> re.Pattern:
+    return re.compile(re.escape(url).replace(re.escape("{object_id}"), "(?P<object_id>[^/]+)")
+                      + r"(?:/(?P<item_id>[^/?]+))?(?:\?.*)?$", re.IGNORECASE)
+
+
+class StandInServer:
+    """In-process stand-in for the Trading212 endpoints used by `tradingTOT`, backed by a `PaperTradingTOT` book.
+
+    Sessions from `session` send their requests to it instead of the network. Each request sleeps for `latency`
+    seconds and each login for `login_latency` seconds, and login tokens expire after `token_ttl` seconds, so
+    contention on the order lock and re-authentication can be observed without a browser or an account.
+    """
+    def __init__(self, tickers: Sequence[str] = DEFAULT_TICKERS, latency: float = 0.002, login_latency: float = 0.5,
+                 token_ttl: Optional[float] = None, fill_interval: float = 0.05, seed: Optional[int] = None) -> None:
+        """
+        Args:
+            tickers: Instruments the server knows.
+            latency: Seconds each request takes.
+            login_latency: Seconds a login takes, standing in for the Selenium login.
+            token_ttl: Seconds a login token stays valid. Tokens never expire if it is None.
+            fill_interval: Seconds between price moves, when open orders are filled.
+            seed: Random seed of the price paths.
+        """
+        feed = SyntheticPriceFeed({ticker: 100.0 for ticker in tickers}, steps=100_000, seed=seed)
+        self.book = PaperTradingTOT(feed, cash=10 ** 9, fill_immediately=False)
+        self.tickers = list(tickers)
+        self.latency = latency
+        self.login_latency = login_latency
+        self.token_ttl = token_ttl
+        self.fill_interval = fill_interval
+        self.tokens: Dict[str, float] = {}
+        self.logins = 0
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.lock = Lock()
+        self.stopped = Event()
+        self.thread: Optional[Thread] = None
+        self.routes = [
+            ("GET", _pattern(AUTHENTICATE_URL), "authenticate", self._authenticate),
+            ("POST", _pattern(ACCOUNT_SUMMARY_URL_SERVICES), "summary", self._summary),
+            ("POST", _pattern(VALIDATE_URL), "validate", self._validate),
+            ("POST", _pattern(ORDER_COSTS_URL), "review", self._review),
+            ("POST", _pattern(PLACE_ORDER_URL), "place", self._place),
+            ("DELETE", _pattern(PLACE_ORDER_URL), "cancel", self._cancel),
+            ("GET", _pattern(TICKER_PRICE_URL_V2), "price", self._price),
+            ("POST", _pattern(TICKER_PRICE_URL), "prices", self._prices),
+            ("GET", _pattern(ORDER_HISTORY), "history", self._history),
+            ("GET", _pattern(ALGOLIA_CONFIG_URL), "algolia_config", self._algolia_config),
+        ]
+
+    def login(self) -> AuthData:
+        """Issues a new login token, taking as long as a login."""
+        time.sleep(self.login_latency)
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.logins += 1
+            self.tokens[token] = time.monotonic()
+        return AuthData(DUUID=uuid.uuid4().hex, LoginToken=token)
+
+    def is_valid(self, token: Optional[str]) -> bool:
+        issued_at = self.tokens.get(token)
+        if issued_at is None:
+            return False
+        return self.token_ttl is None or time.monotonic() - issued_at < self.token_ttl
+
+    def session(self) -> Session:
+        session = Session()
+        session.mount("https://", StandInAdapter(self))
+        return session
+
+    def auth_storage(self) -> "StandInAuthStorage":
+        return StandInAuthStorage(self)
+
+    def handle(self, request: PreparedRequest) -> Response:
+        time.sleep(self.latency)
+        if urlsplit(request.url).hostname.endswith("algolia.net"):
+            route, handler, match = "algolia_search", self._algolia_search, None
+        else:
+            for method, pattern, route, handler in self.routes:
+                match = pattern.match(request.url)
+                if method == request.method and match:
+                    break
+            else:
+                return _response(request, 404, {})
+
+        with self.lock:
+            self.requests[route] += 1
+        if route.startswith("algolia") or self.is_valid(_cookie(request, "LOGIN_TOKEN")):
+            return handler(request, match)
+        return _response(request, 401, {"code": "AuthenticationFailed"})
+
+    def _authenticate(self, request: PreparedRequest, match: re.Match) -> Response:
+        return _response(request, 200, {})
+
+    def _summary(self, request: PreparedRequest, match: re.Match) -> Response:
+        return _response(request, 200, self.book._get_summary())
+
+    def _validate(self, request: PreparedRequest, match: re.Match) -> Response:
+        payload = json.loads(request.body)
+        try:
+            with self.book.lock:
+                self.book._validate(payload["instrumentCode"], payload["value"])
+        except BrokerOrderError as err:
+            return _response(request, 400, {"code": str(err).rsplit(": ", 1)[-1]})
+        return _response(request, 200, None)
+
+    def _review(self, request: PreparedRequest, match: re.Match) -> Response:
+        payload = json.loads(request.body)
+        value = payload["value"]
+        return _response(request, 200, self.book.get_costs(OrderType.BUY if value > 0 else OrderType.SELL,
+                                                           payload["instrumentCode"], abs(value)))
+
+    def _place(self, request: PreparedRequest, match: re.Match) -> Response:
+        if match.group("item_id"):
+            return _response(request, 404, {})
+        payload = json.loads(request.body)
+        value = payload["value"]
+        # The open orders are read under the same lock, so the new order cannot be filled before it is listed.
+        with self.book.lock:
+            try:
+                self.book.place_order(OrderType.BUY if value > 0 else OrderType.SELL, payload["instrumentCode"],
+                                      abs(value))
+            except BrokerOrderError as err:
+                return _response(request, 400, {"code": str(err).rsplit(": ", 1)[-1]})
+            summary = self.book._get_summary()
+
+        account = {"dealer": "AVUSUK", "positions": summary["open"]["items"], "cash": summary["cash"],
+                   "limitStop": [], "oco": [], "ifThen": [], "equityOrders": [],
+                   "equityValueOrders": summary["valueOrders"]["items"], "id": 1,
+                   "timestamp": int(time.time() * 1000)}
+        return _response(request, 200, {"account": account})
+
+    def _cancel(self, request: PreparedRequest, match: re.Match) -> Response:
+        try:
+            return _response(request, 200, self.book.cancel_order(match.group("item_id")))
+        except OrderOperationError:
+            return _response(request, 404, {})
+
+    def _price(self, request: PreparedRequest, match: re.Match) -> Response:
+        price = self.book.get_ask_price(match.group("object_id"))
+        return _response(request, 200, {"timestamp": price["timestamp"], "close": price["close"]})
+
+    def _prices(self, request: PreparedRequest, match: re.Match) -> Response:
+        deviations = []
+        for item in json.loads(request.body):
+            deviation = None
+            if self.book._ticker(item["ticker"]) in self.tickers:
+                price = self.book.get_ask_price(item["ticker"])
+                deviation = {"timestamp": price["timestamp"], "close": price["close"]}
+            deviations.append({"request": item, "response": deviation})
+        return _response(request, 200, deviations)
+
+    def _history(self, request: PreparedRequest, match: re.Match) -> Response:
+        fill = self.book.history.get(match.group("item_id"))
+        if fill is None:
+            return _response(request, 404, {})
+        if fill["status"] == OrderStatus.REJECTED:
+            return _response(request, 200, {"sections": []})
+
+        rows = []
+        if fill["status"] == OrderStatus.COMPLETED:
+            rows = [
+                {"description": {"key": "history.details.order.fill.date-executed.key"},
+                 "value": {"context": {"date": self.book._now()}}},
+                {"description": {"key": "history.details.order.fill.price.key"},
+                 "value": {"context": {"amount": fill["price"], "currency": fill["currency"]}}},
+                {"description": {"key": "history.details.order.fill.quantity.key"},
+                 "value": {"context": {"quantity": fill["quantity"]}}},
+            ]
+        return _response(request, 200, {"sections": [{}, {}, {"rows": rows}]})
+
+    def _algolia_config(self, request: PreparedRequest, match: re.Match) -> Response:
+        return _response(request, 200, {"credentials": {"applicationId": "STANDIN", "searchApiKey": "standin"}})
+
+    def _algolia_search(self, request: PreparedRequest, match: Optional[re.Match]) -> Response:
+        params = parse_qs(json.loads(request.body)["requests"][0]["params"])
+        query = params.get("query", [""])[0].upper()
+        hits = [{"objectID": self.book._code(ticker), "shortName": ticker, "name": ticker, "category": "EQUITY",
+                 "uiType": "STOCK", "exchangeName": "NASDAQ", "currencyCode": self.book.currency}
+                for ticker in self.tickers if query in ticker]
+        return _response(request, 200, {"results": [{"hits": hits, "nbPages": 1}]})
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.fill_interval):
+            self.book.advance()
+
+    def start(self) -> "StandInServer":
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = Thread(target=self._run, name="tradingTOT-standin", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class StandInAdapter(BaseAdapter):
+    """Transport adapter that sends the requests of a session to a `StandInServer`."""
+    def __init__(self, server: StandInServer) -> None:
+        super().__init__()
+        self.server = server
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        return self.server.handle(request)
+
+    def close(self) -> None:
+        pass
+
+
+class StandInAuthStorage(Storage):
+    """Auth storage that logs in to a `StandInServer` when it holds no valid token, in place of the browser."""
+    def __init__(self, server: StandInServer) -> None:
+        self.server = server
+        self.auth_data: Optional[AuthData] = None
+
+    def read(self) -> AuthData:
+        if self.auth_data is None:
+            self.auth_data = self.server.login()
+        return self.auth_data
+
+    def write(self, data: AuthData) -> None:
+        self.auth_data = data
+
+    def delete(self) -> None:
+        self.auth_data = None
+
+
+class TimedOrderSequencer(OrderSequencer):
+    """Wraps an `OrderSequencer` and records how long each acquire waited."""
+    def __init__(self, sequencer: OrderSequencer) -> None:
+        self.sequencer = sequencer
+        self.waits: List[float] = []
+
+    def acquire(self, account: str, timeout: Optional[float] = None) -> bool:
+        start = time.perf_counter()
+        acquired = self.sequencer.acquire(account, timeout)
+        self.waits.append(time.perf_counter() - start)
+        return acquired
+
+    def release(self, account: str) -> None:
+        self.sequencer.release(account)
+
+
+def _response(request: PreparedRequest, status_code: int, body) -> Response:
+    response = Response()
+    response.status_code = status_code
+    response._content = b"" if body is None else json.dumps(body).encode()
+    response.headers["Content-Type"] = "application/json"
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    return response
+
+
+def _cookie(request: PreparedRequest, name: str) -> Optional[str]:
+    for cookie in request.headers.get("Cookie", "").split(";"):
+        key, _, value = cookie.strip().partition("=")
+        if key == name:
+            return value
+    return None
+
+
+@dataclass
+class LoadTestConfig:
+    """
+    Args:
+        workers: Number of concurrent workers.
+        duration: Seconds to run for.
+        mix: Relative weight of each operation.
+        mode: "threads" runs each worker in a thread, "async" runs them as asyncio tasks over a thread executor.
+        shared_client: Share one `tradingTOT` between the workers instead of creating one per worker.
+        order_amount: Value of each order placed.
+        tickers: Instruments to trade and quote.
+        latency: Seconds each stand-in request takes.
+        login_latency: Seconds each stand-in login takes.
+        token_ttl: Seconds a login token stays valid. Tokens never expire if it is None.
+        seed: Random seed of the operation mix and the prices.
+    """
+    workers: int = 8
+    duration: float = 10.0
+    mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    mode: str = "threads"
+    shared_client: bool = True
+    order_amount: int = 10
+    tickers: Sequence[str] = DEFAULT_TICKERS
+    latency: float = 0.002
+    login_latency: float = 0.5
+    token_ttl: Optional[float] = 5.0
+    seed: Optional[int] = None
+
+
+@dataclass
+class LoadTestReport:
+    duration: float
+    operations: int
+    throughput: float
+    errors: Dict[str, int]
+    latency: Dict[str, Dict[str, float]]
+    lock_wait: Dict[str, float]
+    logins: int
+    requests: Dict[str, int]
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def format(self) -> str:
+        lines = [f"{self.operations} operations in {self.duration:.1f}s ({self.throughput:.1f}/s), "
+                 f"{sum(self.errors.values())} errors, {self.logins} logins",
+                 f"{'operation':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+        for name, stats in self.latency.items():
+            lines.append(f"{name:<16}{stats['count']:>8}{stats['p50']:>10.2f}{stats['p95']:>10.2f}"
+                         f"{stats['p99']:>10.2f}")
+        lock_wait = self.lock_wait
+        lines.append(f"{'order lock wait':<16}{lock_wait['count']:>8}{lock_wait['p50']:>10.2f}"
+                     f"{lock_wait['p95']:>10.2f}{lock_wait['p99']:>10.2f}")
+        return "\n".join(lines)
+
+
+def _distribution(seconds: List[float]) -> Dict[str, float]:
+    if not seconds:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    p50, p95, p99 = np.percentile(np.asarray(seconds) * 1000, [50, 95, 99])
+    return {"count": len(seconds), "p50": float(p50), "p95": float(p95), "p99": float(p99),
+            "max": float(max(seconds) * 1000)}
+
+
+class LoadTest:
+    """Drives concurrent workers through a weighted mix of client operations against a `StandInServer`.
+
+    Each operation goes through the real `tradingTOT` code paths, including `enforce_auth` and the order sequencer,
+    with only the transport replaced. Placed order ids are shared between workers so `get_status` checks orders
+    that are open, filled or unknown to the worker asking.
+
+    Example:
+        report = LoadTest(LoadTestConfig(workers=16, duration=30)).run()
+        print(report.format())
+    """
+    def __init__(self, config: Optional[LoadTestConfig] = None, server: Optional[StandInServer] = None) -> None:
+        self.config = config or LoadTestConfig()
+        self.server = server or StandInServer(self.config.tickers, self.config.latency, self.config.login_latency,
+                                              self.config.token_ttl, seed=self.config.seed)
+        self.sequencer = TimedOrderSequencer(ThreadOrderSequencer())
+        # One storage for every client, like the auth file they would share outside a load test.
+        self.auth_storage = self.server.auth_storage()
+        self.account = f"loadtest-{uuid.uuid4().hex}"
+        self.claims_dir = tempfile.TemporaryDirectory()
+        self.random = random.Random(self.config.seed)
+        self.order_ids = deque(maxlen=1000)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.clients = []
+
+    def client(self):
+        """A `tradingTOT` instance that talks to the stand-in server, with its own account and order claims."""
+        from tradingTOT.tradingTOT import tradingTOT
+
+        client = tradingTOT(order_sequencer=self.sequencer, auth_storage=self.auth_storage,
+                            session_factory=self.server.session)
+        client.account = self.account
+        client.order_claims = OrderClaims(self.account, self.claims_dir.name)
+        return client
+
+    def _operations(self, client) -> Dict[str, Callable[[], object]]:
+        def place_order():
+            order = client.place_order(OrderType.BUY, self.random.choice(self.config.tickers),
+                                       self.config.order_amount)
+            if "orderId" in order:
+                self.order_ids.append(order["orderId"])
+
+        def get_status():
+            if self.order_ids:
+                client.get_status(self.random.choice(self.order_ids))
+            else:
+                client.get_positions(set(self.config.tickers))
+
+        return {
+            "place_order": place_order,
+            "get_status": get_status,
+            "get_positions": lambda: client.get_positions(set(self.config.tickers)),
+            "get_ask_price": lambda: client.get_ask_price(self.random.choice(self.config.tickers)),
+        }
+
+    def _step(self, client) -> None:
+        names, weights = zip(*self.config.mix.items())
+        name = self.random.choices(names, weights)[0]
+        operation = self._operations(client)[name]
+        start = time.perf_counter()
+        try:
+            operation()
+        except Exception:
+            self.errors[name] += 1
+        finally:
+            self.latencies[name].append(time.perf_counter() - start)
+
+    def _worker(self, client, deadline: float) -> None:
+        while time.monotonic() < deadline:
+            self._step(client)
+
+    async def _run_async(self, clients: List, deadline: float) -> None:
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(self.config.workers, thread_name_prefix="tradingTOT-loadtest") as executor:
+            async def task(client):
+                while time.monotonic() < deadline:
+                    await loop.run_in_executor(executor, self._step, client)
+
+            await asyncio.gather(*(task(client) for client in clients))
+
+    def run(self) -> LoadTestReport:
+        config = self.config
+        if config.shared_client:
+            clients = [self.client()] * config.workers
+        else:
+            clients = [self.client() for _ in range(config.workers)]
+
+        with self.server:
+            start = time.perf_counter()
+            deadline = time.monotonic() + config.duration
+            if config.mode == "async":
+                asyncio.run(self._run_async(clients, deadline))
+            elif config.mode == "threads":
+                threads = [Thread(target=self._worker, args=(client, deadline), name=f"tradingTOT-loadtest-{i}")
+                           for i, client in enumerate(clients)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            else:
+                raise ValueError(f"The mode {config.mode} is not supported.")
+            elapsed = time.perf_counter() - start
+
+        operations = sum(len(latencies) for latencies in self.latencies.values())
+        return LoadTestReport(
+            duration=elapsed,
+            operations=operations,
+            throughput=operations / elapsed,
+            errors=dict(self.errors),
+            latency={name: _distribution(latencies) for name, latencies in sorted(self.latencies.items())},
+            lock_wait=_distribution(self.sequencer.waits),
+            logins=self.server.logins,
+            requests=dict(self.server.requests),
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load test tradingTOT against an in-process Trading212 stand-in.")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--mode", choices=["threads", "async"], default="threads")
+    parser.add_argument("--per-worker-client", action="store_true", help="Create one client per worker.")
+    parser.add_argument("--mix", type=json.loads, default=DEFAULT_MIX,
+                        help='Operation weights as JSON, e.g. \'{"place_order": 1, "get_ask_price": 4}\'.')
+    parser.add_argument("--latency", type=float, default=0.002, help="Seconds per stand-in request.")
+    parser.add_argument("--login-latency", type=float, default=0.5, help="Seconds per stand-in login.")
+    parser.add_argument("--token-ttl", type=float, default=5.0, help="Seconds a login token stays valid.")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args(argv)
+
+    config = LoadTestConfig(workers=args.workers, duration=args.duration, mix=args.mix, mode=args.mode,
+                            shared_client=not args.per_worker_client, latency=args.latency,
+                            login_latency=args.login_latency, token_ttl=args.token_ttl or None, seed=args.seed)
+    report = LoadTest(config).run()
+    print(json.dumps(report.to_dict(), indent=2) if args.json else report.format())
+
+
+if __name__ == "__main__":
+    main()
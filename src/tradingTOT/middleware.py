@@ -0,0 +1,219 @@
+import logging
+import re
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from threading import Condition, Lock
+from typing import Collection, Deque, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+import requests
+from requests.models import Response
+
+from tradingTOT.utils.tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+@dataclass
+class RequestContext:
+    method: str
+    url: str
+    kwargs: Dict
+    # Attempt number, starting at 1, which a middleware that resends the request increases.
+    attempt: int = 1
+    started_at: float = field(default_factory=time.monotonic)
+    # Set by a middleware to send the request again once every hook of the attempt has run.
+    retry: bool = False
+    # Free-form state for middleware to share between their hooks.
+    state: Dict = field(default_factory=dict)
+
+
+class Middleware:
+    """Hooks run around every request made by `tradingTOT.request` and the built-in client methods.
+
+    Subclasses override the hooks they need. `before_request` runs in the order the middleware were added and may
+    edit `context.kwargs` or return a response to skip sending, e.g. from a cache. `after_response` and `on_error`
+    run in the reverse order and may set `context.retry` to send the request again.
+    """
+    def before_request(self, context: RequestContext) -> Optional[Response]:
+        return None
+
+    def after_response(self, context: RequestContext, response: Response) -> Response:
+        return response
+
+    def on_error(self, context: RequestContext, error: Exception) -> None:
+        return None
+
+
+class MiddlewarePipeline:
+    """Ordered middleware chain that requests are sent through."""
+    def __init__(self, middleware: Iterable[Middleware] = ()) -> None:
+        self.middleware: List[Middleware] = list(middleware)
+
+    def add(self, middleware: Middleware, index: Optional[int] = None) -> None:
+        """Adds a middleware last, or at `index` of the chain."""
+        if index is None:
+            self.middleware.append(middleware)
+        else:
+            self.middleware.insert(index, middleware)
+
+    def remove(self, middleware: Middleware) -> None:
+        self.middleware.remove(middleware)
+
+    def send(self, session: requests.Session, method: str, url: str, **kwargs) -> Response:
+        """Sends a request through the chain.
+
+        Args:
+            session: Session the request is sent with.
+            method: HTTP method.
+            url: Full url.
+            kwargs: Other arguments of `requests.Session.request`.
+
+        Returns:
+            The response, after every `after_response` hook.
+        """
+        context = RequestContext(method.upper(), url, kwargs)
+        while True:
+            context.retry = False
+            response = None
+            ran = []
+            for middleware in list(self.middleware):
+                ran.append(middleware)
+                response = middleware.before_request(context)
+                if response is not None:
+                    break
+
+            if response is None:
+                try:
+                    with span("http.request", method=context.method, attempt=context.attempt):
+                        response = session.request(context.method, context.url, **context.kwargs)
+                except Exception as err:
+                    for middleware in reversed(ran):
+                        middleware.on_error(context, err)
+                    if context.retry:
+                        context.attempt += 1
+                        continue
+                    raise
+
+            for middleware in reversed(ran):
+                response = middleware.after_response(context, response)
+            if not context.retry:
+                return response
+            context.attempt += 1
+
+
+def endpoint_name(method: str, url: str) -> str:
+    """Method, host and path of a url with its numeric path segments replaced, to group requests by endpoint."""
+    parts = urlsplit(url)
+    path = re.sub(r"/\d+(?=/|$)", "/{id}", parts.path)
+    return f"{method} {parts.netloc.lower()}{path}"
+
+
+class MetricsMiddleware(Middleware):
+    """Counts the requests, errors and statuses of each endpoint and keeps their recent latencies."""
+    def __init__(self, window: int = 1000) -> None:
+        """
+        Args:
+            window: Number of recent requests of each endpoint the latency percentiles are computed over.
+        """
+        self.lock = Lock()
+        self.counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def _record(self, context: RequestContext, outcome: str) -> None:
+        name = endpoint_name(context.method, context.url)
+        with self.lock:
+            self.counts[name][outcome] += 1
+            self.latencies[name].append(time.monotonic() - context.started_at)
+
+    def after_response(self, context: RequestContext, response: Response) -> Response:
+        self._record(context, str(response.status_code))
+        return response
+
+    def on_error(self, context: RequestContext, error: Exception) -> None:
+        self._record(context, type(error).__name__)
+
+    def metrics(self) -> Dict:
+        """Outcome counts and the latency percentiles in milliseconds of each endpoint."""
+        with self.lock:
+            latencies = {name: list(seconds) for name, seconds in self.latencies.items()}
+            counts = {name: dict(outcomes) for name, outcomes in self.counts.items()}
+
+        metrics = {}
+        for name, seconds in latencies.items():
+            p50, p95, p99 = np.percentile(np.asarray(seconds) * 1000, [50, 95, 99])
+            metrics[name] = {"counts": counts[name], "p50": float(p50), "p95": float(p95), "p99": float(p99),
+                             "max": max(seconds) * 1000}
+        return metrics
+
+
+class RateLimitMiddleware(Middleware):
+    """Holds requests back so that no more than `rate` per second are sent, allowing bursts of up to `burst`."""
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.condition = Condition()
+
+    def before_request(self, context: RequestContext) -> Optional[Response]:
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return None
+                self.condition.wait((1 - self.tokens) / self.rate)
+
+
+class RetryMiddleware(Middleware):
+    """Resends requests that failed to connect or were answered with a transient status, with exponential backoff.
+
+    Only idempotent methods are retried by default, so an order placement is never sent twice.
+    """
+    def __init__(self, max_attempts: int = 3, backoff: float = 0.5, max_backoff: float = 10.0,
+                 status_codes: Collection[int] = RETRY_STATUS_CODES,
+                 methods: Collection[str] = IDEMPOTENT_METHODS) -> None:
+        """
+        Args:
+            max_attempts: Maximum number of times a request is sent.
+            backoff: Seconds waited before the first retry, doubling with every retry.
+            max_backoff: Maximum seconds waited before a retry.
+            status_codes: Response statuses that are retried.
+            methods: HTTP methods that are retried.
+        """
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.status_codes = frozenset(status_codes)
+        self.methods = frozenset(method.upper() for method in methods)
+
+    def _retry(self, context: RequestContext, reason: str, delay: Optional[float] = None) -> None:
+        if context.method not in self.methods or context.attempt >= self.max_attempts:
+            return
+        if delay is None:
+            delay = self.backoff * 2 ** (context.attempt - 1)
+        delay = min(delay, self.max_backoff)
+        logger.info(f"Retrying {context.method} {context.url} after {reason} in {delay:.2f}s "
+                    f"(attempt {context.attempt + 1} of {self.max_attempts}).")
+        time.sleep(delay)
+        context.retry = True
+
+    def after_response(self, context: RequestContext, response: Response) -> Response:
+        if response.status_code in self.status_codes:
+            retry_after = response.headers.get("Retry-After", "")
+            self._retry(context, f"status {response.status_code}",
+                        float(retry_after) if retry_after.isdigit() else None)
+        return response
+
+    def on_error(self, context: RequestContext, error: Exception) -> None:
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            self._retry(context, type(error).__name__)
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import queue
+import time
+from dataclasses import dataclass, field
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, List, Optional, Union
+
+from tradingTOT.enums import OrderStatus
+
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {OrderStatus.COMPLETED, OrderStatus.REJECTED, OrderStatus.CANCELLED}
+# Seconds an order, or the loop, waits after its first failed check. The wait doubles with each further failure.
+ERROR_INTERVAL = 1.0
+
+
+@dataclass
+class OrderUpdate:
+    order_id: str
+    status: OrderStatus
+    previous: Optional[OrderStatus]
+    data: Dict
+
+
+@dataclass
+class _WatchedOrder:
+    order_id: str
+    interval: float
+    next_check: float
+    status: Optional[OrderStatus] = None
+    callbacks: List[Callable[[OrderUpdate], None]] = field(default_factory=list)
+
+
+class OrderWatcher:
+    """Tracks the status of many orders in one background loop.
+
+    Each tick fetches the account summary once for every watched order. Orders that stay open are checked less often
+    the longer they stay quiet, and the order history is only probed once an order leaves the open value orders.
+    Status changes are delivered to callbacks, to the `updates` queue and to async iterators over the watcher. The
+    queue keeps the latest `max_updates` changes, dropping the oldest when nobody drains it.
+
+    Example:
+        with OrderWatcher(tot) as watcher:
+            watcher.watch(order["orderId"], callback=print)
+    """
+    def __init__(self, client, min_interval: float = 1.0, max_interval: float = 30.0, backoff: float = 2.0,
+                 max_updates: int = 10_000):
+        """
+        Args:
+            client: `tradingTOT` instance.
+            min_interval: Seconds between checks of an order that just changed or was just added.
+            max_interval: Maximum seconds between checks of a quiet order.
+            backoff: Factor by which the interval of a quiet order grows after each unchanged check.
+            max_updates: Maximum number of undelivered updates kept in the `updates` queue.
+        """
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.updates: "queue.Queue[OrderUpdate]" = queue.Queue(maxsize=max_updates)
+        self.callbacks: List[Callable[[OrderUpdate], None]] = []
+        self.orders: Dict[str, _WatchedOrder] = {}
+        self.lock = Lock()
+        self.stopped = Event()
+        self.woken = Event()
+        self.thread: Optional[Thread] = None
+
+    def watch(self, order_id: Union[int, str], callback: Optional[Callable[[OrderUpdate], None]] = None) -> None:
+        """Starts tracking an order until it completes, is rejected or is cancelled.
+
+        Args:
+            order_id: Order id.
+            callback: Called with each `OrderUpdate` of this order.
+        """
+        order_id = str(order_id)
+        with self.lock:
+            order = self.orders.setdefault(order_id, _WatchedOrder(order_id, self.min_interval, time.monotonic()))
+            if callback:
+                order.callbacks.append(callback)
+        self.woken.set()
+
+    def unwatch(self, order_id: Union[int, str]) -> None:
+        with self.lock:
+            self.orders.pop(str(order_id), None)
+
+    def add_callback(self, callback: Callable[[OrderUpdate], None]) -> None:
+        """Registers a callback for the updates of every watched order."""
+        self.callbacks.append(callback)
+
+    def poll(self) -> List[OrderUpdate]:
+        """Checks the orders that are due once.
+
+        Returns:
+            The status changes found.
+        """
+        now = time.monotonic()
+        with self.lock:
+            orders = [order for order in self.orders.values() if order.next_check <= now]
+        if not orders:
+            return []
+
+        try:
+            summary = self.client._get_summary()
+        except Exception:
+            for order in orders:
+                self._back_off(order, now)
+            raise
+        open_ids = {order.get("orderId") for order in summary.get("valueOrders", {}).get("items", [])}
+
+        updates = []
+        for order in orders:
+            try:
+                if order.order_id in open_ids:
+                    data = {"status": OrderStatus.SUBMITTED}
+                else:
+                    data = self.client._get_history_status(order.order_id)
+            except Exception:
+                logger.exception(f"Order watcher failed to check order {order.order_id}.")
+                self._back_off(order, now)
+                continue
+
+            status = data["status"]
+            if status == order.status:
+                order.interval = min(order.interval * self.backoff, self.max_interval)
+            else:
+                order.interval = self.min_interval
+                updates.append((OrderUpdate(order.order_id, status, order.status, data), list(order.callbacks)))
+                order.status = status
+
+            order.next_check = now + order.interval
+            if status in TERMINAL_STATUSES:
+                self.unwatch(order.order_id)
+
+        for update, callbacks in updates:
+            self._deliver(update, callbacks)
+
+        return [update for update, _ in updates]
+
+    def _back_off(self, order: _WatchedOrder, now: float) -> None:
+        # A failed check is retried later and later, so a broker outage is not polled in a tight loop.
+        order.interval = max(min(order.interval * self.backoff, self.max_interval), ERROR_INTERVAL)
+        order.next_check = now + order.interval
+
+    def _deliver(self, update: OrderUpdate, callbacks: List[Callable[[OrderUpdate], None]]) -> None:
+        while True:
+            try:
+                self.updates.put_nowait(update)
+                break
+            except queue.Full:
+                try:
+                    self.updates.get_nowait()
+                except queue.Empty:
+                    pass
+        for callback in self.callbacks + callbacks:
+            try:
+                callback(update)
+            except Exception:
+                logger.exception(f"Order watcher callback failed for order {update.order_id}.")
+
+    def _run(self) -> None:
+        failures = 0
+        while not self.stopped.is_set():
+            try:
+                self.poll()
+                failures = 0
+            except Exception:
+                failures += 1
+                logger.exception("Order watcher poll failed.")
+
+            with self.lock:
+                next_check = min((order.next_check for order in self.orders.values()), default=None)
+            timeout = self.max_interval if next_check is None else max(next_check - time.monotonic(), 0)
+            if failures:
+                timeout = max(timeout, min(ERROR_INTERVAL * 2 ** (failures - 1), max(self.max_interval, 1.0)))
+            self.woken.wait(timeout)
+            self.woken.clear()
+
+    def start(self) -> "OrderWatcher":
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = Thread(target=self._run, name="tradingTOT-order-watcher", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.woken.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self) -> "OrderWatcher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        while not self.stopped.is_set():
+            try:
+                yield await loop.run_in_executor(None, self.updates.get, True, 0.5)
+            except queue.Empty:
+                continue
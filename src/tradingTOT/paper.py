@@ -0,0 +1,308 @@
+import itertools
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import datetime, timezone
+from threading import RLock
+from typing import Dict, List, Mapping, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from tradingTOT.candles import CandleBuffer
+from tradingTOT.enums import FailureTypes, OrderStatus, OrderType
+from tradingTOT.events import AccountEventStream
+from tradingTOT.exceptions import BrokerOrderError, OrderOperationError
+from tradingTOT.pretrade import PreTradeChecker
+
+
+class PriceFeed(ABC):
+    @abstractmethod
+    def price(self, ticker: str) -> float:
+        pass
+
+    @abstractmethod
+    def advance(self, steps: int = 1) -> None:
+        pass
+
+
+class ReplayPriceFeed(PriceFeed):
+    """Replays price series, all moving one step at a time. The last price is held once a series runs out."""
+    def __init__(self, series: Mapping[str, Union[np.ndarray, List[float]]], step_seconds: float = 60.0,
+                 start_time: Optional[float] = None) -> None:
+        self.series = {ticker: np.asarray(prices, dtype=np.float64) for ticker, prices in series.items()}
+        self.step = 0
+        self.step_seconds = step_seconds
+        self.start_time = time.time() if start_time is None else start_time
+
+    @classmethod
+    def from_candles(cls, buffers: Mapping[str, CandleBuffer], **kwargs) -> "ReplayPriceFeed":
+        """Replays the close prices of `candles.CandleBuffer`s by ticker."""
+        return cls({ticker: buffer.close for ticker, buffer in buffers.items()}, **kwargs)
+
+    @property
+    def timestamp(self) -> int:
+        """Time of the current step as a unix timestamp in milliseconds."""
+        return int((self.start_time + self.step * self.step_seconds) * 1000)
+
+    def price(self, ticker: str) -> float:
+        prices = self.series.get(ticker)
+        if prices is None or not len(prices):
+            raise ValueError(f"The ticker {ticker} is invalid.")
+        return float(prices[min(self.step, len(prices) - 1)])
+
+    def advance(self, steps: int = 1) -> None:
+        self.step += steps
+
+
+class SyntheticPriceFeed(ReplayPriceFeed):
+    """Geometric Brownian motion price paths generated up front."""
+    def __init__(self, start_prices: Mapping[str, float], steps: int = 10_000, drift: float = 0.0,
+                 volatility: float = 0.001, seed: Optional[int] = None, **kwargs) -> None:
+        """
+        Args:
+            start_prices: First price of each ticker.
+            steps: Length of the generated paths.
+            drift: Mean log return per step.
+            volatility: Standard deviation of the log return per step.
+            seed: Random seed for reproducible paths.
+        """
+        rng = np.random.default_rng(seed)
+        tickers = list(start_prices)
+        returns = rng.normal(drift, volatility, size=(len(tickers), steps - 1))
+        paths = np.exp(np.concatenate([np.zeros((len(tickers), 1)), np.cumsum(returns, axis=1)], axis=1))
+        paths *= np.array([start_prices[ticker] for ticker in tickers], dtype=np.float64)[:, None]
+        super().__init__(dict(zip(tickers, paths)), **kwargs)
+
+
+class PaperTradingTOT:
+    """Local simulated broker with the interface of `tradingTOT`.
+
+    It keeps an in-memory book of cash, positions and value orders, and fills market value orders against a
+    `PriceFeed`, either as soon as they are placed or on the next `advance`. Instruments are assumed to be in the
+    account currency, so there are no currency conversion costs.
+    """
+    def __init__(self, feed: PriceFeed, cash: float = 10_000.0, currency: str = "GBP",
+                 fill_immediately: bool = True) -> None:
+        """
+        Args:
+            feed: Prices to fill orders at.
+            cash: Starting free cash.
+            currency: Account currency.
+            fill_immediately: Fill orders when they are placed instead of on the next `advance`.
+        """
+        self.feed = feed
+        self.cash = cash
+        self.currency = currency
+        self.fill_immediately = fill_immediately
+        self.positions: Dict[str, Dict] = {}
+        self.value_orders: Dict[str, Dict] = {}
+        # Open value orders by instrument code and the cash their buys reserve, kept as orders open and close.
+        self.orders_by_code: Dict[str, Dict[str, Dict]] = defaultdict(dict)
+        self.blocked_cash = 0.0
+        self.history: Dict[str, Dict] = {}
+        self.order_ids = itertools.count(10 ** 10)
+        self.lock = RLock()
+
+    @staticmethod
+    def _code(ticker: str) -> str:
+        return ticker if "_" in ticker else f"{ticker}_US_EQ"
+
+    @staticmethod
+    def _ticker(code: str) -> str:
+        return code.split("_", 1)[0]
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+    @staticmethod
+    def _signed(action: Union[OrderType, str], amount: Union[float, int]) -> float:
+        if action == OrderType.BUY:
+            return abs(amount)
+        elif action == OrderType.SELL:
+            return -abs(amount)
+        raise Exception("Order action not supported.")
+
+    def _validate(self, code: str, amount: float) -> None:
+        if round(amount, 2) != amount:
+            raise BrokerOrderError(f"The order was invalid. Reason: {FailureTypes.ValuePrecisionMismatch.value}")
+
+        if amount < 0:
+            position = self.positions.get(code)
+            held = position["quantity"] * self.feed.price(self._ticker(code)) if position else 0
+            selling = sum(-order["value"] for order in self.orders_by_code.get(code, {}).values() if order["value"] < 0)
+            if -amount > held - selling:
+                raise BrokerOrderError(
+                    f"The order was invalid. Reason: {FailureTypes.InsufficientValueForStocksSell.value}")
+        elif amount > self.cash - self._blocked():
+            raise BrokerOrderError(
+                f"The order was invalid. Reason: {FailureTypes.InsufficientFundsForStocksBuy.value}")
+
+    def _blocked(self) -> float:
+        """Cash reserved by open buy orders."""
+        return self.blocked_cash
+
+    def _open(self, order: Dict) -> None:
+        self.value_orders[order["orderId"]] = order
+        self.orders_by_code[order["code"]][order["orderId"]] = order
+        if order["value"] > 0:
+            self.blocked_cash += order["value"]
+
+    def _fill(self, order: Dict) -> None:
+        code = order["code"]
+        price = self.feed.price(self._ticker(code))
+        amount = order["value"]
+        position = self.positions.get(code)
+        held = position["quantity"] if position else 0.0
+
+        if amount > 0 and amount > self.cash:
+            self._close(order, OrderStatus.REJECTED)
+            return
+        if amount < 0 and -amount > held * price:
+            self._close(order, OrderStatus.REJECTED)
+            return
+
+        quantity = amount / price
+        self.cash -= amount
+        if position is None:
+            position = self.positions[code] = {"code": code, "quantity": 0.0, "investment": 0.0,
+                                               "created": self._now(), "positionId": order["orderId"]}
+        if quantity > 0:
+            position["investment"] += amount
+        else:
+            position["investment"] *= (held + quantity) / held
+        position["quantity"] = held + quantity
+        if position["quantity"] <= 1e-9:
+            del self.positions[code]
+
+        self._close(order, OrderStatus.COMPLETED, price=price, currency=self.currency, quantity=abs(quantity))
+
+    def _close(self, order: Dict, status: OrderStatus, **fill) -> None:
+        if self.value_orders.pop(order["orderId"], None) is not None:
+            orders = self.orders_by_code[order["code"]]
+            orders.pop(order["orderId"], None)
+            if not orders:
+                del self.orders_by_code[order["code"]]
+            if order["value"] > 0:
+                # Reset once nothing is open, so float rounding does not build up.
+                self.blocked_cash = self.blocked_cash - order["value"] if self.value_orders else 0.0
+        order["status"] = "FILLED" if status == OrderStatus.COMPLETED else status.value
+        self.history[order["orderId"]] = {"status": status, **fill}
+
+    def advance(self, steps: int = 1) -> None:
+        """Moves the price feed forward and fills the open orders at the new prices."""
+        with self.lock:
+            self.feed.advance(steps)
+            for order in list(self.value_orders.values()):
+                self._fill(order)
+
+    def place_order(self, action: Union[OrderType, str], ticker: str, amount: Union[float, int]) -> Dict:
+        amount = self._signed(action, amount)
+        code = self._code(ticker)
+        with self.lock:
+            self._validate(code, amount)
+            order = {"orderId": str(next(self.order_ids)), "type": "MARKET", "code": code, "value": amount,
+                     "filledValue": 0, "status": "NEW", "currencyCode": self.currency, "created": self._now(),
+                     "frontend": "PAPER"}
+            order["cost"] = self.get_costs(action, ticker, amount)
+            self._open(order)
+            if self.fill_immediately:
+                self._fill(order)
+            return dict(order)
+
+    def check_orders(self, orders: List[Tuple[Union[OrderType, str], str, Union[float, int]]]) -> List[Dict]:
+        checker = PreTradeChecker()
+        checker.observe_summary(self._get_summary())
+        return checker.check_batch([(self._code(ticker), self._signed(action, amount))
+                                    for action, ticker, amount in orders])
+
+    def cancel_order(self, order_id: Union[int, str]) -> Dict:
+        with self.lock:
+            order = self.value_orders.get(str(order_id))
+            if order is None:
+                raise OrderOperationError(f"The order {order_id} is not open.")
+            self._close(order, OrderStatus.CANCELLED)
+            return self._get_summary()
+
+    def get_costs(self, action: OrderType, ticker, amount) -> Dict:
+        amount = self._signed(action, amount)
+        price = self.feed.price(self._ticker(self._code(ticker)))
+        return {
+            "orderQuantity": amount / price,
+            "sharesValue": amount,
+            "total": amount,
+            "exchangeRate": {"fromCurrency": self.currency, "toCurrency": self.currency, "rate": 1.0},
+            "costs": {},
+        }
+
+    def estimate_costs(self, action: OrderType, ticker, amount) -> Dict:
+        return self.get_costs(action, ticker, amount)
+
+    def get_ask_price(self, ticker: str) -> Dict:
+        price = self.feed.price(self._ticker(self._code(ticker)))
+        timestamp = getattr(self.feed, "timestamp", int(time.time() * 1000))
+        return {"timestamp": timestamp, "close": price, "price": price, "period": "d1"}
+
+    def get_ask_prices(self, tickers: List[str]) -> Dict[str, Dict]:
+        return {ticker: self.get_ask_price(ticker) for ticker in tickers}
+
+    def get_status(self, order_id: Union[int, str]) -> Dict:
+        with self.lock:
+            if str(order_id) in self.value_orders:
+                return {"status": OrderStatus.SUBMITTED}
+            return self._get_history_status(order_id)
+
+    def _get_history_status(self, order_id: Union[int, str]) -> Dict:
+        return dict(self.history.get(str(order_id), {"status": OrderStatus.REJECTED}))
+
+    def _position(self, position: Dict) -> Dict:
+        price = self.feed.price(self._ticker(position["code"]))
+        quantity = position["quantity"]
+        value = quantity * price
+        average_price = position["investment"] / quantity
+        return {
+            "positionId": position["positionId"], "humanId": position["positionId"], "created": position["created"],
+            "averagePrice": average_price, "averagePriceConverted": average_price, "currentPrice": price,
+            "value": value, "investment": position["investment"], "code": position["code"], "margin": 0.0,
+            "ppl": value - position["investment"], "quantity": quantity, "maxBuy": self.cash / price,
+            "maxSell": quantity, "maxOpenBuy": self.cash / price, "maxOpenSell": quantity, "frontend": "PAPER",
+            "autoInvestQuantity": 0.0, "fxPpl": 0.0,
+        }
+
+    def _get_summary(self) -> Dict:
+        """The book in the format of the account summary response."""
+        with self.lock:
+            positions = [self._position(position) for position in self.positions.values()]
+            invested = sum(position["value"] for position in positions)
+            ppl = sum(position["ppl"] for position in positions)
+            blocked = self._blocked()
+            cash = {
+                "free": self.cash, "total": self.cash + invested, "interest": 0.0, "indicator": 0.0,
+                "commission": 0.0, "cash": self.cash, "ppl": ppl, "result": 0.0, "spreadBack": 0.0,
+                "nonRefundable": 0.0, "dividend": 0.0, "stockInvestment": invested - ppl,
+                "freeForStocks": self.cash - blocked, "totalCashForWithdraw": self.cash,
+                "blockedForStocks": blocked, "pieCash": 0,
+            }
+            value_orders = [{k: v for k, v in order.items() if k != "cost"} for order in self.value_orders.values()]
+            return {
+                "cash": cash,
+                "open": {"unfilteredCount": len(positions), "items": positions},
+                "orders": {"unfilteredCount": 0, "items": []},
+                "valueOrders": {"unfilteredCount": len(value_orders), "items": value_orders},
+            }
+
+    def get_account_details(self) -> Dict:
+        cash = self._get_summary()["cash"]
+        return {"cash": cash["freeForStocks"], "total": cash["total"]}
+
+    def get_position(self, ticker: str) -> Optional[Dict]:
+        positions = self.get_positions({ticker})
+        return positions[0] if positions else None
+
+    def get_positions(self, tickers: Optional[Set[str]] = None) -> List[Dict]:
+        with self.lock:
+            return [self._position(position) for code, position in self.positions.items()
+                    if tickers is None or self._ticker(code) in tickers]
+
+    def account_events(self, interval: float = 5.0, **kwargs) -> AccountEventStream:
+        return AccountEventStream(self, interval, **kwargs)
\ No newline at end of file
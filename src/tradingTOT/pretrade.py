@@ -0,0 +1,189 @@
+import itertools
+import math
+import time
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tradingTOT.enums import FailureTypes
+from tradingTOT.exceptions import BrokerOrderError
+
+
+# Value orders are placed in the account currency, which Trading212 accepts to the cent.
+DEFAULT_VALUE_DECIMALS = 2
+
+
+class PreTradeChecker:
+    """Rejects value orders that Trading212 would reject, using the cached account summary instead of a validation
+    request.
+
+    Buys are checked against the free cash for stocks and sells against the value of the position.
+    `check_and_reserve` reserves an order against them in the same step as its check, so a batch or a burst of
+    orders cannot pass the checks together when each only passes alone. A reservation is dropped once a summary
+    requested after the order was placed accounts for it, or released if the placement fails. Buys count towards the
+    value that can be sold, as market orders fill at once. The funds checks are skipped once the summary is older
+    than `max_age`, as an outdated summary could reject orders Trading212 would accept. Trading212 stays the
+    authority on every order that passes.
+    """
+    def __init__(self, max_age: float = 30, normalize: bool = False, decimals: int = DEFAULT_VALUE_DECIMALS):
+        """
+        Args:
+            max_age: Seconds the cached summary is trusted for.
+            normalize: Round amounts with too many decimals towards zero instead of rejecting them.
+            decimals: Number of decimals accepted in order values, which are in the account currency.
+        """
+        self.max_age = max_age
+        self.normalize = normalize
+        self.decimals = decimals
+        self.free_cash: Optional[float] = None
+        self.position_values: Dict[str, float] = {}
+        # Reservation id to the object id, the amount and the time the order was placed, None until it is.
+        self.reservations: Dict[int, Tuple[str, float, Optional[float]]] = {}
+        self.reservation_ids = itertools.count()
+        self.observed_at: Optional[float] = None
+        self.lock = Lock()
+
+    @property
+    def reserved(self) -> Dict[str, float]:
+        """Total reserved amount of each object id."""
+        with self.lock:
+            return self._reserved()
+
+    def _reserved(self) -> Dict[str, float]:
+        reserved: Dict[str, float] = defaultdict(float)
+        for object_id, amount, _ in self.reservations.values():
+            reserved[object_id] += amount
+        return reserved
+
+    def is_stale(self) -> bool:
+        return self.observed_at is None or time.monotonic() - self.observed_at > self.max_age
+
+    def observe_summary(self, response: Dict, requested_at: Optional[float] = None) -> None:
+        """Caches the funds of an already decoded summary response and drops the reservations it accounts for.
+
+        Args:
+            response: Decoded summary response.
+            requested_at: `time.monotonic()` time the summary was requested at. Only the reservations of orders placed
+                before it are dropped. Defaults to now.
+        """
+        requested_at = time.monotonic() if requested_at is None else requested_at
+        cash = response.get("cash") or {}
+        positions = response.get("open", {}).get("items", [])
+        with self.lock:
+            self.free_cash = cash.get("freeForStocks")
+            self.position_values = {position["code"]: position.get("value") or 0.0 for position in positions}
+            # Orders placed after the summary was requested may be missing from it.
+            self.reservations = {reservation_id: reservation
+                                 for reservation_id, reservation in self.reservations.items()
+                                 if reservation[2] is None or reservation[2] > requested_at}
+            self.observed_at = requested_at
+
+    def reserve(self, object_id: str, amount: float) -> int:
+        """Records a placed order until the next summary accounts for it.
+
+        Returns:
+            The id of the reservation.
+        """
+        with self.lock:
+            return self._reserve(object_id, amount, time.monotonic())
+
+    def _reserve(self, object_id: str, amount: float, placed_at: Optional[float]) -> int:
+        reservation_id = next(self.reservation_ids)
+        self.reservations[reservation_id] = (object_id, amount, placed_at)
+        return reservation_id
+
+    def placed(self, reservation_id: int) -> None:
+        """Marks the order of a `check_and_reserve` reservation as placed, so later summaries can account for it."""
+        with self.lock:
+            if reservation_id in self.reservations:
+                object_id, amount, _ = self.reservations[reservation_id]
+                self.reservations[reservation_id] = (object_id, amount, time.monotonic())
+
+    def release(self, reservation_id: int) -> None:
+        """Drops the reservation of an order that was not placed. Reservations of placed orders are kept."""
+        with self.lock:
+            if reservation_id in self.reservations and self.reservations[reservation_id][2] is None:
+                del self.reservations[reservation_id]
+
+    def _normalize(self, amount: float) -> Tuple[float, Optional[FailureTypes]]:
+        if round(amount, self.decimals) == amount:
+            return amount, None
+        if not self.normalize:
+            return amount, FailureTypes.ValuePrecisionMismatch
+
+        scale = 10 ** self.decimals
+        return math.copysign(math.floor(abs(amount) * scale) / scale, amount), None
+
+    def check_batch(self, orders: Iterable[Tuple[str, float]]) -> List[Dict]:
+        """Checks orders as if they were placed one after the other.
+
+        Args:
+            orders: Trading212 object id and signed value of each order, negative for sells.
+
+        Returns:
+            For each order, its `code`, its possibly normalized `amount` and the `error` it would fail with, which is
+            None if it passes. Failing orders do not use up the funds of the orders after them.
+        """
+        with self.lock:
+            return self._check_batch(orders)
+
+    def _check_batch(self, orders: Iterable[Tuple[str, float]]) -> List[Dict]:
+        reserved = self._reserved()
+        check_funds = not self.is_stale() and self.free_cash is not None
+        free_cash = (self.free_cash or 0.0) - sum(amount for amount in reserved.values() if amount > 0)
+        # Reserved buys add to the value of their position and reserved sells take from it.
+        position_values = {code: self.position_values.get(code, 0.0) + reserved.get(code, 0.0)
+                           for code in set(self.position_values) | set(reserved)}
+
+        results = []
+        for object_id, amount in orders:
+            amount, error = self._normalize(amount)
+            if error is None and check_funds:
+                if amount > 0 and amount > free_cash:
+                    error = FailureTypes.InsufficientFundsForStocksBuy
+                elif amount < 0 and -amount > position_values.get(object_id, 0.0):
+                    error = FailureTypes.InsufficientValueForStocksSell
+
+            if error is None and check_funds:
+                if amount > 0:
+                    free_cash -= amount
+                position_values[object_id] = position_values.get(object_id, 0.0) + amount
+
+            results.append({"code": object_id, "amount": amount, "error": error})
+
+        return results
+
+    def check(self, object_id: str, amount: float) -> float:
+        """Checks an order.
+
+        Args:
+            object_id: Trading212 object id e.g. MSFT_US_EQ.
+            amount: Signed order value, negative for sells.
+
+        Returns:
+            The possibly normalized amount.
+
+        Raises:
+            BrokerOrderError: If Trading212 would reject the order.
+        """
+        result = self.check_batch([(object_id, amount)])[0]
+        if result["error"]:
+            raise BrokerOrderError(f"The order was invalid. Reason: {result['error'].value}")
+        return result["amount"]
+
+    def check_and_reserve(self, object_id: str, amount: float) -> Tuple[float, int]:
+        """Checks an order and reserves it in one step, so concurrent orders are checked against each other.
+
+        The reservation is to be passed to `placed` once the order is placed, or to `release` if it is not.
+
+        Returns:
+            The possibly normalized amount and the id of the reservation.
+
+        Raises:
+            BrokerOrderError: If Trading212 would reject the order.
+        """
+        with self.lock:
+            result = self._check_batch([(object_id, amount)])[0]
+            if result["error"]:
+                raise BrokerOrderError(f"The order was invalid. Reason: {result['error'].value}")
+            return result["amount"], self._reserve(object_id, result["amount"], None)
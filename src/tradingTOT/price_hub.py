@@ -0,0 +1,193 @@
+import logging
+import math
+import time
+from dataclasses import dataclass
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Quote:
+    ticker: str
+    price: float
+    fetched_at: float
+    data: Dict
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class Subscription:
+    """A consumer's view of the hub. The latest quote of each ticker replaces the previous one, so a slow consumer
+    only ever sees fresh data and never makes the hub fetch more often."""
+    def __init__(self, hub: "PriceHub", tickers: Set[str], max_staleness: float,
+                 callback: Optional[Callable[[Quote], None]] = None) -> None:
+        self.hub = hub
+        self.tickers = tickers
+        self.max_staleness = max_staleness
+        self.callback = callback
+        self.latest: Dict[str, Quote] = {}
+        self.updated = Event()
+
+    def _publish(self, quote: Quote) -> None:
+        self.latest[quote.ticker] = quote
+        self.updated.set()
+        if self.callback:
+            self.callback(quote)
+
+    def get(self, ticker: str) -> Optional[Quote]:
+        return self.latest.get(ticker)
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, Quote]:
+        """Blocks until a quote arrives, then returns the latest quotes."""
+        self.updated.wait(timeout)
+        self.updated.clear()
+        return dict(self.latest)
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class PriceHub:
+    """Shares ask prices between many consumers in one process.
+
+    Consumers subscribe to tickers with the maximum age they accept for a quote. A single scheduler thread fetches
+    every ticker whose quote is older than the strictest staleness among its subscribers, batching them into as few
+    `tradingTOT.get_ask_prices` requests as possible, and fans the quotes out to the subscribers. A ticker that comes
+    back without a price, e.g. a delisted or misspelt one, is retried after a backoff that doubles with each miss.
+
+    Example:
+        with PriceHub(tot) as hub:
+            subscription = hub.subscribe(["MSFT", "AAPL"], max_staleness=2)
+            quotes = subscription.wait()
+    """
+    def __init__(self, client, tick: float = 0.25, max_batch_size: int = 50, miss_backoff: float = 5.0,
+                 max_miss_backoff: float = 300.0):
+        """
+        Args:
+            client: `tradingTOT` instance.
+            tick: Seconds between scheduler checks.
+            max_batch_size: Maximum number of tickers in one price request.
+            miss_backoff: Seconds before a ticker that came back without a price is fetched again.
+            max_miss_backoff: Maximum seconds between fetches of a ticker that keeps coming back without a price.
+        """
+        self.client = client
+        self.tick = tick
+        self.max_batch_size = max_batch_size
+        self.miss_backoff = miss_backoff
+        self.max_miss_backoff = max_miss_backoff
+        self.subscriptions: List[Subscription] = []
+        self.quotes: Dict[str, Quote] = {}
+        # Consecutive misses of a ticker and the `time.monotonic()` time it is fetched again at.
+        self.misses: Dict[str, Tuple[int, float]] = {}
+        self.lock = Lock()
+        self.stopped = Event()
+        self.thread: Optional[Thread] = None
+
+    def subscribe(self, tickers: Iterable[str], max_staleness: float = 1.0,
+                  callback: Optional[Callable[[Quote], None]] = None) -> Subscription:
+        """Registers a consumer.
+
+        Args:
+            tickers: Ticker symbols.
+            max_staleness: Maximum age in seconds of the quotes the consumer accepts.
+            callback: Called from the scheduler thread with each new quote. It should return quickly.
+
+        Returns:
+            The subscription.
+        """
+        subscription = Subscription(self, set(tickers), max_staleness, callback)
+        with self.lock:
+            self.subscriptions.append(subscription)
+            for ticker in subscription.tickers:
+                if ticker in self.quotes:
+                    subscription.latest[ticker] = self.quotes[ticker]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self.lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+
+    def freshness(self, ticker: str) -> float:
+        """Age in seconds of the latest quote of a ticker, infinite if it was never fetched."""
+        quote = self.quotes.get(ticker)
+        return quote.age if quote else math.inf
+
+    def due(self) -> List[str]:
+        """Subscribed tickers whose latest quote is older than one of their subscribers accepts, leaving out the
+        missed tickers that are backing off."""
+        now = time.monotonic()
+        staleness: Dict[str, float] = {}
+        with self.lock:
+            for subscription in self.subscriptions:
+                for ticker in subscription.tickers:
+                    staleness[ticker] = min(staleness.get(ticker, math.inf), subscription.max_staleness)
+            backing_off = {ticker for ticker, (_, retry_at) in self.misses.items() if retry_at > now}
+
+        return [ticker for ticker, max_staleness in staleness.items()
+                if ticker not in backing_off and self.freshness(ticker) >= max_staleness]
+
+    def poll(self) -> List[Quote]:
+        """Fetches the due tickers once and publishes their quotes.
+
+        Returns:
+            The new quotes.
+        """
+        tickers = self.due()
+        quotes = []
+        for start in range(0, len(tickers), self.max_batch_size):
+            prices = self.client.get_ask_prices(tickers[start:start + self.max_batch_size])
+            fetched_at = time.monotonic()
+            quotes.extend(Quote(ticker, data["price"], fetched_at, data) for ticker, data in prices.items())
+
+        now = time.monotonic()
+        with self.lock:
+            for quote in quotes:
+                self.quotes[quote.ticker] = quote
+                self.misses.pop(quote.ticker, None)
+            for ticker in set(tickers) - {quote.ticker for quote in quotes}:
+                count = self.misses.get(ticker, (0, now))[0]
+                self.misses[ticker] = (count + 1, now + min(self.miss_backoff * 2 ** count, self.max_miss_backoff))
+            subscriptions = list(self.subscriptions)
+
+        for quote in quotes:
+            for subscription in subscriptions:
+                if quote.ticker in subscription.tickers:
+                    try:
+                        subscription._publish(quote)
+                    except Exception:
+                        logger.exception(f"Price hub callback failed for {quote.ticker}.")
+
+        return quotes
+
+    def _run(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Price hub poll failed.")
+            self.stopped.wait(self.tick)
+
+    def start(self) -> "PriceHub":
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = Thread(target=self._run, name="tradingTOT-price-hub", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self) -> "PriceHub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
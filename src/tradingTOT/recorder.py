@@ -0,0 +1,217 @@
+import json
+import os
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from tradingTOT.schemas.api_responses import Position, Cash
+from tradingTOT.utils.storage import DEFAULT_SNAPSHOTS_DIRECTORY
+
+
+POSITION_FIELDS = tuple(name for name, info in Position.model_fields.items()
+                        if info.annotation in (float, Optional[float]))
+CASH_FIELDS = tuple(name for name, info in Cash.model_fields.items() if info.annotation in (float, int))
+POSITION_COLUMNS = ("timestamp", "code") + POSITION_FIELDS
+CASH_COLUMNS = ("timestamp",) + CASH_FIELDS
+
+TIMESTAMP_DTYPE = np.dtype("<i8")
+CODE_DTYPE = np.dtype("<i4")
+VALUE_DTYPE = np.dtype("<f8")
+
+
+class SnapshotRecorder:
+    """Appends account summary snapshots to fixed-width column files.
+
+    Positions are stored one row per position and snapshot, with the instrument `code` dictionary-encoded, and cash
+    is stored one row per snapshot. Each column is a raw little-endian array file, so `SnapshotReader` can memory-map
+    them instead of loading a full day of snapshots.
+    """
+    def __init__(self, directory: Path = DEFAULT_SNAPSHOTS_DIRECTORY) -> None:
+        self.dir = Path(directory)
+        self.lock = Lock()
+        self.codes = _read_codes(self.dir)
+        self.code_ids = {code: i for i, code in enumerate(self.codes)}
+        self.last_timestamp = self._repair()
+
+    def _repair(self) -> Optional[int]:
+        # An interrupted record can leave some columns longer than others, or positions without their cash row. Cash
+        # is written last, so every column is truncated back to the last snapshot with a complete cash row.
+        _truncate(self.dir / "cash", CASH_COLUMNS)
+        last_timestamp = _last_timestamp(self.dir / "cash" / "timestamp")
+        rows = _truncate(self.dir / "positions", POSITION_COLUMNS)
+        if rows:
+            timestamps = np.memmap(self.dir / "positions" / "timestamp", dtype=TIMESTAMP_DTYPE, mode="r",
+                                   shape=(rows,))
+            complete = 0 if last_timestamp is None else int(np.searchsorted(timestamps, last_timestamp, side="right"))
+            del timestamps
+            _truncate(self.dir / "positions", POSITION_COLUMNS, complete)
+        return last_timestamp
+
+    def record(self, summary: Dict, timestamp: Optional[float] = None) -> int:
+        """Appends a snapshot.
+
+        Args:
+            summary: Decoded response of `endpoints.ACCOUNT_SUMMARY_URL_SERVICES`.
+            timestamp: Unix time of the snapshot in seconds, later than the previous snapshot by at least a
+                millisecond. Defaults to now, moved 1 ms past the previous snapshot if it falls in the same millisecond.
+
+        Returns:
+            The timestamp of the snapshot in milliseconds.
+        """
+        millis = int((time.time() if timestamp is None else timestamp) * 1000)
+        positions = summary.get("open", {}).get("items", [])
+        cash = summary.get("cash", {})
+
+        with self.lock:
+            # Snapshots are told apart by their timestamps, so two snapshots cannot share a millisecond.
+            if self.last_timestamp is not None and millis <= self.last_timestamp:
+                if timestamp is not None:
+                    raise ValueError("Snapshots must be recorded in chronological order, at least 1 ms apart.")
+                millis = self.last_timestamp + 1
+
+            new_codes = [p["code"] for p in positions if p["code"] not in self.code_ids]
+            for code in dict.fromkeys(new_codes):
+                self.code_ids[code] = len(self.codes)
+                self.codes.append(code)
+            if new_codes:
+                self.dir.mkdir(parents=True, exist_ok=True)
+                with open(self.dir / "codes.json", "w") as handler:
+                    json.dump(self.codes, handler)
+
+            columns = {
+                "timestamp": np.full(len(positions), millis, dtype=TIMESTAMP_DTYPE),
+                "code": np.array([self.code_ids[p["code"]] for p in positions], dtype=CODE_DTYPE),
+            }
+            for name in POSITION_FIELDS:
+                columns[name] = np.array([_number(p.get(name)) for p in positions], dtype=VALUE_DTYPE)
+            cash_columns = {"timestamp": np.array([millis], dtype=TIMESTAMP_DTYPE)}
+            for name in CASH_FIELDS:
+                cash_columns[name] = np.array([_number(cash.get(name))], dtype=VALUE_DTYPE)
+
+            # A failed write is rolled back, so the columns stay aligned to the rows of complete snapshots.
+            position_rows = _truncate(self.dir / "positions", POSITION_COLUMNS)
+            cash_rows = _truncate(self.dir / "cash", CASH_COLUMNS)
+            try:
+                _append(self.dir / "positions", columns)
+                _append(self.dir / "cash", cash_columns)
+            except BaseException:
+                _truncate(self.dir / "positions", POSITION_COLUMNS, position_rows)
+                _truncate(self.dir / "cash", CASH_COLUMNS, cash_rows)
+                raise
+
+            self.last_timestamp = millis
+            return millis
+
+    def record_account(self, client) -> int:
+        """Fetches the account summary with a `tradingTOT` instance and records it."""
+        return self.record(client._get_summary())
+
+
+class SnapshotReader:
+    """Memory-mapped, read-only access to the snapshots written by `SnapshotRecorder`."""
+    def __init__(self, directory: Path = DEFAULT_SNAPSHOTS_DIRECTORY) -> None:
+        self.dir = Path(directory)
+        self.codes = _read_codes(self.dir)
+        self.code_ids = {code: i for i, code in enumerate(self.codes)}
+        self.position_columns = _map(self.dir / "positions", POSITION_COLUMNS)
+        self.cash_columns = _map(self.dir / "cash", CASH_COLUMNS)
+
+    def _range(self, timestamps: np.ndarray, start: Optional[int], end: Optional[int]) -> slice:
+        low = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        high = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="right"))
+        return slice(low, high)
+
+    def positions(self, start: Optional[int] = None, end: Optional[int] = None,
+                  ticker: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """Position rows recorded between two timestamps, inclusive.
+
+        Args:
+            start: Unix time in milliseconds. Defaults to the first snapshot.
+            end: Unix time in milliseconds. Defaults to the last snapshot.
+            ticker: Only return rows of this ticker or instrument code.
+
+        Returns:
+            Columns of the matching rows. They are views of the mapped files unless filtered by ticker.
+        """
+        rows = self._range(self.position_columns["timestamp"], start, end)
+        columns = {name: column[rows] for name, column in self.position_columns.items()}
+        if ticker is not None:
+            ids = [i for i, code in enumerate(self.codes) if code == ticker or code.split("_", 1)[0] == ticker]
+            mask = np.isin(columns["code"], ids)
+            columns = {name: column[mask] for name, column in columns.items()}
+        return columns
+
+    def cash(self, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Cash rows recorded between two timestamps, inclusive."""
+        rows = self._range(self.cash_columns["timestamp"], start, end)
+        return {name: column[rows] for name, column in self.cash_columns.items()}
+
+    def replay(self, start: Optional[int] = None, end: Optional[int] = None
+               ) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+        """Yields each snapshot's timestamp and position columns in chronological order."""
+        columns = self.positions(start, end)
+        timestamps = columns["timestamp"]
+        boundaries = np.flatnonzero(np.diff(timestamps)) + 1
+        for rows in np.split(np.arange(len(timestamps)), boundaries):
+            if len(rows):
+                snapshot = slice(rows[0], rows[-1] + 1)
+                yield int(timestamps[rows[0]]), {name: column[snapshot] for name, column in columns.items()}
+
+
+def _number(value) -> float:
+    return np.nan if value is None else value
+
+
+def _append(directory: Path, columns: Dict[str, np.ndarray]) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, column in columns.items():
+        with open(directory / name, "ab") as handler:
+            handler.write(column.tobytes())
+
+
+def _truncate(directory: Path, names: Tuple[str, ...], rows: Optional[int] = None) -> int:
+    """Truncates the columns to the rows complete in all of them, or to `rows` if fewer, and returns the row count."""
+    sizes = {name: (directory / name).stat().st_size if (directory / name).exists() else 0 for name in names}
+    complete = min(size // _dtype(name).itemsize for name, size in sizes.items())
+    rows = complete if rows is None else min(rows, complete)
+    for name, size in sizes.items():
+        if size > rows * _dtype(name).itemsize:
+            os.truncate(directory / name, rows * _dtype(name).itemsize)
+    return rows
+
+
+def _dtype(name: str) -> np.dtype:
+    return {"timestamp": TIMESTAMP_DTYPE, "code": CODE_DTYPE}.get(name, VALUE_DTYPE)
+
+
+def _map(directory: Path, names: Tuple[str, ...]) -> Dict[str, np.ndarray]:
+    columns = {}
+    for name in names:
+        path = directory / name
+        dtype = _dtype(name)
+        size = path.stat().st_size // dtype.itemsize if path.exists() else 0
+        columns[name] = np.memmap(path, dtype=dtype, mode="r", shape=(size,)) if size else np.empty(0, dtype)
+
+    # An interrupted append can leave some columns longer than others.
+    rows = min(len(column) for column in columns.values())
+    return {name: column[:rows] for name, column in columns.items()}
+
+
+def _read_codes(directory: Path) -> List[str]:
+    path = directory / "codes.json"
+    if not path.exists():
+        return []
+    with open(path) as handler:
+        return json.load(handler)
+
+
+def _last_timestamp(path: Path) -> Optional[int]:
+    if not path.exists() or path.stat().st_size < TIMESTAMP_DTYPE.itemsize:
+        return None
+    rows = path.stat().st_size // TIMESTAMP_DTYPE.itemsize
+    with open(path, "rb") as handler:
+        handler.seek((rows - 1) * TIMESTAMP_DTYPE.itemsize)
+        return int(np.frombuffer(handler.read(TIMESTAMP_DTYPE.itemsize), dtype=TIMESTAMP_DTYPE)[0])
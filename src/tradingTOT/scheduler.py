@@ -0,0 +1,190 @@
+import heapq
+import itertools
+import logging
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from threading import Condition, Thread
+from typing import Deque, Dict, List, Optional, Union
+
+import numpy as np
+
+from tradingTOT.enums import OrderPriority, OrderType
+from tradingTOT.exceptions import OrderOperationError
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(order=True)
+class ScheduledOrder:
+    priority: int
+    sequence: int
+    action: Union[OrderType, str] = field(compare=False)
+    ticker: str = field(compare=False)
+    amount: Union[float, int] = field(compare=False)
+    deadline: Optional[float] = field(compare=False)
+    submitted_at: float = field(compare=False)
+    future: Future = field(compare=False)
+
+    def is_expired(self, now: float) -> bool:
+        return self.deadline is not None and now > self.deadline
+
+
+class OrderScheduler:
+    """Places orders through `tradingTOT.place_order` from a bounded pool of workers, by priority.
+
+    Orders wait in a bounded queue and are taken highest priority first, then in the order they were submitted. An
+    order whose deadline passes while it waits fails with `OrderOperationError` instead of reaching the broker.
+    Submitting to a full queue blocks for up to `timeout` seconds and then fails, so producers slow down to the
+    rate the broker accepts orders.
+
+    Example:
+        with OrderScheduler(tot) as scheduler:
+            exit_order = scheduler.submit("SELL", "MSFT", 100, priority=OrderPriority.CRITICAL, deadline=2)
+            print(exit_order.result())
+    """
+    def __init__(self, client, workers: int = 2, max_queue: int = 1000, window: int = 1000) -> None:
+        """
+        Args:
+            client: `tradingTOT` instance.
+            workers: Number of orders placed concurrently.
+            max_queue: Maximum number of orders waiting.
+            window: Number of recent orders the queue latency percentiles are computed over.
+        """
+        self.client = client
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queue: List[ScheduledOrder] = []
+        self.sequence = itertools.count()
+        self.condition = Condition()
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.latencies: Dict[OrderPriority, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self.running = False
+        self.threads: List[Thread] = []
+
+    def submit(self, action: Union[OrderType, str], ticker: str, amount: Union[float, int],
+               priority: OrderPriority = OrderPriority.NORMAL, deadline: Optional[float] = None,
+               timeout: Optional[float] = None) -> Future:
+        """Queues an order.
+
+        Args:
+            action: Order type
+            ticker: Ticker to trade
+            amount: The amount (currency not share quantity) to be used in the transaction.
+            priority: Orders with a lower value are placed first.
+            deadline: Seconds from now after which the order is dropped if it has not been placed.
+            timeout: Seconds to wait for room in a full queue. Waits indefinitely if None.
+
+        Returns:
+            Future of the placed order, as returned by `place_order`.
+        """
+        now = time.monotonic()
+        future = Future()
+        with self.condition:
+            if not self.condition.wait_for(lambda: len(self.queue) < self.max_queue, timeout):
+                self.counts["rejected"] += 1
+                raise OrderOperationError(f"The order queue is full with {len(self.queue)} orders.")
+
+            order = ScheduledOrder(int(priority), next(self.sequence), action, ticker, amount,
+                                   None if deadline is None else now + deadline, now, future)
+            heapq.heappush(self.queue, order)
+            self.counts["submitted"] += 1
+            self.condition.notify_all()
+        return future
+
+    def _take(self) -> Optional[ScheduledOrder]:
+        with self.condition:
+            self.condition.wait_for(lambda: self.queue or not self.running)
+            if not self.queue:
+                return None
+            order = heapq.heappop(self.queue)
+            self.condition.notify_all()
+            return order
+
+    def _count(self, name: str) -> None:
+        with self.condition:
+            self.counts[name] += 1
+
+    def _place(self, order: ScheduledOrder) -> None:
+        now = time.monotonic()
+        with self.condition:
+            self.latencies[OrderPriority(order.priority)].append(now - order.submitted_at)
+        if not order.future.set_running_or_notify_cancel():
+            self._count("cancelled")
+            return
+        if order.is_expired(now):
+            self._count("expired")
+            order.future.set_exception(OrderOperationError(
+                f"The order expired after waiting {now - order.submitted_at:.3f} seconds to be placed."))
+            return
+
+        try:
+            result = self.client.place_order(order.action, order.ticker, order.amount)
+        except Exception as err:
+            self._count("failed")
+            order.future.set_exception(err)
+        else:
+            self._count("placed")
+            order.future.set_result(result)
+
+    def _run(self) -> None:
+        while True:
+            order = self._take()
+            if order is None:
+                return
+            try:
+                self._place(order)
+            except Exception:
+                logger.exception("Order scheduler worker failed.")
+
+    def metrics(self) -> Dict:
+        """Order counts and the queue latency percentiles in milliseconds of each priority."""
+        # Workers append to the latencies, so they are copied under the lock and summarised outside it.
+        with self.condition:
+            latencies = {priority: list(seconds) for priority, seconds in self.latencies.items()}
+            metrics = {"queued": len(self.queue), **self.counts}
+
+        latency = {}
+        for priority, seconds in sorted(latencies.items()):
+            if seconds:
+                p50, p95, p99 = np.percentile(np.asarray(seconds) * 1000, [50, 95, 99])
+                latency[priority.name] = {"count": len(seconds), "p50": float(p50), "p95": float(p95),
+                                          "p99": float(p99), "max": max(seconds) * 1000}
+        return {**metrics, "queue_latency": latency}
+
+    def start(self) -> "OrderScheduler":
+        with self.condition:
+            if self.running:
+                return self
+            self.running = True
+        self.threads = [Thread(target=self._run, name=f"tradingTOT-order-scheduler-{i}", daemon=True)
+                        for i in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self, drain: bool = True) -> None:
+        """Stops the workers.
+
+        Args:
+            drain: Place the queued orders before stopping. Otherwise they are cancelled.
+        """
+        with self.condition:
+            if not drain:
+                for order in self.queue:
+                    order.future.cancel()
+                    self.counts["cancelled"] += 1
+                self.queue.clear()
+            self.running = False
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def __enter__(self) -> "OrderScheduler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
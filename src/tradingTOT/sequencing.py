@@ -0,0 +1,197 @@
+import hashlib
+import os
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock, local
+from typing import Dict, Optional
+
+from tradingTOT.exceptions import OrderOperationError
+from tradingTOT.utils.storage import DEFAULT_LOCKS_DIRECTORY, DEFAULT_CLAIMS_DIRECTORY
+from tradingTOT.utils.tracing import span
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+def account_key(email: Optional[str] = None, environment: Optional[str] = None) -> str:
+    """Identifies a Trading212 account without exposing the email address.
+
+    Args:
+        email: Account email. Defaults to `TRADINGTOT_EMAIL`.
+        environment: Trading212 environment. Defaults to `TRADINGTOT_ENVIRONMENT`.
+
+    Returns:
+        Account key usable in file names.
+    """
+    email = email or os.environ.get("TRADINGTOT_EMAIL", "")
+    environment = environment or os.environ.get("TRADINGTOT_ENVIRONMENT", "")
+    digest = hashlib.sha1(email.lower().encode()).hexdigest()[:16]
+    return f"{environment}-{digest}"
+
+
+class OrderSequencer(ABC):
+    """Serializes order placements for an account.
+
+    Implementations decide the scope of the sequencing, e.g. a process or every process on a host.
+    """
+    @abstractmethod
+    def acquire(self, account: str, timeout: Optional[float] = None) -> bool:
+        pass
+
+    @abstractmethod
+    def release(self, account: str) -> None:
+        pass
+
+    @contextmanager
+    def sequence(self, account: str, timeout: Optional[float] = None):
+        with span("order.lock_wait", sequencer=type(self).__name__):
+            acquired = self.acquire(account, timeout)
+        if not acquired:
+            raise OrderOperationError(f"Timed out after {timeout} seconds waiting to place an order.")
+        try:
+            yield
+        finally:
+            self.release(account)
+
+
+class ThreadOrderSequencer(OrderSequencer):
+    """Sequences placements within a process, with one lock per account. Clients sequence each other when they share
+    an instance, as they do with the default `DEFAULT_ORDER_SEQUENCER`."""
+    def __init__(self) -> None:
+        self._locks: Dict[str, Lock] = {}
+        self._registry_lock = Lock()
+
+    def _lock(self, account: str) -> Lock:
+        with self._registry_lock:
+            return self._locks.setdefault(account, Lock())
+
+    def acquire(self, account: str, timeout: Optional[float] = None) -> bool:
+        return self._lock(account).acquire(timeout=-1 if timeout is None else timeout)
+
+    def release(self, account: str) -> None:
+        self._lock(account).release()
+
+
+class FileLockOrderSequencer(ThreadOrderSequencer):
+    """Sequences placements across every process on the host using a lock file per account."""
+    poll_interval = 0.01
+
+    def __init__(self, locks_dir: Path = DEFAULT_LOCKS_DIRECTORY) -> None:
+        super().__init__()
+        self.dir = locks_dir
+        self.handles = local()
+
+    def _try_lock_file(self, handle) -> bool:
+        try:
+            if os.name == "nt":
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, account: str, timeout: Optional[float] = None) -> bool:
+        started = time.monotonic()
+        # The thread lock keeps threads of this process from contending for the file lock.
+        if not super().acquire(account, timeout):
+            return False
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        handle = open(Path(self.dir, f"{account}.lock"), "a+")
+        while not self._try_lock_file(handle):
+            if timeout is not None and time.monotonic() - started > timeout:
+                handle.close()
+                super().release(account)
+                return False
+            time.sleep(self.poll_interval)
+
+        setattr(self.handles, account, handle)
+        return True
+
+    def release(self, account: str) -> None:
+        handle = getattr(self.handles, account)
+        delattr(self.handles, account)
+        try:
+            if os.name == "nt":
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        finally:
+            handle.close()
+            super().release(account)
+
+
+DEFAULT_ORDER_SEQUENCER = ThreadOrderSequencer()
+
+
+class SequencerLock:
+    """Lock-like view of the sequencing of one account, for code written against the former `order_lock`."""
+    def __init__(self, sequencer: OrderSequencer, account: str) -> None:
+        self.sequencer = sequencer
+        self.account = account
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if not blocking:
+            timeout = 0
+        return self.sequencer.acquire(self.account, None if timeout < 0 else timeout)
+
+    def release(self) -> None:
+        self.sequencer.release(self.account)
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class OrderClaims:
+    """Attributes placed orders to exactly one placer without holding a lock.
+
+    Each order id can only be claimed once across every thread and process on the host, because a claim is the
+    atomic creation of a file named after the order id. Placers of identical orders therefore each end up with a
+    different order.
+    """
+    max_age = 24 * 60 * 60
+    prune_every = 100
+
+    def __init__(self, account: str, claims_dir: Path = DEFAULT_CLAIMS_DIRECTORY) -> None:
+        self.dir = Path(claims_dir, account)
+        self.claims = 0
+
+    def claim(self, order_id: str) -> bool:
+        """Claims an order id.
+
+        Args:
+            order_id: Order id.
+
+        Returns:
+            True if the order id was not claimed before.
+        """
+        self.dir.mkdir(parents=True, exist_ok=True)
+        try:
+            os.close(os.open(Path(self.dir, str(order_id)), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+
+        self.claims += 1
+        if self.claims % self.prune_every == 0:
+            self.prune()
+        return True
+
+    def prune(self) -> None:
+        """Deletes claims older than `max_age` seconds. Orders are identified right after placement."""
+        cutoff = time.time() - self.max_age
+        for path in self.dir.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                continue
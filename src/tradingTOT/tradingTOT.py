@@ -1,48 +1,98 @@
-from threading import Lock
-from typing import Union, Dict, Optional, Set, List
-
+import json
+import logging
+import time
+import warnings
+from pathlib import Path
+from urllib.parse import quote
+from typing import Callable, Union, Dict, Optional, Set, List, Tuple
+
+from requests.models import Response
 from requests.sessions import Session
 
-from tradingTOT.schemas.api_responses import Position, SummarySchema
+from tradingTOT.analytics import PortfolioSnapshot
+from tradingTOT.candles import CandleBuffer, CandleStore
+from tradingTOT.costs import CostEstimator
+from tradingTOT.events import AccountEventStream
+from tradingTOT.fx import FXRateCache
+from tradingTOT.middleware import Middleware, MiddlewarePipeline
+from tradingTOT.pretrade import PreTradeChecker
+from tradingTOT.instrument_index import InstrumentIndex, INSTRUMENT_INDEX_NAME, normalize
+from tradingTOT.sequencing import (OrderSequencer, OrderClaims, SequencerLock, DEFAULT_ORDER_SEQUENCER,
+                                   account_key)
+from tradingTOT.schemas.api_responses import SummarySchema
 from tradingTOT.exceptions import BrokerOrderError
 from tradingTOT.endpoints import (VALIDATE_URL, PLACE_ORDER_URL,
-                                  ORDER_COSTS_URL, TICKER_PRICE_URL, TICKER_PRICE_URL_V2, ACCOUNT_SUMMARY_URL, ACCOUNT_SUMMARY_URL_SERVICES,
+                                  ORDER_COSTS_URL, TICKER_PRICE_URL, TICKER_PRICE_URL_V2, TICKER_CANDLES_URL, ACCOUNT_SUMMARY_URL, ACCOUNT_SUMMARY_URL_SERVICES,
                                   ORDER_HISTORY, ALGOLIA_CONFIG_URL, ALGOLIA_SEARCH_URL)
-from tradingTOT.enums import OrderStatus, OrderType
+from tradingTOT.enums import OrderStatus, OrderType, CandlePeriod
 
 from tradingTOT.existing_orders import ExistingOrdersHandler
 from tradingTOT.utils.browser import enforce_auth
+from tradingTOT.utils.decoding import decode
+from tradingTOT.utils.storage import Storage
+from tradingTOT.utils.tracing import span, traced
+
 
+logger = logging.getLogger(__name__)
 
 # The value is randomly chosen as I am yet to observe an increment more than that.
 FILLID_MAX_INCREMENT = 50
 
 SUPPORTED_EXCHANGES = {"NASDAQ", "NYSE"}
 
+# Value of the order review used to refresh a stale exchange rate. No order is placed.
+FX_REVIEW_AMOUNT = 100
+
 
 class tradingTOT:
-    def __init__(self, session: Optional[Session] = None):
+    def __init__(self, session: Optional[Session] = None, order_sequencer: Optional[OrderSequencer] = None,
+                 auth_storage: Optional[Storage] = None, session_factory: Callable[[], Session] = Session,
+                 middleware: Optional[List[Middleware]] = None, currency: str = "GBP",
+                 fx_rates: Optional[FXRateCache] = None):
         """
         Main class for executing Trading212 functionality.
 
         Args:
             session: Requests Session.
+            order_sequencer: Serializes order placements for the account. Defaults to one lock per account shared by
+                every instance in the process. Use `sequencing.FileLockOrderSequencer` to sequence across processes.
+            auth_storage: Where the auth data of a login is kept. Defaults to `storage.LocalAuthStorage`.
+            session_factory: Creates the sessions that logins authenticate.
+            middleware: Ordered `middleware.Middleware` every request of the client is sent through.
+            currency: Currency code of the account, which orders are placed and fills are reported in.
+            fx_rates: Exchange rate cache, which can be shared between clients.
         """
         if not session:
-            session = Session()
+            session = session_factory()
 
         self.session = session
-        self.order_lock = Lock()
+        self.auth_storage = auth_storage
+        self.session_factory = session_factory
+        self.middleware = MiddlewarePipeline(middleware or [])
+        self.currency = currency
+        self.fx_rates = fx_rates if fx_rates is not None else FXRateCache()
+        self.account = account_key()
+        self.order_sequencer = order_sequencer or DEFAULT_ORDER_SEQUENCER
+        self.order_claims = OrderClaims(self.account)
+        self.order_handler = ExistingOrdersHandler(client=self)
         self.algolia_credentials = {"applicationId": None, "searchApiKey": None}
         self.ticker_to_object_id = {}
         self.object_id_to_ticker = {}
+        self.candle_store = CandleStore()
+        self._instrument_index: Optional[InstrumentIndex] = None
+        self._instrument_index_loaded = False
+        self.cost_estimator = CostEstimator(currency, fx_rates=self.fx_rates)
+        self.pretrade = PreTradeChecker()
 
     # TODO: Add a force relogin functionality that does not rely on cache.
-    @enforce_auth
+    @traced
     def place_order(self, action: Union[OrderType, str], ticker: str, amount: Union[float, int]) -> Dict:
         """
         Places an order.
 
+        The order is checked against the cached account summary first, so orders Trading212 would reject raise
+        `BrokerOrderError` without an auth check or a validation request.
+
         Args:
             action: Order type
             ticker: Ticker to trade
@@ -59,31 +109,89 @@ class tradingTOT:
             raise Exception("Order action not supported.")
 
         object_id = self._get_object_id(ticker)
-        payload = {"currency":"GBP","instrumentCode":object_id,"orderType":"MARKET",
+        with span("order.pretrade_check"):
+            amount, reservation = self.pretrade.check_and_reserve(object_id, amount)
+        try:
+            return self._place_order(action, object_id, amount, reservation)
+        except BaseException:
+            self.pretrade.release(reservation)
+            raise
+
+    @traced
+    def check_orders(self, orders: List[Tuple[Union[OrderType, str], str, Union[float, int]]]) -> List[Dict]:
+        """Runs the pre-trade checks of `place_order` on a batch of orders, as if they were placed in order.
+
+        Args:
+            orders: Action, ticker and amount of each order.
+
+        Returns:
+            For each order, its Trading212 `code`, its signed and possibly normalized `amount` and the
+            `enums.FailureTypes` `error` it would fail with, which is None if it passes.
+        """
+        signed_orders = []
+        for action, ticker, amount in orders:
+            if action == OrderType.BUY:
+                amount = abs(amount)
+            elif action == OrderType.SELL:
+                amount = -abs(amount)
+            else:
+                raise Exception("Order action not supported.")
+            signed_orders.append((self._get_object_id(ticker), amount))
+
+        return self.pretrade.check_batch(signed_orders)
+
+    @enforce_auth
+    def _place_order(self, action: Union[OrderType, str], object_id: str, amount: float,
+                     reservation: Optional[int] = None) -> Dict:
+        """Validates and places a checked order.
+
+        Args:
+            action: Order type
+            object_id: Trading212 object id e.g. MSFT_US_EQ.
+            amount: Signed amount.
+            reservation: Pre-trade reservation of the order, marked as placed once the order is.
+
+        Returns:
+            The new order with its costs.
+        """
+        payload = {"currency":self.currency,"instrumentCode":object_id,"orderType":"MARKET",
                    "value":amount,"timeValidity":"GOOD_TILL_CANCEL"}
 
-        response = self.session.post(VALIDATE_URL, json=payload)
+        with span("order.validate"):
+            response = self._request("POST", VALIDATE_URL, json=payload)
 
         # Trading212 returns empty string if valid
         if not response.content:
-            with self.order_lock:
-                order_handler = ExistingOrdersHandler(self.session)
-                existing_orders = order_handler.from_summary()
-                order_ids = {order.get("orderId") for order in existing_orders}
-                response = self.session.post(PLACE_ORDER_URL, json=payload)
-                existing_orders = order_handler.from_execution_response(response=response)
-                for order in existing_orders:
-                    if not (order["orderId"] not in order_ids and order.get("code") == object_id
-                            and order.get("value") == amount):
-                        continue
-
-                    order["cost"] = self.get_costs(action, object_id, amount)
-                    return order
+            with self.order_sequencer.sequence(self.account):
+                # The known order ids are kept up to date by every summary and execution response, so the summary
+                # is only fetched when none of them has been seen recently.
+                if self.order_handler.is_stale():
+                    with span("order.summary_refresh"):
+                        self._get_summary()
+                # Summaries fetched by other threads during the placement can already list the new order.
+                known_order_ids = self.order_handler.snapshot()
+                with span("order.place"):
+                    response = self._request("POST", PLACE_ORDER_URL, json=payload)
+                if reservation is not None:
+                    self.pretrade.placed(reservation)
+                new_orders = self.order_handler.new_orders(response, known_order_ids)
+
+            for order in new_orders:
+                if not (order.get("code") == object_id and order.get("value") == amount):
+                    continue
+
+                # Placers of identical orders in other threads or processes may see this order too.
+                if not self.order_claims.claim(order["orderId"]):
+                    continue
+
+                order["cost"] = self.get_costs(action, object_id, amount)
+                return order
         else:
             raise BrokerOrderError(f"The order was invalid. Reason: {response.content}")
 
-        return response.json()
+        return decode(response)
 
+    @traced
     @enforce_auth
     def cancel_order(self, order_id: Union[int, str]) -> Dict:
         """Cancel a Trading212 order.
@@ -95,10 +203,11 @@ class tradingTOT:
             Response from cancel attempt.
         """
         url = f"{PLACE_ORDER_URL}/{order_id}"
-        response = self.session.delete(url)
-        return response.json()
+        response = self._request("DELETE", url)
+        return decode(response)
 
 
+    @traced
     @enforce_auth
     def get_costs(self, action: OrderType, ticker, amount) -> Dict:
         """Analyze an order action and return the costs of executing the order action.
@@ -119,10 +228,81 @@ class tradingTOT:
             raise Exception("Order action not supported.")
 
         object_id = self._get_object_id(ticker)
-        payload = {"currency":"GBP","instrumentCode": object_id, "orderType":"MARKET",
+        response = self._review_order(object_id, amount)
+        self.cost_estimator.observe_review(object_id, amount, response)
+        return response
+
+    def _review_order(self, object_id: str, amount: float) -> Dict:
+        payload = {"currency":self.currency,"instrumentCode": object_id, "orderType":"MARKET",
                    "value":amount,"timeValidity":"GOOD_TILL_CANCEL"}
-        response = self.session.post(ORDER_COSTS_URL, json=payload)
-        return response.json()
+        return decode(self._request("POST", ORDER_COSTS_URL, json=payload))
+
+    @enforce_auth
+    def _refresh_fx_rate(self, object_id: str) -> None:
+        # The review only refreshes the rate, so it is kept out of the cost estimator drift.
+        self.fx_rates.observe_review(self._review_order(object_id, FX_REVIEW_AMOUNT))
+
+    @traced
+    def estimate_costs(self, action: OrderType, ticker, amount) -> Dict:
+        """Estimate the costs of executing an order action locally, without an order review request.
+
+        The estimate uses the cached instrument data, latest quote and exchange rate of the ticker, which are fetched
+        when missing. The quote is fetched again once it is older than `cost_estimator.quote_max_age`. `get_costs`
+        stays the authoritative check and `cost_estimator.drift` reports how far the estimates have been from it.
+
+        Args:
+            action: OrderType action.
+            ticker: Ticker symbol.
+            amount: The amount (currency not share quantity) to be used in the transaction.
+
+        Returns:
+            Costs data.
+        """
+        if action == OrderType.BUY:
+            amount = abs(amount)
+        elif action == OrderType.SELL:
+            amount = -abs(amount)
+        else:
+            raise Exception("Order action not supported.")
+
+        object_id = self._get_object_id(ticker)
+        if not self.cost_estimator.has_fresh_quote(object_id):
+            self.get_ask_price(object_id)
+
+        if not self.cost_estimator.can_estimate(object_id):
+            # The exchange rate is only learned from order reviews.
+            return self.get_costs(action, object_id, amount)
+
+        return self.cost_estimator.estimate(object_id, amount)
+
+    @traced
+    def get_fx_rate(self, from_currency: str, to_currency: Optional[str] = None) -> Optional[float]:
+        """Gets an exchange rate from the FX cache, refreshing it with an order review once it is stale.
+
+        Args:
+            from_currency: Currency code, e.g. USD.
+            to_currency: Currency code. Defaults to the account currency.
+
+        Returns:
+            Amount of `to_currency` for one unit of `from_currency`, or None if the rate has never been seen and
+            no instrument in the currency is known to review.
+        """
+        to_currency = to_currency or self.currency
+        rate = self.fx_rates.get(from_currency, to_currency)
+        if rate is not None:
+            return rate
+
+        # Order reviews only quote the rate between the instrument and the account currencies.
+        others = {from_currency, to_currency} - {self.currency}
+        if len(others) == 1:
+            currency = others.pop()
+            object_id = next((object_id for object_id, instrument_currency in
+                              list(self.cost_estimator.currencies.items()) if instrument_currency == currency), None)
+            if object_id:
+                with span("fx.refresh", currency=currency):
+                    self._refresh_fx_rate(object_id)
+
+        return self.fx_rates.get(from_currency, to_currency, allow_stale=True)
 
     @enforce_auth
     def _get_algolia_credentials(self) -> Dict:
@@ -131,7 +311,8 @@ class tradingTOT:
         Returns:
             Algolia credentials.
         """
-        response = self.session.get(ALGOLIA_CONFIG_URL).json()
+        with span("algolia.credentials"):
+            response = decode(self._request("GET", ALGOLIA_CONFIG_URL))
         self.algolia_credentials["applicationId"] = response["credentials"]["applicationId"]
         self.algolia_credentials["searchApiKey"] = response["credentials"]["searchApiKey"]
         return self.algolia_credentials
@@ -143,40 +324,127 @@ class tradingTOT:
             ticker: Ticker symbol.
 
         Returns:
+
+        Raises:
+            ValueError: If the ticker is not a supported stock.
         """
         if self.object_id_to_ticker.get(ticker):
             return ticker
 
         if not self.ticker_to_object_id.get(ticker):
-            data = self.get_equity_data(ticker)
+            with span("object_id.resolve", ticker=ticker):
+                data = self.get_equity_data(ticker)
+            if not data:
+                raise ValueError(f"The ticker {ticker} is not a supported stock.")
+            self.cost_estimator.update_instrument(data["objectID"], data)
             self.ticker_to_object_id[ticker] = data["objectID"]
             self.object_id_to_ticker[data["objectID"]] = ticker
 
         return self.ticker_to_object_id[ticker]
 
-    @enforce_auth
+    @property
+    def order_lock(self) -> SequencerLock:
+        """Deprecated: lock-like view of `order_sequencer` for the account. Use `order_sequencer.sequence` instead."""
+        warnings.warn("`order_lock` is deprecated, use `order_sequencer.sequence(client.account)` instead.",
+                      DeprecationWarning, stacklevel=2)
+        return SequencerLock(self.order_sequencer, self.account)
+
+    @property
+    def instrument_index(self) -> Optional[InstrumentIndex]:
+        """The local instrument index, loaded from disk the first time it is used. None if it was never built."""
+        if not self._instrument_index_loaded:
+            self._instrument_index = InstrumentIndex.load()
+            self._instrument_index_loaded = True
+        return self._instrument_index
+
+    @instrument_index.setter
+    def instrument_index(self, index: Optional[InstrumentIndex]) -> None:
+        self._instrument_index = index
+        self._instrument_index_loaded = True
+
+    @traced
     def get_equity_data(self, ticker: str) -> Dict:
         """Gets more Trading212 information about a ticker.
 
+        The local instrument index is checked first, by exact short name and then by a fuzzy search that lets the
+        ticker differ in case and punctuation, e.g. BRK-B for BRK.B. Algolia is only queried when the ticker is not
+        in it.
+
         Args:
             ticker: Ticker symbol
 
         Returns:
             Ticker data
         """
-        page_number = 0
+        index = self.instrument_index
+        if index is not None:
+            result = (self._match_equity(index.lookup(ticker), ticker)
+                      or self._match_equity(index.search(ticker), ticker))
+            if result:
+                return result
+
+        matches = self._search_instruments(ticker)["hits"]
+        return self._match_equity(matches, ticker)
+
+    @traced
+    def find_instruments(self, query: str, limit: int = 10) -> List[Dict]:
+        """Fuzzy search for instruments by company name, ticker or a part of either.
+
+        Args:
+            query: Search query, e.g. "micro" or "appel".
+            limit: Maximum number of results.
+
+        Returns:
+            Matching instruments, best match first, from the local instrument index or from Algolia if it was never
+            built.
+        """
+        index = self.instrument_index
+        if index is not None:
+            return index.search(query, limit)
+        return self._search_instruments(query, hits_per_page=limit)["hits"]
+
+    @staticmethod
+    def _match_equity(matches: List[Dict], ticker: str) -> Dict:
+        """Picks the supported stock whose short name is the ticker, ignoring case and punctuation."""
+        result = {}
+        for match in matches:
+            if match.get("category").upper() == "EQUITY" and match.get("uiType") == "STOCK" \
+                    and normalize(match.get("shortName")) == normalize(ticker) \
+                    and match.get("exchangeName").upper() in SUPPORTED_EXCHANGES:
+                result = match
+                break
+
+        return result
+
+    @enforce_auth
+    def _search_instruments(self, query: str, page_number: int = 0, hits_per_page: int = 50,
+                            filters: Optional[str] = None, facets: Optional[List[str]] = None) -> Dict:
+        """Searches Trading212's Algolia instrument index.
+
+        Args:
+            query: Search query.
+            page_number: Results page.
+            hits_per_page: Number of results per page.
+            filters: Algolia filters the results must also match, e.g. `exchangeName:"NYSE"`.
+            facets: Attributes whose value counts are returned in `facets`.
+
+        Returns:
+            Algolia search results, with the matches in `hits`.
+        """
+        extra_filters = f"%20AND%20({quote(filters)})" if filters else ""
+        extra_params = f"facets={quote(json.dumps(facets))}&" if facets else ""
         # Payload was gotten from studying Trading212's requests.
         payload = {"requests": [
             {
-                "indexName": "instrument.ld4.EN",
+                "indexName": INSTRUMENT_INDEX_NAME,
                 "params": f"attributesToHighlight=%5B%22name%22%2C%22shortName%22%2C%22exchangeName%22%2C"
                           f"%22uiType%22%5D&attributesToRetrieve=%5B%22name%22%2C%22shortName%22%2C"
                           f"%22exchangeName%22%2C%22uiType%22%2C%22exchangeCountryCode%22%2C%22currencyCode%22%2C"
-                          f"%22category%22%2C%22workingScheduleId%22%5D&filters=(category%3AEQUITY)%20AND"
+                          f"%22category%22%2C%22workingScheduleId%22%5D&{extra_params}filters=(category%3AEQUITY)%20AND"
                           f"%20(state.demo.enabled%3Atrue)%20AND%20(state.demo.conditionalVisibility%3Afalse)%20AND"
-                          f"%20(NOT%20dealerExclusions%3AAVUSUK)&getRankingInfo=true&hitsPerPage=50&"
-                          f"optionalFilters=%5B%5D&page={page_number}&query={ticker}&sumOrFiltersScores=true&"
-                          f"tagFilters="
+                          f"%20(NOT%20dealerExclusions%3AAVUSUK){extra_filters}&getRankingInfo=true&"
+                          f"hitsPerPage={hits_per_page}&optionalFilters=%5B%5D&page={page_number}&query={query}&"
+                          f"sumOrFiltersScores=true&tagFilters="
             }
         ]}
 
@@ -184,19 +452,55 @@ class tradingTOT:
         url = ALGOLIA_SEARCH_URL.format(application_id=credentials["applicationId"],
                                         search_api_key=credentials["searchApiKey"])
 
-        response = self.session.post(url, json=payload).json()
-        matches = response.get("results")[0]["hits"]
+        response = decode(self._request("POST", url, json=payload))
+        return response.get("results")[0]
 
-        result = {}
-        for match in matches:
-            if match.get("category").upper() == "EQUITY" and match.get("uiType") == "STOCK" \
-                    and match.get("shortName").upper() == ticker.upper() \
-                    and match.get("exchangeName").upper() in SUPPORTED_EXCHANGES:
-                result = match
+    def _page_instruments(self, index: InstrumentIndex, hits_per_page: int, filters: Optional[str] = None,
+                          results: Optional[Dict] = None) -> None:
+        """Adds every page of a search to the index, warning when Algolia's pagination limit cuts it short."""
+        page_number = 0
+        while True:
+            if results is None:
+                results = self._search_instruments("", page_number, hits_per_page, filters)
+            index.add(results.get("hits", []))
+            page_number += 1
+            if page_number >= results.get("nbPages", 0):
                 break
+            results = None
 
-        return result
+        reachable = results.get("nbPages", 0) * hits_per_page
+        if results.get("nbHits", 0) > reachable:
+            logger.warning(f"Only {reachable} of the {results['nbHits']} instruments matching {filters or 'the index'} "
+                           f"could be downloaded because of Algolia's pagination limit.")
+
+    @traced
+    def build_instrument_index(self, hits_per_page: int = 1000, path: Optional[Path] = None) -> InstrumentIndex:
+        """Pages through the whole Algolia instrument index and saves it locally for offline lookups.
 
+        Algolia only pages through a limited number of hits per query, so larger indexes are downloaded with one
+        query per exchange.
+
+        Args:
+            hits_per_page: Number of instruments per Algolia request.
+            path: File the index is saved to. Defaults to `instrument_index.default_index_path()`.
+
+        Returns:
+            The instrument index.
+        """
+        index = InstrumentIndex()
+        first = self._search_instruments("", 0, hits_per_page, facets=["exchangeName"])
+        exchanges = first.get("facets", {}).get("exchangeName", {})
+        if first.get("nbHits", 0) <= first.get("nbPages", 0) * hits_per_page or not exchanges:
+            self._page_instruments(index, hits_per_page, results=first)
+        else:
+            for exchange in exchanges:
+                self._page_instruments(index, hits_per_page, f'exchangeName:"{exchange}"')
+
+        index.save(path)
+        self.instrument_index = index
+        return index
+
+    @traced
     @enforce_auth
     def get_ask_price(self, ticker: str) -> Dict:
         """Gets the most recent ask price for the ticker.
@@ -208,14 +512,89 @@ class tradingTOT:
             Asking price data
         """
         object_id = self._get_object_id(ticker)
-        response = self.session.get(TICKER_PRICE_URL_V2.format(object_id=object_id)).json()
+        response = decode(self._request("GET", TICKER_PRICE_URL_V2.format(object_id=object_id)))
         if not isinstance(response, dict) and not response.get("close", None):
             raise ValueError(f"The ticker {ticker} is invalid.")
 
         response["price"] = response["close"]
+        self.cost_estimator.update_quote(object_id, response["price"])
         return response
 
+    @traced
+    @enforce_auth
+    def get_ask_prices(self, tickers: List[str]) -> Dict[str, Dict]:
+        """Gets the most recent ask prices of several tickers in one request.
+
+        Args:
+            tickers: Ticker symbols.
 
+        Returns:
+            Asking price data by ticker. Tickers without a price, or that are not supported stocks, are left out.
+        """
+        resolved = []
+        for ticker in tickers:
+            try:
+                resolved.append((ticker, self._get_object_id(ticker)))
+            except ValueError:
+                continue
+        if not resolved:
+            return {}
+
+        tickers, object_ids = zip(*resolved)
+        payload = [{"ticker": object_id, "period": "d1", "useAskPrice": True} for object_id in object_ids]
+        response = decode(self._request("POST", TICKER_PRICE_URL, json=payload))
+        if not isinstance(response, list):
+            raise ValueError(f"Unexpected response when fetching prices: {response}")
+
+        prices = {}
+        # The deviations are returned in the order of the requested tickers.
+        for ticker, object_id, deviation in zip(tickers, object_ids, response):
+            deviation = deviation.get("response", deviation) if isinstance(deviation, dict) else None
+            if not deviation or deviation.get("close") is None:
+                continue
+
+            deviation["price"] = deviation["close"]
+            self.cost_estimator.update_quote(object_id, deviation["price"])
+            prices[ticker] = deviation
+
+        return prices
+
+    @traced
+    @enforce_auth
+    def get_candles(self, ticker: str, period: Union[CandlePeriod, str] = CandlePeriod.ONE_MINUTE,
+                    size: int = 500) -> CandleBuffer:
+        """Gets the price history of a ticker.
+
+        Candles are kept in a local ring buffer, so only the candles after the latest stored one are downloaded.
+
+        Args:
+            ticker: Ticker symbol.
+            period: Candle period.
+            size: Number of candles to keep.
+
+        Returns:
+            Candle buffer with the OHLC arrays.
+        """
+        period = CandlePeriod(period)
+        object_id = self._get_object_id(ticker)
+        buffer = self.candle_store.get(object_id, period, size)
+
+        missing = buffer.missing(int(time.time() * 1000))
+        payload = {"candles": [{"ticker": object_id, "period": period.value, "size": missing, "useAskPrice": False}]}
+        response = decode(self._request("POST", TICKER_CANDLES_URL, json=payload))
+        if not isinstance(response, list) or not response:
+            raise ValueError(f"No candles were returned for the ticker {ticker}.")
+
+        candles = response[0].get("response", {}).get("candles", [])
+        # Each candle is [timestamp, open, high, low, close, volume].
+        # Concurrent calls for the same ticker share the buffer, so it is extended and saved under the store lock.
+        with self.candle_store.lock:
+            buffer.extend([candle[:5] for candle in candles])
+            self.candle_store.save(object_id, period)
+        return buffer
+
+
+    @traced
     @enforce_auth
     def get_status(self, order_id: Union[int, str]) -> Dict:
         """Gets the status of the placed order.
@@ -226,20 +605,32 @@ class tradingTOT:
         Returns:
             Data with information about order status
         """
-        order_handler = ExistingOrdersHandler(self.session)
-        existing_orders = order_handler.from_summary()
+        existing_orders = self.order_handler.from_summary(self._get_summary())
 
         for order in existing_orders:
             if order['orderId'] == str(order_id):
                 return {"status": OrderStatus.SUBMITTED}
 
+        return self._get_history_status(order_id)
+
+    @enforce_auth
+    def _get_history_status(self, order_id: Union[int, str]) -> Dict:
+        """Gets the status of an order that is no longer open from the order history.
+
+        Args:
+            order_id: Order id.
+
+        Returns:
+            Data with information about order status
+        """
         for increment in range(FILLID_MAX_INCREMENT):
             fill_id = int(order_id) + increment
-            response = self.session.get(f"{ORDER_HISTORY}/{fill_id}", json=[])
+            with span("history.probe", fill_id=fill_id):
+                response = self._request("GET", f"{ORDER_HISTORY}/{fill_id}", json=[])
             if response.status_code == 200:
                 break
 
-        response = response.json()
+        response = decode(response)
         # TODO: Figure out what the difference between Rejected and Non existent order ids is.
         fill_details = response.get("sections", [])
         if not fill_details:
@@ -248,20 +639,21 @@ class tradingTOT:
         fill_details = fill_details[2]
         is_executed = False
         fill_price = None
+        fill_currency = None
         fill_quantity = None
-        exchange_rate = 1
+        exchange_rate = None
         for data in fill_details.get("rows", []):
             description = data.get("description", {"key": None})
             details = data.get("value", {"context": None})
             if description["key"] == "history.details.order.fill.date-executed.key" and details["context"]:
                 is_executed = True
 
-            # TODO: Handle the case if the account is in another currency apart from USD
             if description["key"] == "history.details.order.exchange-rate.key" and details["context"]:
                 exchange_rate = details["context"]["quantity"]
 
             if description["key"] == "history.details.order.fill.price.key" and details["context"]:
                 fill_price = details["context"]["amount"]
+                fill_currency = details["context"].get("currency")
 
             if description["key"] == "history.details.order.fill.quantity.key" and details["context"]:
                 fill_quantity = details["context"]["quantity"]
@@ -269,7 +661,7 @@ class tradingTOT:
         if fill_price is None:
             return {"status": OrderStatus.CANCELLED}
 
-        fill_price /= exchange_rate
+        fill_price, currency = self._fill_price_in_account_currency(fill_price, fill_currency, exchange_rate)
 
         if is_executed:
             if not fill_quantity:
@@ -278,16 +670,57 @@ class tradingTOT:
             fill_data = {
                 "status": OrderStatus.COMPLETED,
                 "price": fill_price,
+                "currency": currency,
                 "quantity": fill_quantity
             }
             return fill_data
         else:
             return {"status": OrderStatus.REJECTED}
 
+    def _fill_price_in_account_currency(self, price: float, currency: Optional[str],
+                                        exchange_rate: Optional[float]) -> Tuple[float, Optional[str]]:
+        """Converts the fill price of an order history entry to the account currency.
+
+        Args:
+            price: Fill price in the instrument currency.
+            currency: Instrument currency, if the history entry has it.
+            exchange_rate: Units of the instrument currency per unit of the account currency that the order filled
+                at, if the history entry has it.
+
+        Returns:
+            The price and its currency, which stays the instrument currency when no rate is known.
+        """
+        if exchange_rate:
+            if currency and currency != self.currency:
+                self.fx_rates.update(self.currency, currency, exchange_rate)
+            return price / exchange_rate, self.currency
+
+        # Entries of orders in the account currency have no exchange rate.
+        if not currency or currency == self.currency:
+            return price, self.currency
+
+        converted = self.fx_rates.convert(price, currency, self.currency, allow_stale=True)
+        if converted is None:
+            return price, currency
+        return converted, self.currency
+
     @enforce_auth
+    def _get_summary(self) -> Dict:
+        """Fetches the account summary, updating the known open orders and the pre-trade checks with it.
+
+        Returns:
+            Summary data.
+        """
+        requested_at = time.monotonic()
+        response = decode(self._request("POST", ACCOUNT_SUMMARY_URL_SERVICES, json=[]))
+        self.order_handler.observe_summary(response)
+        self.pretrade.observe_summary(response, requested_at)
+        return response
+
+    @traced
     def get_account_details(self) -> Dict:
         """Get the value of assets in account."""
-        response = self.session.post(ACCOUNT_SUMMARY_URL_SERVICES, json=[]).json()
+        response = self._get_summary()
         details = {
             "cash": response.get("cash").get("freeForStocks"),
             "total": response.get("cash").get("total")
@@ -295,6 +728,7 @@ class tradingTOT:
 
         return details
 
+    @traced
     def get_position(self, ticker: str) -> Optional[Dict]:
         """Get the position of ticker."""
         positions = self.get_positions({ticker})
@@ -303,22 +737,66 @@ class tradingTOT:
         else:
             return None
 
-    @enforce_auth
-    def get_positions(self, tickers: Set[str]) -> List[Dict]:
-        """Get position data from all tickers."""
-        response = self.session.post(ACCOUNT_SUMMARY_URL_SERVICES, json=[]).json()
+    @traced
+    def get_positions(self, tickers: Optional[Set[str]] = None) -> List[Dict]:
+        """Get position data from all tickers, or from every open position if no tickers are given.
+
+        Positions in resolved instruments get `accountCurrencyPrice`, their current price converted to the account
+        currency with the cached exchange rate, when that rate is fresh.
+        """
+        response = self._get_summary()
         SummarySchema.model_validate(response)
         positions = []
 
         for position in response.get("open", {}).get("items", []):
             ticker = position["code"].split("_", 1)[0]
-            if ticker in tickers:
-                Position.model_validate(position)
+            if tickers is None or ticker in tickers:
+                currency = self.cost_estimator.currencies.get(position["code"])
+                if currency and position.get("currentPrice") is not None:
+                    price = self.fx_rates.convert(position["currentPrice"], currency, self.currency)
+                    if price is not None:
+                        position["accountCurrencyPrice"] = price
                 positions.append(position)
 
         return positions
 
-    # TODO: Create a function to make any call to any trading212 url for experts.
+    @traced
+    def get_portfolio_snapshot(self) -> PortfolioSnapshot:
+        """Get all open positions as columnar arrays for vectorized analytics."""
+        response = self._get_summary()
+        return PortfolioSnapshot.from_summary(response)
+
+    @traced
+    @enforce_auth
+    def request(self, method: str, url: str, **kwargs) -> Response:
+        """Makes any call to any Trading212 url with the authenticated session, through the client middleware.
+
+        Args:
+            method: HTTP method.
+            url: Full url, e.g. one of the `endpoints` urls.
+            kwargs: Other arguments of `requests.Session.request`, e.g. `json` or `params`.
+
+        Returns:
+            The response, which `utils.decoding.decode` decodes.
+        """
+        return self._request(method, url, **kwargs)
+
+    def _request(self, method: str, url: str, **kwargs) -> Response:
+        """Sends a request through the middleware, for methods that already enforce auth."""
+        return self.middleware.send(self.session, method, url, **kwargs)
+
+    def account_events(self, interval: float = 5.0, **kwargs) -> AccountEventStream:
+        """Stream of the changes to cash, positions and orders, from one summary fetch every `interval` seconds.
+
+        Args:
+            interval: Seconds between summary fetches.
+            kwargs: Other arguments of `events.AccountEventStream`.
+
+        Returns:
+            The stream, which polls once it is started or used as a context manager.
+        """
+        return AccountEventStream(self, interval, **kwargs)
+
     # TODO: Add logging of results make to each api call.
     # TODO: Allow enforce auth take in a custom Driver.
     # TODO: Use LLMs to make model changes during schema changes.
\ No newline at end of file
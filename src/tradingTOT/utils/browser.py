@@ -3,11 +3,13 @@ from __future__ import annotations
 import logging
 import os
 import re
+import time
 from datetime import datetime
 from dataclasses import dataclass
 from pathlib import Path
 from functools import wraps
-from typing import Dict, Callable, Union, Optional, Type
+from threading import Event, Lock, RLock, Thread
+from typing import Dict, Callable, List, Union, Optional, Type
 
 import requests
 from requests.exceptions import ConnectionError
@@ -26,14 +28,20 @@ from tenacity import retry, stop_after_attempt
 from tradingTOT.enums import Environment
 from tradingTOT.exceptions import AuthError
 from tradingTOT.endpoints import HOME_URL, AUTHENTICATE_URL
-from tradingTOT.utils.storage import AuthData, LocalAuthStorage, ShotPath, LocalShotStorage
+from tradingTOT.sequencing import account_key
+from tradingTOT.utils.storage import (AuthData, LocalAuthStorage, ShotPath, LocalShotStorage,
+                                      DEFAULT_PROFILES_DIRECTORY)
 from tradingTOT.utils.pathfinder import find_path, Browser
+from tradingTOT.utils.tracing import span
 
 
 # TODO: Silence the INFO logs that show when using Edge browser.
 logger: Final = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Serializes logins across every thread of the process, as they share the driver and the local auth storage.
+AUTH_LOCK = RLock()
+
 @dataclass
 class DriverClassPack:
     driver: Type[RemoteWebDriver] = webdriver.Chrome
@@ -49,24 +57,129 @@ class DriverClassPack:
             return DriverClassPack()
 
 
+def profile_directory(account: Optional[str] = None) -> Optional[Path]:
+    """Browser profile directory of an account, kept across runs so the browser stays logged in.
+
+    Each account has a second "<account>-standby" profile for when another browser holds the first, as the
+    `StandbyDriver` browser does while the main one runs. The two browsers swap profiles when the standby one is taken.
+
+    Args:
+        account: Account key. Defaults to the account of `TRADINGTOT_EMAIL` and `TRADINGTOT_ENVIRONMENT`.
+
+    Returns:
+        The directory, or None if `TRADINGTOT_BROWSER_PROFILE` turns profiles off or other browsers are using both.
+    """
+    if os.environ.get("TRADINGTOT_BROWSER_PROFILE", "on").lower() in {"0", "false", "off"}:
+        return None
+
+    account = account or account_key()
+    for path in (DEFAULT_PROFILES_DIRECTORY / account, DEFAULT_PROFILES_DIRECTORY / f"{account}-standby"):
+        if not _profile_in_use(path):
+            return path
+    logger.info(f"The browser profiles of {account} are in use by other browsers, starting without one.")
+    return None
+
+
+def _profile_in_use(path: Path) -> bool:
+    # Chromium browsers hold a profile with a `SingletonLock` symlink to "<hostname>-<pid>".
+    try:
+        owner = os.readlink(path / "SingletonLock")
+    except OSError:
+        return False
+
+    try:
+        os.kill(int(owner.rsplit("-", 1)[-1]), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class LoginTimings:
+    """Durations of Selenium logins, which are warm when the browser profile was still logged in and cold when they
+    went through the login form."""
+    def __init__(self) -> None:
+        self.durations: Dict[str, List[float]] = {"cold": [], "warm": []}
+
+    def record(self, kind: str, seconds: float) -> None:
+        self.durations[kind].append(seconds)
+        logger.info(f"{kind.capitalize()} login took {seconds:.1f}s.")
+
+    def summary(self) -> Dict[str, Dict]:
+        """Count, mean and maximum duration in seconds of each kind of login."""
+        return {
+            kind: {"count": len(durations),
+                   "mean": sum(durations) / len(durations) if durations else None,
+                   "max": max(durations, default=None)}
+            for kind, durations in self.durations.items()
+        }
+
+
+login_timings = LoginTimings()
+
+
+def is_alive(driver: RemoteWebDriver) -> bool:
+    """Checks whether the browser of a driver still responds."""
+    try:
+        driver.execute_script("return 1;")
+        return True
+    except WebDriverException:
+        return False
+
+
+def quit_driver(driver: Optional[RemoteWebDriver]) -> None:
+    """Quits a driver, ignoring browsers that are already gone."""
+    if isinstance(driver, RemoteWebDriver):
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+
 class Driver:
     driver = None
+    # Optional `StandbyDriver` that hands over an already launched browser when one is needed.
+    standby: Optional[StandbyDriver] = None
+    # Monotonic times of the launch or hand over of the driver and of its latest use.
+    started_at: Optional[float] = None
+    used_at: Optional[float] = None
 
     @classmethod
     def load(cls, force_new=False) -> WebDriver:
         """Create a headless driver with needed properties to load Trading212.
 
+        The driver is reused across calls while its browser responds. A new one is taken from `standby` when it has
+        one ready, and launched otherwise.
+
         Returns:
             Selenium Webdriver
         """
-        if force_new:
-            if isinstance(cls.driver, WebDriver):
-                cls.driver.quit()
-                cls.driver = None
+        if cls.driver and (force_new or not is_alive(cls.driver)):
+            cls.quit()
 
+        cls.used_at = time.monotonic()
         if cls.driver:
             return cls.driver
 
+        driver = cls.standby.take() if cls.standby else None
+        cls.driver = driver or cls.launch()
+        cls.started_at = cls.used_at = time.monotonic()
+        return cls.driver
+
+    @classmethod
+    def quit(cls) -> None:
+        """Quits the shared driver. The next `load` starts a new one."""
+        driver, cls.driver, cls.started_at = cls.driver, None, None
+        quit_driver(driver)
+
+    @staticmethod
+    def launch() -> WebDriver:
+        """Launch a new headless browser with needed properties to load Trading212.
+
+        Returns:
+            Selenium Webdriver
+        """
         # export CHROME_VERSION="114.0.5735.90" && wget --no-verbose -O /tmp/chrome.deb https://dl.google.com/linux/chrome/deb/pool/main/g/google-chrome-stable/google-chrome-stable_${CHROME_VERSION}-1_amd64.deb && apt install -y /tmp/chrome.deb && rm /tmp/chrome.deb
         binary_location = os.environ.get("BINARY_PATH")
         if not binary_location:
@@ -93,6 +206,10 @@ class Driver:
         options.add_argument("--disable-extensions")
         options.add_argument("--headless")
 
+        profile = profile_directory() if class_pack.driver in (webdriver.Chrome, webdriver.Edge) else None
+        if profile:
+            options.add_argument(f"--user-data-dir={profile}")
+
         if hasattr(options, "add_experimental_option"):
             options.add_experimental_option("excludeSwitches", ["enable-automation"])
             options.add_experimental_option('useAutomationExtension', False)
@@ -106,10 +223,101 @@ class Driver:
                 fix_hairline=True,
             )
 
-        cls.driver = driver
         return driver
 
 
+class StandbyDriver:
+    """Keeps a spare browser launched in the background, parked on the home page with the cookies accepted.
+
+    `Driver.load` takes it instead of launching a browser when it needs a new one, so the launch is off the login
+    path. The spare browser is health-checked every `check_interval` seconds and replaced after it is taken or stops
+    responding.
+
+    Example:
+        Driver.standby = StandbyDriver().start()
+    """
+    def __init__(self, check_interval: float = 30.0) -> None:
+        self.check_interval = check_interval
+        self.driver: Optional[WebDriver] = None
+        self.launches = 0
+        self.lock = Lock()
+        self.wanted = Event()
+        self.stopped = Event()
+        self.thread: Optional[Thread] = None
+
+    @staticmethod
+    def _park(driver: WebDriver) -> WebDriver:
+        driver.get(HOME_URL)
+        try:
+            accept_cookies(driver)
+        except AuthError:
+            # The cookies banner is missing when the browser profile is still logged in.
+            pass
+        return driver
+
+    def replenish(self) -> None:
+        """Replaces the spare browser if it is missing or no longer responds."""
+        with self.lock:
+            driver = self.driver
+        if driver is not None and is_alive(driver):
+            return
+
+        quit_driver(driver)
+        driver = self._park(Driver.launch())
+        self.launches += 1
+        with self.lock:
+            if self.stopped.is_set() or self.driver is not None:
+                quit_driver(driver)
+            else:
+                self.driver = driver
+
+    def take(self) -> Optional[WebDriver]:
+        """Hands over the spare browser if it is ready and responds.
+
+        Returns:
+            The driver, or None if there is no ready one.
+        """
+        with self.lock:
+            driver, self.driver = self.driver, None
+        self.wanted.set()
+        if driver is not None and not is_alive(driver):
+            quit_driver(driver)
+            return None
+        return driver
+
+    def _run(self) -> None:
+        while not self.stopped.is_set():
+            self.wanted.clear()
+            try:
+                self.replenish()
+            except Exception:
+                logger.exception("Failed to launch the standby browser.")
+            self.wanted.wait(self.check_interval)
+
+    def start(self) -> StandbyDriver:
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = Thread(target=self._run, name="tradingTOT-standby-driver", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.wanted.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        with self.lock:
+            driver, self.driver = self.driver, None
+        quit_driver(driver)
+
+    def __enter__(self) -> StandbyDriver:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
 def accept_cookies(driver: WebDriver) -> None:
     """Click on the accept cookies button in the page loaded by the driver.
 
@@ -152,6 +360,7 @@ def login_tradingTOT(driver: WebDriver, email: str, password: str) -> WebDriver:
         Selenium Webdriver
     """
     shot_storage = LocalShotStorage(datetime.now().strftime("%m-%d-%Y_%H-%M-%S"))
+    start = time.perf_counter()
 
     retries = 3
     while retries:
@@ -169,10 +378,15 @@ def login_tradingTOT(driver: WebDriver, email: str, password: str) -> WebDriver:
     env_pattern = "|".join([e for e in Environment])
     if re.search(env_pattern, driver.current_url):
         print("Already logged in.")
+        login_timings.record("warm", time.perf_counter() - start)
         return driver
 
     shot_storage.write(driver, ShotPath.ACCEPT_COOKIES)
-    accept_cookies(driver)
+    try:
+        accept_cookies(driver)
+    except AuthError:
+        shot_storage.write(driver, ShotPath.ACCEPT_COOKIES, failed=True)
+        raise
 
     actions = ActionChains(driver)
     login_link = driver.find_element(By.XPATH, "//p[starts-with(@class, 'Header_login-button')]")
@@ -190,9 +404,9 @@ def login_tradingTOT(driver: WebDriver, email: str, password: str) -> WebDriver:
             )
         )
     except TimeoutException as err:
+        shot_storage.write(driver, ShotPath.BEFORE_LOGIN, failed=True)
         raise AuthError(f"Email element not found using xpath: {email_xpath} after waiting {max_wait_time} seconds.") from err
-    finally:
-        shot_storage.write(driver, ShotPath.BEFORE_LOGIN)
+    shot_storage.write(driver, ShotPath.BEFORE_LOGIN)
 
     email_input = driver.find_element(By.XPATH, email_xpath)
     actions.move_to_element(email_input).click(email_input).send_keys(email).pause(0.1)
@@ -213,10 +427,11 @@ def login_tradingTOT(driver: WebDriver, email: str, password: str) -> WebDriver:
             )
         )
     except TimeoutException as err:
+        shot_storage.write(driver, ShotPath.AFTER_LOGIN, failed=True)
         raise AuthError(f"Trading dashboard failed to load in {max_wait_time} seconds.") from err
-    finally:
-        shot_storage.write(driver, ShotPath.AFTER_LOGIN)
+    shot_storage.write(driver, ShotPath.AFTER_LOGIN)
 
+    login_timings.record("cold", time.perf_counter() - start)
     return driver
 
 
@@ -304,57 +519,23 @@ def enforce_auth(func: Callable):
 
         instance = kwargs.get("self", args[0])
 
-        try:
-            auth_response = instance.session.get(AUTHENTICATE_URL)
-            is_auth = True if auth_response.status_code == 200 else False
-        except ConnectionError:
-            is_auth = False
-
-        # TODO: Make it possible to turn off LocalAuthStorage
-        # TODO: Log when localstorage is being used and when browser is being used.
-        local_auth_storage = LocalAuthStorage()
-
-        retries = 3
-        while not is_auth and retries:
-            retries -= 1
-
-            auth_data = local_auth_storage.read()
-            if auth_data is None:
-                driver = Driver.load()
-                driver = login_tradingTOT(driver, os.environ.get("TRADINGTOT_EMAIL"),
-                                          os.environ.get("TRADINGTOT_PASSWORD"))
-            else:
-                driver = None
-
+        session = instance.session
+        middleware = getattr(instance, "middleware", None)
+        with span("auth.check"):
+            is_auth = is_authenticated(session, middleware)
+        if not is_auth:
+            # Only one thread logs in at a time. The others wait here and reuse the session it created.
+            with span("auth.lock_wait"):
+                AUTH_LOCK.acquire()
             try:
-                headers = generate_headers(driver=driver, auth_data=auth_data)
-                auth_cookies = {'LOGIN_TOKEN': get_login_token(driver=driver, auth_data=auth_data)}
-            except AuthError as err:
-                if retries:
-                    continue
-                else:
-                    raise err
-
-            session = requests.Session()
-            session.headers.update(headers)
-            session.cookies.update(auth_cookies)
-
-            instance.session = session
-            auth_response = instance.session.get(AUTHENTICATE_URL)
-            is_auth = True if auth_response.status_code == 200 else False
-
-            if is_auth and auth_data is None:
-                auth_data = AuthData(
-                    DUUID=get_duuid(driver),
-                    UserAgent=headers["User-Agent"],
-                    LoginToken=auth_cookies["LOGIN_TOKEN"]
-                )
-                local_auth_storage.write(auth_data)
-            elif not is_auth and auth_data is not None:
-                local_auth_storage.delete()
-
-        if not is_auth and not retries:
-            raise AuthError("Failed to log in using Selenium.")
+                if instance.session is not session:
+                    with span("auth.check"):
+                        is_auth = is_authenticated(instance.session, middleware)
+                if not is_auth:
+                    with span("auth.login"):
+                        instance.session = login(instance)
+            finally:
+                AUTH_LOCK.release()
 
         if kwargs.get("self"):
             kwargs["self"] = instance
@@ -366,3 +547,79 @@ def enforce_auth(func: Callable):
         return func(*args, **kwargs)
 
     return wrapper
+
+
+def is_authenticated(session: requests.Session, middleware=None) -> bool:
+    """Checks whether the session is logged in to Trading212.
+
+    Args:
+        session: Session to check.
+        middleware: `middleware.MiddlewarePipeline` the check is sent through, if any.
+    """
+    try:
+        if middleware is not None:
+            auth_response = middleware.send(session, "GET", AUTHENTICATE_URL)
+        else:
+            auth_response = session.get(AUTHENTICATE_URL)
+        return auth_response.status_code == 200
+    except ConnectionError:
+        return False
+
+
+def login(instance) -> requests.Session:
+    """Creates an authenticated session from the stored auth data, or by logging in with Selenium.
+
+    The new session is only returned once it is authenticated, so it can replace the session of the instance in one
+    assignment while requests already made with the old session complete.
+
+    Args:
+        instance: The object whose session failed the authentication check.
+
+    Returns:
+        Authenticated session.
+    """
+    # TODO: Log when localstorage is being used and when browser is being used.
+    local_auth_storage = getattr(instance, "auth_storage", None) or LocalAuthStorage()
+
+    retries = 3
+    while retries:
+        retries -= 1
+
+        auth_data = local_auth_storage.read()
+        if auth_data is None:
+            with span("auth.selenium_login"):
+                driver = Driver.load()
+                driver = login_tradingTOT(driver, os.environ.get("TRADINGTOT_EMAIL"),
+                                          os.environ.get("TRADINGTOT_PASSWORD"))
+        else:
+            driver = None
+
+        try:
+            headers = generate_headers(driver=driver, auth_data=auth_data)
+            auth_cookies = {'LOGIN_TOKEN': get_login_token(driver=driver, auth_data=auth_data)}
+        except AuthError as err:
+            if retries:
+                continue
+            else:
+                raise err
+
+        session = getattr(instance, "session_factory", requests.Session)()
+        session.headers.update(headers)
+        session.cookies.update(auth_cookies)
+
+        with span("auth.check"):
+            is_auth = is_authenticated(session, getattr(instance, "middleware", None))
+        if is_auth and auth_data is None:
+            auth_data = AuthData(
+                DUUID=get_duuid(driver),
+                UserAgent=headers["User-Agent"],
+                LoginToken=auth_cookies["LOGIN_TOKEN"]
+            )
+            local_auth_storage.write(auth_data)
+        elif not is_auth and auth_data is not None:
+            local_auth_storage.delete()
+
+        if is_auth:
+            return session
+
+    raise AuthError("Failed to log in using Selenium.")
@@ -0,0 +1,74 @@
+import codecs
+import json
+from typing import Any, Callable, Union
+
+from requests.exceptions import JSONDecodeError
+from requests.models import Response
+from requests.utils import guess_json_utf
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Attribute of a response that holds its decoded body.
+DECODED_ATTRIBUTE = "_tradingTOT_decoded"
+
+_decoder: Callable[[Union[bytes, str]], Any] = orjson.loads if orjson else json.loads
+
+
+def set_decoder(decoder: Callable[[Union[bytes, str]], Any]) -> None:
+    """Replaces the function every response body is decoded with, e.g. `json.loads`.
+
+    Args:
+        decoder: Takes the raw body as bytes and returns the decoded object.
+    """
+    global _decoder
+    _decoder = decoder
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decodes JSON with orjson when it is installed, or with the configured decoder."""
+    return _decoder(data)
+
+
+def _body(response: Response) -> Union[bytes, str]:
+    # Like `Response.json`, bodies in another encoding than UTF-8 are decoded to text first.
+    content = response.content or b""
+    encoding = response.encoding or (guess_json_utf(content) if len(content) > 3 else None)
+    try:
+        if encoding is None or codecs.lookup(encoding).name == "utf-8":
+            return content
+        return content.decode(encoding)
+    except (LookupError, UnicodeDecodeError):
+        return response.text
+
+
+def decode(response: Union[Response, Any]) -> Any:
+    """Decodes the JSON body of a response once, returning the same object on later calls.
+
+    Args:
+        response: Response, or an already decoded body, which is returned as is.
+
+    Returns:
+        The decoded body.
+
+    Raises:
+        requests.exceptions.JSONDecodeError: If the body is empty or not JSON, as with `Response.json`.
+    """
+    if not isinstance(response, Response):
+        return response
+
+    decoded = getattr(response, DECODED_ATTRIBUTE, response)
+    if decoded is response:
+        body = _body(response)
+        try:
+            decoded = loads(body)
+        except ValueError as err:
+            # orjson's and json's errors are both ValueErrors, and json's carry the position of the error.
+            if isinstance(err, json.JSONDecodeError):
+                raise JSONDecodeError(err.msg, err.doc, err.pos) from err
+            raise JSONDecodeError(str(err), body if isinstance(body, str) else "", 0) from err
+        setattr(response, DECODED_ATTRIBUTE, decoded)
+    return decoded
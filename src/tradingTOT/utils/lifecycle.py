@@ -0,0 +1,159 @@
+import logging
+import os
+import time
+from pathlib import Path
+from threading import Event, Thread
+from typing import Dict, Optional
+
+from tradingTOT.utils.browser import AUTH_LOCK, Driver
+
+
+logger = logging.getLogger(__name__)
+
+PROC_DIRECTORY = Path("/proc")
+
+
+def process_tree_rss(pid: int, proc_dir: Path = PROC_DIRECTORY) -> Optional[int]:
+    """Resident memory of a process and all of its descendants, read from `/proc`.
+
+    Args:
+        pid: Root process id, e.g. of the webdriver, whose descendants are the browser processes.
+        proc_dir: Mount point of procfs.
+
+    Returns:
+        Resident memory in bytes, or None where `/proc` is unavailable.
+    """
+    if not (proc_dir / str(pid)).exists():
+        return None
+
+    children: Dict[int, list] = {}
+    for entry in proc_dir.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # The process name is in parentheses and may contain spaces, the parent id is the second field after it.
+        parent = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(parent, []).append(int(entry.name))
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    rss = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            rss += int((proc_dir / str(current) / "statm").read_text().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return rss
+
+
+def driver_pid(driver) -> Optional[int]:
+    """Process id of the webdriver executable that launched the browser."""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return getattr(process, "pid", None)
+
+
+class DriverLifecycle:
+    """Quits the shared `browser.Driver` while it is not needed, so long-running processes do not hold an idle
+    browser.
+
+    The browser is quit once it has not been loaded for `idle_timeout` seconds or once it and its child processes
+    use more than `max_rss` bytes of resident memory. The next login launches a new one through `Driver.load`. A
+    browser is never quit while a login holds it. Memory is read from `/proc`, so the memory cap only applies on
+    Linux and a warning is logged once where it cannot be read.
+
+    Example:
+        lifecycle = DriverLifecycle(idle_timeout=600, max_rss=500 * 1024 ** 2).start()
+        print(lifecycle.stats())
+    """
+    def __init__(self, idle_timeout: Optional[float] = 600, max_rss: Optional[int] = None,
+                 check_interval: float = 30.0) -> None:
+        """
+        Args:
+            idle_timeout: Seconds without a `Driver.load` after which the browser is quit. Never if None.
+            max_rss: Resident memory in bytes above which the browser is quit. Never if None. Linux only.
+            check_interval: Seconds between checks of the background thread.
+        """
+        self.idle_timeout = idle_timeout
+        self.max_rss = max_rss
+        self.check_interval = check_interval
+        self.reclaimed: Dict[str, int] = {"idle": 0, "memory": 0}
+        self.rss_warned = False
+        self.stopped = Event()
+        self.thread: Optional[Thread] = None
+
+    def stats(self) -> Dict:
+        """Whether the browser is running, its uptime and idle time in seconds, and its resident memory in bytes."""
+        driver = Driver.driver
+        if driver is None:
+            return {"running": False, "uptime": None, "idle": None, "rss": None, "reclaimed": dict(self.reclaimed)}
+
+        now = time.monotonic()
+        pid = driver_pid(driver)
+        return {
+            "running": True,
+            "uptime": now - Driver.started_at if Driver.started_at else None,
+            "idle": now - Driver.used_at if Driver.used_at else None,
+            "rss": process_tree_rss(pid) if pid else None,
+            "reclaimed": dict(self.reclaimed),
+        }
+
+    def check(self) -> Optional[str]:
+        """Quits the browser if it is idle or above the memory cap.
+
+        Returns:
+            The reason it was quit, "idle" or "memory", or None if it was kept.
+        """
+        # A login in progress holds the lock and the browser, so it is checked again later.
+        if Driver.driver is None or not AUTH_LOCK.acquire(blocking=False):
+            return None
+        try:
+            stats = self.stats()
+            reason = None
+            if self.idle_timeout is not None and stats["idle"] is not None and stats["idle"] > self.idle_timeout:
+                reason = "idle"
+            elif self.max_rss is not None and stats["rss"] is not None and stats["rss"] > self.max_rss:
+                reason = "memory"
+            elif self.max_rss is not None and stats["rss"] is None and not self.rss_warned:
+                self.rss_warned = True
+                logger.warning("The browser memory cannot be read on this platform, so `max_rss` is not enforced. "
+                               "The memory cap needs Linux's /proc.")
+
+            if reason:
+                logger.info(f"Quitting the browser after {stats['uptime'] or 0:.0f}s for being over the {reason} "
+                            f"limit, using {(stats['rss'] or 0) / 1024 ** 2:.0f}MB.")
+                Driver.quit()
+                self.reclaimed[reason] += 1
+            return reason
+        finally:
+            AUTH_LOCK.release()
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Browser lifecycle check failed.")
+
+    def start(self) -> "DriverLifecycle":
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = Thread(target=self._run, name="tradingTOT-driver-lifecycle", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self) -> "DriverLifecycle":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
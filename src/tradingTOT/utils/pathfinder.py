@@ -1,5 +1,7 @@
 import os
 import platform
+import plistlib
+import re
 import subprocess
 
 from abc import ABC, abstractmethod
@@ -7,6 +9,8 @@ from enum import Enum
 from pathlib import Path
 from typing import Optional, List
 
+from tradingTOT.utils.storage import BinaryData, LocalBinaryStorage
+
 
 class Browser(str, Enum):
     chrome = "chrome"
@@ -177,7 +181,60 @@ class MacPathfinder(Pathfinder):
         return path
 
 
-def find_path() -> Optional[Path]:
+def browser_version(path: Path) -> Optional[str]:
+    """Gets the version of a browser binary, or None if it cannot be read."""
+    path = Path(path)
+    try:
+        if path.suffix == ".app":
+            with open(path / "Contents" / "Info.plist", "rb") as handler:
+                return plistlib.load(handler).get("CFBundleShortVersionString")
+        if platform.system() == "Windows":
+            # Chromium browsers keep their files in a directory named after the version next to the binary.
+            versions = [p.name for p in path.parent.iterdir() if p.is_dir() and re.fullmatch(r"[\d.]+", p.name)]
+            return max(versions, key=lambda v: tuple(map(int, v.split("."))), default=None)
+        output = subprocess.check_output([str(path), "--version"], timeout=10).decode()
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+    match = re.search(r"\d+(\.\d+)+", output)
+    return match.group(0) if match else None
+
+
+def cached_binary(storage: Optional[LocalBinaryStorage] = None) -> Optional[BinaryData]:
+    """The browser binary found by an earlier `find_path`, if it is still unchanged."""
+    data = (storage or LocalBinaryStorage()).read()
+    return data if data and data.is_current() else None
+
+
+def find_path(use_cache: bool = True, storage: Optional[LocalBinaryStorage] = None) -> Optional[Path]:
+    """Finds the binary of an installed browser.
+
+    The binary found is kept with its version under `~/.TOT/browser`, and is reused by later calls in any process
+    while it has the same size and modification time.
+
+    Args:
+        use_cache: Reuse the binary found by an earlier call.
+        storage: Where the binary found is kept.
+
+    Returns:
+        Path of the binary, or None if no browser was found.
+    """
+    storage = storage or LocalBinaryStorage()
+    if use_cache:
+        cached = cached_binary(storage)
+        if cached:
+            return Path(cached.path)
+
+    path = _discover_path()
+    if path:
+        try:
+            storage.write(BinaryData.from_path(path, browser_version(path)))
+        except OSError as e:
+            print(e)
+    return path
+
+
+def _discover_path() -> Optional[Path]:
     os_name = platform.system()
     if os_name == "Darwin":
         finder = MacPathfinder()
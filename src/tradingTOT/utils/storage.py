@@ -1,7 +1,12 @@
 from abc import ABC, abstractmethod
 from enum import Enum
 
+import base64
 import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from os.path import expanduser
 from typing import Optional
 from pathlib import Path
@@ -10,6 +15,13 @@ from dataclasses import dataclass
 
 DEFAULT_AUTH_DIRECTORY = Path(expanduser("~/.TOT/auth"))
 DEFAULT_SCREENSHOTS_DIRECTORY = Path(expanduser("~/.TOT/shots"))
+DEFAULT_CANDLES_DIRECTORY = Path(expanduser("~/.TOT/candles"))
+DEFAULT_INSTRUMENTS_DIRECTORY = Path(expanduser("~/.TOT/instruments"))
+DEFAULT_LOCKS_DIRECTORY = Path(expanduser("~/.TOT/locks"))
+DEFAULT_CLAIMS_DIRECTORY = Path(expanduser("~/.TOT/claims"))
+DEFAULT_SNAPSHOTS_DIRECTORY = Path(expanduser("~/.TOT/snapshots"))
+DEFAULT_PROFILES_DIRECTORY = Path(expanduser("~/.TOT/profiles"))
+DEFAULT_BROWSER_DIRECTORY = Path(expanduser("~/.TOT/browser"))
 
 
 @dataclass
@@ -20,6 +32,27 @@ class AuthData:
                                 "Chrome/102.0.5005.63 Safari/537.36")
 
 
+@dataclass
+class BinaryData:
+    path: str
+    version: Optional[str]
+    size: int
+    mtime_ns: int
+
+    @classmethod
+    def from_path(cls, path: Path, version: Optional[str] = None) -> "BinaryData":
+        stat = os.stat(path)
+        return cls(path=str(path), version=version, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+    def is_current(self) -> bool:
+        """Whether the binary is still where it was found, unchanged."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+
 class ShotPath(str, Enum):
     ACCEPT_COOKIES = "accept_cookies.png",
     AFTER_LOGIN = "after_login.png",
@@ -36,24 +69,99 @@ class Storage(ABC):
         pass
 
 
+class ShotPolicy(str, Enum):
+    OFF = "off"
+    ON_FAILURE = "on_failure"
+    ALWAYS = "always"
+
+
+@dataclass
+class ShotSettings:
+    policy: ShotPolicy = ShotPolicy.ON_FAILURE
+    # Fraction of the window size the screenshots are captured at.
+    scale: float = 0.5
+    # Number of login screenshot directories kept.
+    max_count: int = 20
+    max_age_days: float = 7
+
+    @classmethod
+    def from_env(cls) -> "ShotSettings":
+        """Reads `TRADINGTOT_SCREENSHOTS` (off, on_failure or always), `TRADINGTOT_SCREENSHOT_SCALE`,
+        `TRADINGTOT_SCREENSHOT_MAX_COUNT` and `TRADINGTOT_SCREENSHOT_MAX_AGE_DAYS`."""
+        return cls(
+            policy=ShotPolicy(os.environ.get("TRADINGTOT_SCREENSHOTS", cls.policy.value)),
+            scale=float(os.environ.get("TRADINGTOT_SCREENSHOT_SCALE", cls.scale)),
+            max_count=int(os.environ.get("TRADINGTOT_SCREENSHOT_MAX_COUNT", cls.max_count)),
+            max_age_days=float(os.environ.get("TRADINGTOT_SCREENSHOT_MAX_AGE_DAYS", cls.max_age_days)),
+        )
+
+
+# Screenshots are encoded and written off the login path, one at a time.
+_shot_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tradingTOT-shots")
+
+
 class LocalShotStorage(Storage):
-    def __init__(self, index, shots_dir: Path = DEFAULT_SCREENSHOTS_DIRECTORY) -> None:
+    def __init__(self, index, shots_dir: Path = DEFAULT_SCREENSHOTS_DIRECTORY,
+                 settings: Optional[ShotSettings] = None) -> None:
+        self.shots_dir = shots_dir
         self.dir = shots_dir / index
-        self.dir.mkdir(parents=True, exist_ok=True)
+        self.settings = settings or ShotSettings.from_env()
 
     def read(self):
         raise NotImplementedError("Reading of images not supported.")
 
-    def write(self, driver, type_: ShotPath):
+    def write(self, driver, type_: ShotPath, failed: bool = False):
+        """Captures a screenshot if the policy asks for it and saves it in the background.
+
+        Args:
+            driver: Selenium Webdriver
+            type_: Login step of the screenshot.
+            failed: Whether the step failed. Failure screenshots are prefixed with `failed_`.
+        """
         if not isinstance(type_, ShotPath):
             raise ValueError(f"The type: {type_} is not supported.")
-        driver.save_screenshot(Path(self.dir, type_.value))
+
+        policy = self.settings.policy
+        if policy == ShotPolicy.OFF or (policy == ShotPolicy.ON_FAILURE and not failed):
+            return None
+
+        data = self._capture(driver)
+        path = Path(self.dir, f"failed_{type_.value}" if failed else type_.value)
+        return _shot_writer.submit(self._save, path, data)
+
+    def _capture(self, driver) -> bytes:
+        scale = self.settings.scale
+        # Chromium browsers can scale the capture down themselves, which is faster than a full size capture.
+        if scale != 1 and hasattr(driver, "execute_cdp_cmd"):
+            width, height = driver.execute_script("return [window.innerWidth, window.innerHeight];")
+            clip = {"x": 0, "y": 0, "width": width, "height": height, "scale": scale}
+            response = driver.execute_cdp_cmd("Page.captureScreenshot", {"format": "png", "clip": clip})
+            return base64.b64decode(response["data"])
+        return driver.get_screenshot_as_png()
+
+    def _save(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        self.prune()
+
+    def prune(self) -> None:
+        """Deletes the login screenshot directories beyond `max_count` or older than `max_age_days`."""
+        if not self.shots_dir.exists():
+            return
+
+        dirs = sorted((path for path in self.shots_dir.iterdir() if path.is_dir()),
+                      key=lambda path: path.stat().st_mtime, reverse=True)
+        oldest = time.time() - self.settings.max_age_days * 24 * 60 * 60
+        for i, path in enumerate(dirs):
+            if path != self.dir and (i >= self.settings.max_count or path.stat().st_mtime < oldest):
+                shutil.rmtree(path, ignore_errors=True)
 
     def delete(self):
         for enum, shot_path in ShotPath.__members__.items():
-            path = Path(self.dir, shot_path.value)
-            if path.exists():
-                path.unlink()
+            for name in (shot_path.value, f"failed_{shot_path.value}"):
+                path = Path(self.dir, name)
+                if path.exists():
+                    path.unlink()
 
 
 class LocalAuthStorage(Storage):
@@ -80,3 +188,32 @@ class LocalAuthStorage(Storage):
 
     def delete(self):
         self.file_path.unlink()
+
+
+class LocalBinaryStorage(Storage):
+    def __init__(self, browser_dir: Path = DEFAULT_BROWSER_DIRECTORY) -> None:
+        self.dir = browser_dir
+        self.file_path = Path(self.dir) / "binary.json"
+
+    def read(self) -> Optional[BinaryData]:
+        if not self.file_path.exists():
+            return None
+
+        try:
+            with open(self.file_path) as handler:
+                data = json.load(handler)
+            expected_keys = set(BinaryData.__annotations__.keys())
+            return BinaryData(**{k: v for k, v in data.items() if k in expected_keys})
+        except (ValueError, TypeError):
+            return None
+
+    def write(self, data: BinaryData) -> Path:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with open(self.file_path, "w") as handler:
+            json.dump(data.__dict__, handler)
+
+        return self.file_path
+
+    def delete(self):
+        if self.file_path.exists():
+            self.file_path.unlink()
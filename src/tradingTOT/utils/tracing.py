@@ -0,0 +1,169 @@
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Union
+
+
+class _Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "end", "attributes", "error", "spans")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], spans: List["_Span"], attributes: Dict):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = attributes
+        self.error = None
+        self.spans = spans
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+# Spans of a trace that is not sampled are not recorded, but still mark the trace as unsampled for nested spans.
+_UNSAMPLED = object()
+_current_span: ContextVar[Union[_Span, object, None]] = ContextVar("tradingTOT_span", default=None)
+
+
+def _otlp_attribute(key: str, value) -> Dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class Tracer:
+    """Records nested spans of client operations and appends them to a file in the OTLP JSON format.
+
+    Every sampled trace is written as one line holding an OTLP `ExportTraceServiceRequest` once its root span ends.
+    Tracing is off unless a file is configured, in which case unsampled traces only cost a context variable lookup.
+    """
+    def __init__(self, path: Optional[Union[Path, str]] = None, sample_rate: float = 1.0,
+                 service_name: str = "tradingTOT") -> None:
+        self.path = Path(path) if path else None
+        self.sample_rate = sample_rate
+        self.service_name = service_name
+        self.lock = Lock()
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """Configures tracing from `TRADINGTOT_TRACE_FILE` and `TRADINGTOT_TRACE_SAMPLE_RATE`."""
+        return cls(os.environ.get("TRADINGTOT_TRACE_FILE") or None,
+                   float(os.environ.get("TRADINGTOT_TRACE_SAMPLE_RATE", 1.0)))
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Records a span around the block, nested in the current span if there is one.
+
+        Yields:
+            The span, or None if the trace is not recorded.
+        """
+        parent = _current_span.get()
+        if not self.enabled or parent is _UNSAMPLED:
+            yield None
+            return
+
+        if parent is None:
+            if random.random() >= self.sample_rate:
+                token = _current_span.set(_UNSAMPLED)
+                try:
+                    yield None
+                finally:
+                    _current_span.reset(token)
+                return
+            span = _Span(name, f"{random.getrandbits(128):032x}", None, [], attributes)
+        else:
+            span = _Span(name, parent.trace_id, parent.span_id, parent.spans, attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as err:
+            span.error = f"{type(err).__name__}: {err}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end = time.time_ns()
+            span.spans.append(span)
+            if parent is None:
+                self.export(span.spans)
+
+    def export(self, spans: List[_Span]) -> None:
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+            "scopeSpans": [{"scope": {"name": "tradingTOT"}, "spans": [span.to_otlp() for span in spans]}],
+        }]}
+        line = json.dumps(request)
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as handler:
+                handler.write(line + "\n")
+
+
+tracer = Tracer.from_env()
+
+
+def configure(path: Optional[Union[Path, str]], sample_rate: float = 1.0) -> Tracer:
+    """Turns tracing on, or off if `path` is None, for the whole process.
+
+    Args:
+        path: File the traces are appended to.
+        sample_rate: Fraction of traces to record.
+
+    Returns:
+        The tracer.
+    """
+    tracer.path = Path(path) if path else None
+    tracer.sample_rate = sample_rate
+    return tracer
+
+
+def span(name: str, **attributes):
+    return tracer.span(name, **attributes)
+
+
+def traced(func: Optional[Callable] = None, *, name: Optional[str] = None):
+    """Decorator that records a span around each call, named after the function by default."""
+    def decorator(func: Callable):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator(func) if func else decorator
@@ -5,6 +5,7 @@ from selenium.common.exceptions import WebDriverException
 
 from dotenv import load_dotenv
 
+from tradingTOT.loadtest import LoadTest, LoadTestConfig
 from tradingTOT.utils import browser
 
 
@@ -15,6 +16,17 @@ def test_env():
     load_dotenv(test_folder / env_name)
 
 
+@fixture
+def load_test():
+    """Load test with an instant stand-in server, for unit tests of the client."""
+    return LoadTest(LoadTestConfig(latency=0, login_latency=0, token_ttl=None, seed=0))
+
+
+@fixture
+def client(load_test):
+    return load_test.client()
+
+
 @fixture(scope="session")
 def driver():
     driver = browser.Driver.load()
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from tradingTOT.analytics import PortfolioSnapshot
+
+
+POSITIONS = [
+    {"code": "MSFT_US_EQ", "quantity": 2.0, "currentPrice": 400.0, "averagePrice": 350.0,
+     "ppl": 80.0, "fxPpl": -2.0, "value": 640.0, "investment": 560.0},
+    {"code": "AAPL_US_EQ", "quantity": 4.0, "currentPrice": 200.0, "averagePrice": 210.0,
+     "ppl": -32.0, "fxPpl": 1.0, "value": 640.0, "investment": 672.0},
+]
+
+
+def test_snapshot_metrics():
+    snapshot = PortfolioSnapshot.from_positions(POSITIONS, cash=320.0)
+
+    assert list(snapshot.tickers) == ["MSFT", "AAPL"]
+    np.testing.assert_allclose(snapshot.exposure(), [800.0, 800.0])
+    np.testing.assert_allclose(snapshot.weights(), [0.5, 0.5])
+    np.testing.assert_allclose(snapshot.weights(include_cash=True), [0.4, 0.4])
+    assert snapshot.concentration() == pytest.approx(0.5)
+    assert snapshot.totals()["ppl"] == pytest.approx(48.0)
+
+
+def test_rebalance_deltas():
+    snapshot = PortfolioSnapshot.from_positions(POSITIONS)
+
+    deltas = snapshot.rebalance_deltas({"MSFT": 0.75, "AAPL_US_EQ": 0.25})
+    np.testing.assert_allclose(deltas["value"], [320.0, -320.0])
+    np.testing.assert_allclose(deltas["quantity"], [1.0, -2.0])
+
+    with pytest.raises(ValueError):
+        snapshot.rebalance_deltas({"TSLA": 1.0})
+
+
+def test_empty_snapshot():
+    snapshot = PortfolioSnapshot.from_positions([])
+
+    assert len(snapshot) == 0
+    assert snapshot.concentration() == 0.0
@@ -0,0 +1,109 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from tradingTOT.utils import browser
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeSession:
+    def __init__(self, valid):
+        self.valid = valid
+
+    def get(self, url):
+        return FakeResponse(200 if self.valid else 401)
+
+
+class Client:
+    def __init__(self):
+        self.session = FakeSession(valid=False)
+
+    @browser.enforce_auth
+    def call(self):
+        return self.session
+
+
+def test_relogin_is_single_flight():
+    logins = []
+
+    def login(instance):
+        logins.append(instance)
+        time.sleep(0.05)
+        return FakeSession(valid=True)
+
+    client = Client()
+    with patch.object(browser, "login", side_effect=login):
+        with ThreadPoolExecutor(8) as executor:
+            sessions = list(executor.map(lambda _: client.call(), range(8)))
+
+    assert len(logins) == 1
+    assert all(session is sessions[0] and session.valid for session in sessions)
+
+
+def test_profile_directory_falls_back_to_the_standby_profile(tmp_path, monkeypatch):
+    monkeypatch.setattr(browser, "DEFAULT_PROFILES_DIRECTORY", tmp_path)
+    assert browser.profile_directory("demo-account") == tmp_path / "demo-account"
+
+    profile = tmp_path / "demo-account"
+    profile.mkdir()
+    (profile / "SingletonLock").symlink_to(f"host-{os.getpid()}")
+    standby = browser.profile_directory("demo-account")
+    assert standby == tmp_path / "demo-account-standby"
+
+    standby.mkdir()
+    (standby / "SingletonLock").symlink_to(f"host-{os.getpid()}")
+    assert browser.profile_directory("demo-account") is None
+
+    monkeypatch.setenv("TRADINGTOT_BROWSER_PROFILE", "off")
+    assert browser.profile_directory("other-account") is None
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.urls = []
+
+    def get(self, url):
+        self.urls.append(url)
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise browser.WebDriverException("disconnected: not connected to devtools")
+        return 1
+
+
+def test_driver_load_takes_standby_and_replaces_dead_drivers(monkeypatch):
+    launched = []
+
+    def launch():
+        launched.append(FakeDriver())
+        return launched[-1]
+
+    monkeypatch.setattr(browser.Driver, "launch", staticmethod(launch))
+    monkeypatch.setattr(browser, "accept_cookies", lambda driver: None)
+    monkeypatch.setattr(browser.Driver, "driver", None)
+    standby = browser.StandbyDriver()
+    monkeypatch.setattr(browser.Driver, "standby", standby)
+
+    standby.replenish()
+    parked = standby.driver
+    assert parked.urls == [browser.HOME_URL]
+    assert browser.Driver.load() is parked and standby.driver is None and standby.wanted.is_set()
+    assert browser.Driver.load() is parked
+
+    parked.alive = False
+    assert browser.Driver.load() is launched[-1] is not parked
+    assert len(launched) == 2
+
+
+def test_order_handler_uses_the_session_of_a_relogin(client):
+    stale = client.session
+    client.session = client.session_factory()
+
+    assert client.order_handler.from_summary() == []
+    assert client.order_handler.session is client.session is not stale
@@ -0,0 +1,48 @@
+import numpy as np
+
+from tradingTOT.candles import CandleBuffer, CandleStore
+from tradingTOT.enums import CandlePeriod
+
+
+MINUTE = 60_000
+
+
+def make_candles(start, count):
+    timestamps = start + MINUTE * np.arange(count)
+    prices = np.arange(count, dtype=np.float64) + 100
+    return np.column_stack([timestamps, prices, prices + 1, prices - 1, prices + 0.5])
+
+
+def test_ring_buffer_keeps_latest_candles():
+    buffer = CandleBuffer(capacity=3, period=CandlePeriod.ONE_MINUTE)
+
+    assert buffer.extend(make_candles(0, 2)) == 2
+    assert buffer.extend(make_candles(MINUTE, 3)) == 2
+
+    assert len(buffer) == 3
+    assert list(buffer.timestamp) == [MINUTE, 2 * MINUTE, 3 * MINUTE]
+    assert list(buffer.open) == [100.0, 101.0, 102.0]
+
+
+def test_missing_tail():
+    buffer = CandleBuffer(capacity=10, period=CandlePeriod.ONE_MINUTE)
+    assert buffer.missing(now=5 * MINUTE) == 10
+
+    buffer.extend(make_candles(7 * MINUTE, 3))
+    # The head of a buffer that is not full is requested too, and backfilled.
+    assert buffer.missing(now=9 * MINUTE) == 10
+    assert buffer.extend(make_candles(0, 10)) == 7
+    assert list(buffer.timestamp) == list(MINUTE * np.arange(10))
+
+    assert buffer.missing(now=9 * MINUTE) == 1
+    assert buffer.missing(now=12 * MINUTE) == 4
+    assert buffer.missing(now=50 * MINUTE) == 10
+
+
+def test_store_persists_buffers(tmp_path):
+    store = CandleStore(tmp_path)
+    store.get("MSFT_US_EQ", CandlePeriod.ONE_MINUTE, 5).extend(make_candles(0, 4))
+    store.save("MSFT_US_EQ", CandlePeriod.ONE_MINUTE)
+
+    buffer = CandleStore(tmp_path).get("MSFT_US_EQ", CandlePeriod.ONE_MINUTE, 2)
+    assert list(buffer.timestamp) == [2 * MINUTE, 3 * MINUTE]
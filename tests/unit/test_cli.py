@@ -0,0 +1,68 @@
+import io
+import json
+import time
+from argparse import Namespace
+
+from tradingTOT import cli
+
+
+class FakeClient:
+    def __init__(self):
+        self.batches = []
+
+    def get_ask_prices(self, tickers):
+        self.batches.append(list(tickers))
+        return {ticker: {"price": 1.0} for ticker in tickers if ticker != "NONE"}
+
+    def get_status(self, order_id):
+        time.sleep(0.01 * int(order_id))
+        if order_id == "0":
+            raise ValueError("unknown order")
+        return {"status": "COMPLETED"}
+
+    def get_positions(self, tickers=None):
+        positions = [{"code": "MSFT_US_EQ", "quantity": 1.0}, {"code": "AAPL_US_EQ", "quantity": 2.0}]
+        return [position for position in positions if tickers is None or position["code"][:4] in tickers]
+
+
+def records(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_read_inputs_skips_blank_and_comment_lines():
+    stdin = io.StringIO("MSFT\n\n# comment\n AAPL \n")
+    assert cli.read_inputs([], "-", stdin) == ["MSFT", "AAPL"]
+    assert cli.read_inputs(["TSLA"], None, stdin) == ["TSLA"]
+
+
+def test_quotes_are_batched_and_written_per_ticker():
+    client, stream = FakeClient(), io.StringIO()
+    writer = cli.JSONLWriter(stream)
+    cli.quotes(client, ["MSFT", "AAPL", "NONE"], writer, Namespace(concurrency=2, batch_size=2))
+
+    assert sorted(map(len, client.batches)) == [1, 2]
+    lines = {record["input"]: record for record in records(stream)}
+    assert lines["MSFT"]["result"] == {"price": 1.0}
+    assert "error" in lines["NONE"]
+    assert writer.errors == 1
+
+
+def test_results_stream_as_they_complete_with_errors_inline():
+    stream = io.StringIO()
+    writer = cli.JSONLWriter(stream)
+    cli.status(FakeClient(), ["5", "0", "1"], writer, Namespace(concurrency=3))
+
+    lines = records(stream)
+    assert [record["input"] for record in lines] == ["0", "1", "5"]
+    assert lines[0]["error"] == "ValueError: unknown order"
+    assert lines[2]["result"] == {"status": "COMPLETED"}
+
+
+def test_positions_are_filtered_by_ticker():
+    stream = io.StringIO()
+    cli.positions(FakeClient(), [], cli.JSONLWriter(stream), Namespace())
+    assert [record["input"] for record in records(stream)] == ["MSFT", "AAPL"]
+
+    stream = io.StringIO()
+    cli.positions(FakeClient(), ["AAPL"], cli.JSONLWriter(stream), Namespace())
+    assert records(stream) == [{"input": "AAPL", "result": {"code": "AAPL_US_EQ", "quantity": 2.0}}]
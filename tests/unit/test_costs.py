@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from tradingTOT.costs import CostEstimator
+from tradingTOT.enums import OrderType
+
+
+REVIEW = {"orderQuantity": 0.1557, "sharesValue": 49.93, "total": 50.0,
+          "exchangeRate": {"fromCurrency": "USD", "toCurrency": "GBP", "rate": 0.79348},
+          "costs": {"CURRENCY_CONVERSION_FEE": 0.07}}
+
+
+def test_estimate_matches_review_fields():
+    estimator = CostEstimator()
+    estimator.update_instrument("MSFT_US_EQ", {"currencyCode": "USD"})
+    estimator.update_quote("MSFT_US_EQ", 404.14)
+    assert not estimator.can_estimate("MSFT_US_EQ")
+
+    estimator.observe_review("MSFT_US_EQ", 50.0, REVIEW)
+    estimate = estimator.estimate("MSFT_US_EQ", 50.0)
+
+    assert set(estimate) == set(REVIEW)
+    assert estimate["costs"] == REVIEW["costs"]
+    assert estimate["sharesValue"] == REVIEW["sharesValue"]
+    assert estimate["orderQuantity"] == pytest.approx(REVIEW["orderQuantity"], rel=1e-3)
+    assert estimator.estimate("MSFT_US_EQ", -50.0)["orderQuantity"] < 0
+
+
+def test_drift_tracking():
+    estimator = CostEstimator()
+    estimator.update_instrument("MSFT_US_EQ", {"currencyCode": "USD"})
+    estimator.update_quote("MSFT_US_EQ", 404.14)
+    for _ in range(5):
+        estimator.observe_review("MSFT_US_EQ", 50.0, REVIEW)
+
+    assert len(estimator.drift) == 4
+    assert not estimator.drift.is_trustworthy()
+
+    estimator.observe_review("MSFT_US_EQ", 50.0, REVIEW)
+    assert estimator.drift.is_trustworthy()
+
+    estimator.update_quote("MSFT_US_EQ", 500.0)
+    estimator.observe_review("MSFT_US_EQ", 50.0, REVIEW)
+    assert not estimator.drift.is_trustworthy()
+    assert estimator.drift.summary()["samples"] == 6
+
+
+def test_old_quotes_are_fetched_again(load_test, client):
+    client.cost_estimator.update_instrument("MSFT_US_EQ", {"currencyCode": "GBP"})
+    client.cost_estimator.update_quote("MSFT_US_EQ", 1.0, observed_at=time.monotonic() - 61)
+    assert not client.cost_estimator.can_estimate("MSFT_US_EQ")
+
+    estimate = client.estimate_costs(OrderType.BUY, "MSFT", 50)
+    assert load_test.server.requests["price"] == 1
+    assert client.cost_estimator.has_fresh_quote("MSFT_US_EQ") and estimate["orderQuantity"] != 50
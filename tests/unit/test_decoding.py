@@ -0,0 +1,35 @@
+import json
+
+import pytest
+import requests
+from requests.models import Response
+
+from tradingTOT.utils import decoding
+
+
+def test_decode_parses_each_response_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(decoding, "_decoder", lambda data: calls.append(data) or json.loads(data))
+    response = Response()
+    response._content = b'{"cash": {"free": 1.5}}'
+
+    first = decoding.decode(response)
+    assert first == {"cash": {"free": 1.5}}
+    assert decoding.decode(response) is first
+    assert decoding.decode(first) is first
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("decoder", [json.loads, pytest.param(
+    getattr(decoding.orjson, "loads", None), marks=pytest.mark.skipif(not decoding.orjson, reason="Needs orjson."))])
+def test_decode_errors_and_charsets_match_requests(monkeypatch, decoder):
+    monkeypatch.setattr(decoding, "_decoder", decoder)
+    for content in (b"", b"<html>Bad gateway</html>"):
+        response = Response()
+        response._content = content
+        with pytest.raises(requests.exceptions.JSONDecodeError):
+            decoding.decode(response)
+
+    response = Response()
+    response._content = '{"name": "Nestlé"}'.encode("utf-16")
+    assert decoding.decode(response) == {"name": "Nestlé"}
@@ -0,0 +1,54 @@
+from tradingTOT.enums import AccountEventType
+from tradingTOT.events import AccountEventStream, SummaryDiffer
+
+
+def summary(free, positions, orders):
+    return {
+        "cash": {"free": free, "freeForStocks": free, "blockedForStocks": 0, "total": 1000 + free},
+        "open": {"items": [{"positionId": key, "quantity": quantity, "value": quantity * 7.0}
+                           for key, quantity in positions.items()]},
+        "valueOrders": {"items": [{"orderId": key} for key in orders]},
+        "orders": {"items": []},
+    }
+
+
+def test_diff_emits_only_changes():
+    differ = SummaryDiffer()
+    assert differ.diff(summary(100, {"1": 2.0, "2": 1.0}, ["10"])) == []
+    assert differ.diff(summary(100, {"1": 2.0, "2": 1.0}, ["10"])) == []
+
+    events = differ.diff(summary(50, {"1": 3.0, "3": 1.0}, ["11"]))
+    assert [(event.type, event.key) for event in events] == [
+        (AccountEventType.CASH_CHANGED, None),
+        (AccountEventType.POSITION_CHANGED, "1"),
+        (AccountEventType.POSITION_OPENED, "3"),
+        (AccountEventType.POSITION_CLOSED, "2"),
+        (AccountEventType.ORDER_ADDED, "11"),
+        (AccountEventType.ORDER_REMOVED, "10"),
+    ]
+    assert events[0].changes == {"free": (100, 50), "freeForStocks": (100, 50)}
+    assert events[1].changes == {"quantity": (2.0, 3.0)}
+
+
+class FakeClient:
+    def __init__(self):
+        self.free = 100
+
+    def _get_summary(self):
+        self.free -= 1
+        return summary(self.free, {}, [])
+
+
+def test_each_subscriber_gets_its_own_bounded_queue():
+    stream = AccountEventStream(FakeClient(), max_queued=2)
+    stream.poll()
+    stream.poll()
+    first, second = stream.subscribe(), stream.subscribe()
+    for _ in range(3):
+        stream.poll()
+
+    assert first.qsize() == second.qsize() == 2
+    assert first.get_nowait() is second.get_nowait()
+    stream.unsubscribe(first)
+    stream.poll()
+    assert first.qsize() == 1 and second.qsize() == 2
\ No newline at end of file
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from tradingTOT.costs import CostEstimator
+from tradingTOT.fx import FXRateCache
+
+
+def test_rates_expire_and_are_inverted():
+    fx = FXRateCache(ttl=60)
+    fx.observe_review({"exchangeRate": {"fromCurrency": "USD", "toCurrency": "GBP", "rate": 0.8}})
+
+    assert fx.convert(100, "USD", "GBP") == pytest.approx(80)
+    assert fx.get("GBP", "USD") == pytest.approx(1.25)
+    assert fx.get("GBP", "GBP") == 1.0
+    assert fx.get("EUR", "GBP") is None
+
+    fx.update("USD", "GBP", 0.8, observed_at=time.monotonic() - 61)
+    assert not fx.is_fresh("GBP", "USD")
+    assert fx.get("USD", "GBP") is None
+    assert fx.get("USD", "GBP", allow_stale=True) == 0.8
+
+
+def test_cost_estimator_shares_the_cache():
+    fx = FXRateCache()
+    estimator = CostEstimator("EUR", fx_rates=fx)
+    estimator.update_instrument("MSFT_US_EQ", {"currencyCode": "USD"})
+    estimator.update_quote("MSFT_US_EQ", 400.0)
+    fx.update("USD", "EUR", 0.9)
+
+    assert estimator.estimate("MSFT_US_EQ", 90.0)["exchangeRate"] == {"fromCurrency": "USD", "toCurrency": "EUR",
+                                                                       "rate": 0.9}
+
+
+def test_fill_prices_are_reported_in_the_account_currency(client):
+    # The history rate is in units of the instrument currency per unit of the account currency.
+    assert client._fill_price_in_account_currency(125.0, "USD", 1.25) == (100.0, "GBP")
+    assert client.fx_rates.get("USD", "GBP") == pytest.approx(0.8)
+    assert client._fill_price_in_account_currency(250.0, "USD", None) == (pytest.approx(200.0), "GBP")
+    assert client._fill_price_in_account_currency(10.0, "EUR", None) == (10.0, "EUR")
+    assert client._fill_price_in_account_currency(10.0, None, None) == (10.0, "GBP")
+
+
+def test_status_of_filled_order_has_its_currency(load_test, client):
+    order = client.place_order("BUY", "MSFT", 50)
+    load_test.server.book.advance()
+
+    assert client.get_status(order["orderId"])["currency"] == "GBP"
+
+
+def test_fx_refresh_reviews_are_kept_out_of_the_cost_drift(client, monkeypatch):
+    reviews = []
+    monkeypatch.setattr(client.cost_estimator, "observe_review", lambda *args: reviews.append(args))
+    client.cost_estimator.currencies["MSFT_US_EQ"] = "USD"
+    # The stand-in reviews in the account currency, so a USD rate is returned as if Trading212 had quoted it.
+    monkeypatch.setattr(client, "_review_order", lambda object_id, amount: {
+        "exchangeRate": {"fromCurrency": "USD", "toCurrency": "GBP", "rate": 0.8}})
+
+    assert client.get_fx_rate("USD") == 0.8
+    assert reviews == []
@@ -0,0 +1,61 @@
+from tradingTOT.instrument_index import InstrumentIndex
+
+
+INSTRUMENTS = [
+    {"objectID": "MSFT_US_EQ", "shortName": "MSFT", "name": "Microsoft", "exchangeName": "NASDAQ",
+     "_rankingInfo": {"nbTypos": 0}},
+    {"objectID": "MSFd_EQ", "shortName": "MSFT", "name": "Microsoft", "exchangeName": "Deutsche Börse Xetra"},
+    {"objectID": "AAPL_US_EQ", "shortName": "AAPL", "name": "Apple", "exchangeName": "NASDAQ"},
+]
+
+
+def test_lookup_and_search(tmp_path):
+    index = InstrumentIndex(INSTRUMENTS)
+
+    assert [i["objectID"] for i in index.lookup("msft")] == ["MSFT_US_EQ", "MSFd_EQ"]
+    assert "_rankingInfo" not in index.get("MSFT_US_EQ")
+    assert index.search("micro")[0]["shortName"] == "MSFT"
+    assert index.search("appel")[0]["objectID"] == "AAPL_US_EQ"
+
+    path = index.save(tmp_path / "index.json")
+    assert len(InstrumentIndex.load(path)) == 3
+    assert InstrumentIndex.load(tmp_path / "missing.json") is None
+
+
+def stock(short_name, exchange="NYSE"):
+    return {"objectID": f"{short_name}_US_EQ", "shortName": short_name, "name": short_name, "category": "EQUITY",
+            "uiType": "STOCK", "exchangeName": exchange}
+
+
+def test_equity_data_falls_back_to_fuzzy_search(client, monkeypatch):
+    loads = []
+    monkeypatch.setattr(InstrumentIndex, "load", classmethod(lambda cls, path=None: loads.append(path) or
+                                                             InstrumentIndex([stock("BRK.B"), stock("BRK.A")])))
+    assert loads == []
+
+    assert client.get_equity_data("brk-b")["objectID"] == "BRK.B_US_EQ"
+    assert [i["shortName"] for i in client.find_instruments("BRK")] == ["BRK.B", "BRK.A"]
+    assert len(loads) == 1
+
+
+def test_build_shards_by_exchange_past_the_pagination_limit(client, tmp_path, monkeypatch, caplog):
+    instruments = [stock(f"N{i}", "NASDAQ") for i in range(3)] + [stock(f"Y{i}") for i in range(2)]
+    limit = 3
+    queries = []
+
+    # Algolia only pages through the first `limit` hits of each query.
+    def search(query, page_number=0, hits_per_page=50, filters=None, facets=None):
+        queries.append(filters)
+        hits = [i for i in instruments if not filters or filters == f'exchangeName:"{i["exchangeName"]}"']
+        pages = min(-(-len(hits) // hits_per_page), limit // hits_per_page)
+        return {"hits": hits[page_number * hits_per_page:(page_number + 1) * hits_per_page], "nbHits": len(hits),
+                "nbPages": pages, "facets": {"exchangeName": {"NASDAQ": 3, "NYSE": 2}} if facets else {}}
+
+    monkeypatch.setattr(client, "_search_instruments", search)
+    index = client.build_instrument_index(hits_per_page=1, path=tmp_path / "index.json")
+    assert len(index) == 5 and client.instrument_index is index
+    assert queries.count('exchangeName:"NYSE"') == 2 and not caplog.records
+
+    limit = 2
+    assert len(client.build_instrument_index(hits_per_page=1, path=tmp_path / "index.json")) == 4
+    assert "Only 2 of the 3 instruments" in caplog.text
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from tradingTOT.utils import browser
+from tradingTOT.utils.lifecycle import DriverLifecycle, process_tree_rss
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="Needs procfs.")
+def test_process_tree_rss_includes_children():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        own = int(open(f"/proc/{os.getpid()}/statm").read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        assert process_tree_rss(os.getpid()) > own
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_check_quits_idle_driver(monkeypatch):
+    quit_calls = []
+    monkeypatch.setattr(browser.Driver, "driver", object())
+    monkeypatch.setattr(browser.Driver, "started_at", time.monotonic() - 100)
+    monkeypatch.setattr(browser.Driver, "used_at", time.monotonic() - 50)
+    monkeypatch.setattr(browser.Driver, "quit", classmethod(lambda cls: quit_calls.append(cls)))
+
+    lifecycle = DriverLifecycle(idle_timeout=60)
+    assert lifecycle.check() is None
+    assert lifecycle.stats()["uptime"] >= 100 and lifecycle.stats()["rss"] is None
+
+    lifecycle.idle_timeout = 10
+    assert lifecycle.check() == "idle" and quit_calls and lifecycle.reclaimed["idle"] == 1
+
+
+def test_unreadable_memory_is_warned_about_once(monkeypatch, caplog):
+    monkeypatch.setattr(browser.Driver, "driver", object())
+    monkeypatch.setattr(browser.Driver, "used_at", time.monotonic())
+
+    lifecycle = DriverLifecycle(max_rss=1)
+    assert lifecycle.check() is None and lifecycle.check() is None
+    assert caplog.text.count("max_rss") == 1
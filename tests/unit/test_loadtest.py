@@ -0,0 +1,12 @@
+from tradingTOT.loadtest import LoadTest, LoadTestConfig
+
+
+def test_load_test_reports_contention_and_logins():
+    config = LoadTestConfig(workers=4, duration=0.5, latency=0, login_latency=0.05, token_ttl=None, seed=0)
+    report = LoadTest(config).run()
+
+    assert report.operations > 0 and not report.errors
+    assert set(report.latency) <= set(config.mix)
+    assert report.lock_wait["count"] == report.latency["place_order"]["count"]
+    # Every worker shares the client, so the first login is the only one.
+    assert report.logins == 1
@@ -0,0 +1,88 @@
+import time
+
+import requests
+from requests.models import Response
+
+from tradingTOT.endpoints import ACCOUNT_SUMMARY_URL_SERVICES
+from tradingTOT.middleware import (Middleware, MiddlewarePipeline, MetricsMiddleware, RateLimitMiddleware,
+                                   RetryMiddleware)
+from tradingTOT.utils.decoding import decode
+
+
+class FakeSession:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = Response()
+        response.status_code = outcome
+        response._content = b"{}"
+        return response
+
+
+class Recorder(Middleware):
+    def __init__(self, name, calls, cached=None):
+        self.name = name
+        self.calls = calls
+        self.cached = cached
+
+    def before_request(self, context):
+        self.calls.append(f"before {self.name}")
+        return self.cached
+
+    def after_response(self, context, response):
+        self.calls.append(f"after {self.name}")
+        return response
+
+
+def test_hooks_run_in_order_and_can_skip_sending():
+    calls = []
+    session = FakeSession(200)
+    pipeline = MiddlewarePipeline([Recorder("a", calls), Recorder("b", calls)])
+    pipeline.send(session, "get", "https://example.com")
+    assert calls == ["before a", "before b", "after b", "after a"]
+
+    cached = Response()
+    calls.clear()
+    pipeline.add(Recorder("cache", calls, cached), index=0)
+    assert pipeline.send(session, "GET", "https://example.com") is cached
+    assert calls == ["before cache", "after cache"]
+    assert len(session.calls) == 1
+
+
+def test_retries_transient_failures_of_idempotent_requests_only():
+    retry = RetryMiddleware(max_attempts=3, backoff=0)
+    session = FakeSession(requests.ConnectionError(), 503, 200)
+    response = MiddlewarePipeline([retry]).send(session, "GET", "https://example.com")
+    assert response.status_code == 200 and len(session.calls) == 3
+
+    session = FakeSession(503)
+    assert MiddlewarePipeline([retry]).send(session, "POST", "https://example.com").status_code == 503
+    assert len(session.calls) == 1
+
+
+def test_rate_limit_spaces_requests():
+    pipeline = MiddlewarePipeline([RateLimitMiddleware(rate=50, burst=1)])
+    started = time.monotonic()
+    for _ in range(4):
+        pipeline.send(FakeSession(200), "GET", "https://example.com")
+    assert time.monotonic() - started >= 0.05
+
+
+def test_client_requests_go_through_middleware(client):
+    metrics = MetricsMiddleware()
+    client.middleware.add(metrics)
+
+    client.get_account_details()
+    summary = decode(client.request("POST", ACCOUNT_SUMMARY_URL_SERVICES, json=[]))
+
+    assert "cash" in summary
+    counts = {name.split(".com", 1)[1]: endpoint["counts"] for name, endpoint in metrics.metrics().items()}
+    assert counts["/rest/trading/v1/accounts/summary"] == {"200": 2}
+    # The failed check that triggered the login, the check of the new session and the check before `request`.
+    assert counts["/rest/v1/webclient/authenticate"] == {"401": 1, "200": 2}
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from tradingTOT import order_watcher
+from tradingTOT.enums import OrderStatus
+from tradingTOT.order_watcher import OrderWatcher
+
+
+class FakeClient:
+    def __init__(self):
+        self.open_ids = {"1", "2"}
+        self.summaries = 0
+        self.history_probes = []
+
+    def _get_summary(self):
+        self.summaries += 1
+        return {"valueOrders": {"items": [{"orderId": order_id} for order_id in self.open_ids]}}
+
+    def _get_history_status(self, order_id):
+        self.history_probes.append(order_id)
+        return {"status": OrderStatus.COMPLETED, "price": 1.0, "quantity": 2.0}
+
+
+def test_poll_delivers_transitions():
+    client = FakeClient()
+    watcher = OrderWatcher(client, min_interval=0, max_interval=0)
+    received = []
+    watcher.watch("1", callback=received.append)
+    watcher.watch("2")
+
+    updates = watcher.poll()
+    assert [(u.order_id, u.status) for u in updates] == [("1", OrderStatus.SUBMITTED), ("2", OrderStatus.SUBMITTED)]
+    assert client.summaries == 1 and client.history_probes == []
+
+    assert watcher.poll() == []
+
+    client.open_ids = {"2"}
+    updates = watcher.poll()
+    assert [(u.order_id, u.status, u.previous) for u in updates] == [
+        ("1", OrderStatus.COMPLETED, OrderStatus.SUBMITTED)]
+    assert client.history_probes == ["1"]
+    assert [u.status for u in received] == [OrderStatus.SUBMITTED, OrderStatus.COMPLETED]
+    assert list(watcher.orders) == ["2"]
+    assert watcher.updates.qsize() == 3
+
+
+def test_only_due_orders_are_checked_and_updates_are_bounded():
+    client = FakeClient()
+    client.open_ids = {"1"}
+    watcher = OrderWatcher(client, min_interval=0, max_interval=60, max_updates=1)
+    watcher.watch("1")
+    watcher.poll()
+    # The quiet order backs off, so the new order is checked on its own.
+    client.open_ids = set()
+    watcher.orders["1"].next_check = time.monotonic() + 60
+    watcher.watch("2")
+
+    updates = watcher.poll()
+    assert [(u.order_id, u.status) for u in updates] == [("2", OrderStatus.COMPLETED)]
+    assert client.history_probes == ["2"]
+    assert watcher.updates.qsize() == 1 and watcher.updates.get_nowait().order_id == "2"
+
+
+def test_failed_checks_back_off():
+    client = FakeClient()
+    watcher = OrderWatcher(client, min_interval=0, max_interval=0)
+    watcher.watch("1")
+    watcher.watch("3")
+    client._get_history_status = lambda order_id: 1 / 0
+
+    # The failed history probe of one order does not hold back the others.
+    assert [update.order_id for update in watcher.poll()] == ["1"]
+    assert watcher.orders["3"].next_check > time.monotonic() and watcher.orders["1"].status == OrderStatus.SUBMITTED
+
+    watcher.orders["1"].next_check = 0
+    client._get_summary = lambda: 1 / 0
+    with pytest.raises(ZeroDivisionError):
+        watcher.poll()
+    assert watcher.orders["1"].interval == order_watcher.ERROR_INTERVAL
+    assert watcher.poll() == []
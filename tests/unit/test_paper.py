@@ -0,0 +1,58 @@
+import pytest
+
+from tradingTOT.enums import OrderStatus, OrderType, FailureTypes
+from tradingTOT.exceptions import BrokerOrderError
+from tradingTOT.paper import PaperTradingTOT, ReplayPriceFeed, SyntheticPriceFeed
+from tradingTOT.schemas.api_responses import SummarySchema
+
+
+def test_buy_sell_round_trip():
+    broker = PaperTradingTOT(ReplayPriceFeed({"MSFT": [100.0, 110.0]}), cash=1000.0)
+
+    order = broker.place_order(OrderType.BUY, "MSFT", 500)
+    assert broker.get_status(order["orderId"]) == {"status": OrderStatus.COMPLETED, "price": 100.0, "currency": "GBP",
+                                                   "quantity": 5.0}
+
+    broker.advance()
+    position = broker.get_position("MSFT")
+    assert position["value"] == pytest.approx(550.0) and position["ppl"] == pytest.approx(50.0)
+    assert broker.get_account_details() == {"cash": 500.0, "total": pytest.approx(1050.0)}
+    SummarySchema.model_validate(broker._get_summary())
+
+    with pytest.raises(BrokerOrderError, match=FailureTypes.InsufficientValueForStocksSell.value):
+        broker.place_order(OrderType.SELL, "MSFT", 600)
+    with pytest.raises(BrokerOrderError, match=FailureTypes.ValuePrecisionMismatch.value):
+        broker.place_order(OrderType.SELL, "MSFT", 1.234)
+
+    broker.place_order(OrderType.SELL, "MSFT", 550)
+    assert broker.get_positions({"MSFT"}) == []
+    assert broker.cash == pytest.approx(1050.0)
+
+
+def test_orders_fill_on_advance():
+    broker = PaperTradingTOT(SyntheticPriceFeed({"AAPL": 200.0}, steps=10, seed=1), fill_immediately=False)
+
+    order = broker.place_order(OrderType.BUY, "AAPL", 100)
+    assert broker.get_status(order["orderId"]) == {"status": OrderStatus.SUBMITTED}
+    assert broker.get_account_details()["cash"] == pytest.approx(9900.0)
+
+    broker.advance()
+    assert broker.get_status(order["orderId"])["status"] == OrderStatus.COMPLETED
+    assert order["status"] == "NEW" and broker.place_order(OrderType.BUY, "AAPL", 50)["status"] == "NEW"
+
+
+def test_open_orders_reserve_cash_and_value():
+    broker = PaperTradingTOT(ReplayPriceFeed({"MSFT": [100.0, 100.0]}), cash=1000.0)
+    assert broker.place_order(OrderType.BUY, "MSFT", 500)["status"] == "FILLED"
+
+    broker.fill_immediately = False
+    broker.place_order(OrderType.SELL, "MSFT", 300)
+    with pytest.raises(BrokerOrderError, match=FailureTypes.InsufficientValueForStocksSell.value):
+        broker.place_order(OrderType.SELL, "MSFT", 300)
+    broker.place_order(OrderType.BUY, "MSFT", 400)
+    assert broker._get_summary()["cash"]["blockedForStocks"] == 400
+    assert list(broker.orders_by_code) == ["MSFT_US_EQ"] and len(broker.orders_by_code["MSFT_US_EQ"]) == 2
+
+    broker.advance()
+    assert broker._blocked() == 0 and not broker.orders_by_code
+    assert broker.cash == pytest.approx(400.0)
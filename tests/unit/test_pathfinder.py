@@ -0,0 +1,23 @@
+import os
+
+from tradingTOT.utils import pathfinder
+from tradingTOT.utils.storage import LocalBinaryStorage
+
+
+def test_find_path_reuses_unchanged_binary(tmp_path, monkeypatch):
+    binary = tmp_path / "chrome"
+    binary.write_text("#!/bin/sh\necho Google Chrome 120.0.6099.109\n")
+    binary.chmod(0o755)
+    discoveries = []
+    monkeypatch.setattr(pathfinder, "_discover_path", lambda: discoveries.append(binary) or binary)
+    storage = LocalBinaryStorage(tmp_path / "cache")
+
+    assert pathfinder.find_path(storage=storage) == binary
+    assert pathfinder.find_path(storage=storage) == binary
+    assert len(discoveries) == 1
+    assert storage.read().version == "120.0.6099.109"
+
+    stat = binary.stat()
+    os.utime(binary, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert pathfinder.find_path(storage=storage) == binary
+    assert len(discoveries) == 2
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from tradingTOT.enums import FailureTypes
+from tradingTOT.exceptions import BrokerOrderError
+from tradingTOT.pretrade import PreTradeChecker
+
+
+SUMMARY = {
+    "cash": {"freeForStocks": 100.0},
+    "open": {"items": [{"code": "MSFT_US_EQ", "value": 50.0}]},
+}
+
+
+def test_batch_reserves_funds_in_order():
+    checker = PreTradeChecker()
+    checker.observe_summary(SUMMARY)
+
+    results = checker.check_batch([("AAPL_US_EQ", 60), ("AAPL_US_EQ", 60), ("AAPL_US_EQ", 40),
+                                   ("MSFT_US_EQ", -30), ("MSFT_US_EQ", -30), ("MSFT_US_EQ", 1.234)])
+    assert [result["error"] for result in results] == [
+        None, FailureTypes.InsufficientFundsForStocksBuy, None,
+        None, FailureTypes.InsufficientValueForStocksSell, FailureTypes.ValuePrecisionMismatch]
+
+    checker.reserve("AAPL_US_EQ", 60)
+    with pytest.raises(BrokerOrderError, match=FailureTypes.InsufficientFundsForStocksBuy.value):
+        checker.check("AAPL_US_EQ", 60)
+    with pytest.raises(BrokerOrderError, match=FailureTypes.InsufficientValueForStocksSell.value):
+        checker.check("TSLA_US_EQ", -1)
+
+    checker.observe_summary(SUMMARY)
+    assert checker.check("AAPL_US_EQ", 60) == 60
+
+
+def test_reserved_buys_can_be_sold():
+    checker = PreTradeChecker()
+    checker.observe_summary(SUMMARY)
+
+    checker.reserve("AAPL_US_EQ", 40)
+    assert checker.check("AAPL_US_EQ", -40) == -40
+    assert checker.check_batch([("TSLA_US_EQ", 20), ("TSLA_US_EQ", -20), ("TSLA_US_EQ", -1)])[2]["error"] \
+        == FailureTypes.InsufficientValueForStocksSell
+
+
+def test_normalizes_and_skips_funds_when_stale():
+    checker = PreTradeChecker(max_age=0, normalize=True)
+    assert checker.check("AAPL_US_EQ", -10.239) == -10.23
+
+    checker.observe_summary(SUMMARY)
+    # Funds are not checked against an outdated summary.
+    assert checker.check("AAPL_US_EQ", 1000) == 1000
+
+
+def test_check_and_reserve_is_atomic_and_outlives_older_summaries():
+    checker = PreTradeChecker()
+    checker.observe_summary(SUMMARY)
+
+    amount, reservation = checker.check_and_reserve("AAPL_US_EQ", 60)
+    with pytest.raises(BrokerOrderError, match=FailureTypes.InsufficientFundsForStocksBuy.value):
+        checker.check_and_reserve("AAPL_US_EQ", 60)
+
+    # A summary requested before the order was placed does not account for it.
+    requested_at = time.monotonic()
+    checker.placed(reservation)
+    checker.observe_summary(SUMMARY, requested_at)
+    assert checker.reserved == {"AAPL_US_EQ": 60}
+    checker.release(reservation)
+    assert checker.reserved == {"AAPL_US_EQ": 60}
+
+    checker.observe_summary(SUMMARY)
+    assert checker.reserved == {}
+    _, reservation = checker.check_and_reserve("AAPL_US_EQ", 100)
+    checker.release(reservation)
+    assert checker.check("AAPL_US_EQ", 100) == 100
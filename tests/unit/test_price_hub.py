@@ -0,0 +1,59 @@
+import time
+
+from tradingTOT.price_hub import PriceHub
+
+
+class FakeClient:
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.batches = []
+
+    def get_ask_prices(self, tickers):
+        self.batches.append(list(tickers))
+        return {ticker: {"price": 100.0} for ticker in tickers if ticker not in self.missing}
+
+
+def test_due_tickers_are_fetched_in_batches_and_published():
+    client = FakeClient()
+    hub = PriceHub(client, max_batch_size=2)
+    relaxed = hub.subscribe(["MSFT", "AAPL", "TSLA"], max_staleness=60)
+    strict = hub.subscribe(["MSFT", "NVDA", "AMZN"], max_staleness=0)
+
+    assert len(hub.poll()) == 5
+    assert sorted(map(len, client.batches)) == [1, 2, 2]
+    assert set(relaxed.wait(0)) == {"MSFT", "AAPL", "TSLA"}
+    assert strict.get("NVDA").price == 100.0
+
+    # Only the tickers of the strict subscriber are out of date.
+    assert sorted(hub.due()) == ["AMZN", "MSFT", "NVDA"]
+    strict.close()
+    assert hub.due() == []
+
+
+def test_missing_tickers_back_off():
+    client = FakeClient(missing={"TYPO"})
+    hub = PriceHub(client, miss_backoff=0.05, max_miss_backoff=0.08)
+    hub.subscribe(["MSFT", "TYPO"], max_staleness=0)
+
+    hub.poll()
+    assert hub.due() == ["MSFT"]
+    assert hub.misses["TYPO"][0] == 1
+
+    time.sleep(0.06)
+    assert sorted(hub.due()) == ["MSFT", "TYPO"]
+    hub.poll()
+    retry_in = hub.misses["TYPO"][1] - time.monotonic()
+    assert hub.misses["TYPO"][0] == 2 and 0.05 < retry_in <= 0.08
+
+    client.missing.clear()
+    time.sleep(0.09)
+    hub.poll()
+    assert "TYPO" not in hub.misses and hub.freshness("TYPO") < 1
+
+
+def test_get_ask_prices_batches_and_leaves_out_unknown_tickers(load_test, client):
+    prices = client.get_ask_prices(["MSFT", "NOPE", "AAPL"])
+
+    assert set(prices) == {"MSFT", "AAPL"}
+    assert prices["MSFT"]["price"] == prices["MSFT"]["close"] > 0
+    assert load_test.server.requests["prices"] == 1
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from tradingTOT import recorder as recorder_module
+from tradingTOT.recorder import SnapshotRecorder, SnapshotReader
+
+
+def summary(msft_quantity, free):
+    positions = [{"code": "MSFT_US_EQ", "quantity": msft_quantity, "currentPrice": 400.0, "value": 320.0}]
+    if msft_quantity > 1:
+        positions.append({"code": "AAPL_US_EQ", "quantity": 1.0, "currentPrice": 200.0, "value": 160.0})
+    return {"open": {"items": positions}, "cash": {"free": free, "freeForStocks": free, "total": free + 480.0}}
+
+
+def test_record_and_query(tmp_path):
+    recorder = SnapshotRecorder(tmp_path)
+    recorder.record(summary(1.0, 10.0), timestamp=1)
+    recorder.record(summary(2.0, 5.0), timestamp=2)
+    with pytest.raises(ValueError):
+        recorder.record(summary(2.0, 5.0), timestamp=1.5)
+    with pytest.raises(ValueError):
+        recorder.record(summary(2.0, 5.0), timestamp=2)
+
+    reader = SnapshotReader(tmp_path)
+    assert reader.codes == ["MSFT_US_EQ", "AAPL_US_EQ"]
+    assert list(reader.positions()["quantity"]) == [1.0, 2.0, 1.0]
+    assert list(reader.positions(start=2000)["code"]) == [0, 1]
+    assert list(reader.positions(ticker="MSFT")["quantity"]) == [1.0, 2.0]
+    assert list(reader.cash(end=1000)["freeForStocks"]) == [10.0]
+    assert np.isnan(reader.cash()["interest"]).all()
+
+    snapshots = list(reader.replay())
+    assert [(timestamp, len(columns["code"])) for timestamp, columns in snapshots] == [(1000, 1), (2000, 2)]
+
+    assert SnapshotRecorder(tmp_path).last_timestamp == 2000
+
+
+def test_partial_writes_are_truncated(tmp_path, monkeypatch):
+    recorder = SnapshotRecorder(tmp_path)
+    recorder.record(summary(1.0, 10.0), timestamp=1)
+
+    # A snapshot interrupted after its positions and part of a column, before its cash row.
+    recorder_module._append(tmp_path / "positions", {name: np.full(1, 2000, recorder_module._dtype(name))
+                                                     for name in recorder_module.POSITION_COLUMNS})
+    with open(tmp_path / "positions" / "quantity", "ab") as handler:
+        handler.write(b"\x00\x01\x02")
+    recorder = SnapshotRecorder(tmp_path)
+    assert recorder.last_timestamp == 1000
+
+    def fail(directory, columns):
+        if directory.name == "cash":
+            raise OSError("No space left on device")
+        append(directory, columns)
+
+    append = recorder_module._append
+    monkeypatch.setattr(recorder_module, "_append", fail)
+    with pytest.raises(OSError):
+        recorder.record(summary(2.0, 5.0), timestamp=2)
+    monkeypatch.setattr(recorder_module, "_append", append)
+    recorder.record(summary(2.0, 5.0), timestamp=3)
+
+    reader = SnapshotReader(tmp_path)
+    assert list(reader.positions()["timestamp"]) == [1000, 3000, 3000]
+    assert list(reader.positions()["quantity"]) == [1.0, 2.0, 1.0]
+    assert {(tmp_path / "positions" / name).stat().st_size for name in ("timestamp", "quantity")} == {24}
+
+
+def test_snapshots_in_the_same_millisecond_are_kept_apart(tmp_path, monkeypatch):
+    recorder = SnapshotRecorder(tmp_path)
+    monkeypatch.setattr(recorder_module.time, "time", lambda: 5.0)
+
+    assert [recorder.record(summary(1.0, 10.0)) for _ in range(2)] == [5000, 5001]
+    assert [timestamp for timestamp, _ in SnapshotReader(tmp_path).replay()] == [5000, 5001]
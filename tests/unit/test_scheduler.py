@@ -0,0 +1,36 @@
+import pytest
+
+from tradingTOT.enums import OrderPriority
+from tradingTOT.exceptions import OrderOperationError
+from tradingTOT.scheduler import OrderScheduler
+
+
+class FakeClient:
+    def __init__(self):
+        self.placed = []
+
+    def place_order(self, action, ticker, amount):
+        self.placed.append(ticker)
+        return {"orderId": str(len(self.placed))}
+
+
+def test_orders_are_placed_by_priority_and_dropped_after_deadline():
+    client = FakeClient()
+    scheduler = OrderScheduler(client, workers=1, max_queue=4)
+    rebalance = [scheduler.submit("BUY", f"LOW{i}", 10, priority=OrderPriority.LOW) for i in range(2)]
+    expired = scheduler.submit("BUY", "STALE", 10, deadline=-1)
+    exit_order = scheduler.submit("SELL", "EXIT", 10, priority=OrderPriority.CRITICAL)
+
+    with pytest.raises(OrderOperationError, match="full"):
+        scheduler.submit("BUY", "MORE", 10, timeout=0)
+
+    with scheduler:
+        assert exit_order.result(timeout=5) == {"orderId": "1"}
+        with pytest.raises(OrderOperationError, match="expired"):
+            expired.result(timeout=5)
+        assert [future.result(timeout=5)["orderId"] for future in rebalance] == ["2", "3"]
+
+    assert client.placed == ["EXIT", "LOW0", "LOW1"]
+    metrics = scheduler.metrics()
+    assert (metrics["placed"], metrics["expired"], metrics["rejected"], metrics["queued"]) == (3, 1, 1, 0)
+    assert set(metrics["queue_latency"]) == {"CRITICAL", "NORMAL", "LOW"}
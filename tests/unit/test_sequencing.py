@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tradingTOT.endpoints import PLACE_ORDER_URL
+from tradingTOT.sequencing import FileLockOrderSequencer, OrderClaims, ThreadOrderSequencer, account_key
+
+
+def test_order_claims_are_exclusive(tmp_path):
+    claims = [OrderClaims("account", tmp_path) for _ in range(8)]
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda c: c.claim("1234567890"), claims))
+
+    assert results.count(True) == 1
+    assert claims[0].claim("1234567891")
+
+
+def test_file_lock_sequencer_times_out(tmp_path):
+    first = FileLockOrderSequencer(tmp_path)
+    second = FileLockOrderSequencer(tmp_path)
+    account = account_key("someone@example.com", "demo")
+
+    with first.sequence(account):
+        with ThreadPoolExecutor(1) as executor:
+            assert not executor.submit(second.acquire, account, 0.05).result()
+
+    assert second.acquire(account, 0.05)
+    second.release(account)
+
+
+def test_order_is_identified_when_a_summary_lists_it_first(client, monkeypatch):
+    request = client._request
+
+    # A summary fetched by another thread while the order is placed already lists the new order.
+    def place_then_fetch_summary(method, url, **kwargs):
+        response = request(method, url, **kwargs)
+        if url == PLACE_ORDER_URL:
+            client._get_summary()
+        return response
+
+    monkeypatch.setattr(client, "_request", place_then_fetch_summary)
+    order = client.place_order("BUY", "MSFT", 50)
+    assert order["code"] == "MSFT_US_EQ" and "cost" in order
+
+
+def test_sequencers_have_their_own_locks(client):
+    first, second = ThreadOrderSequencer(), ThreadOrderSequencer()
+    with first.sequence("account"):
+        assert second.acquire("account", 0)
+        second.release("account")
+
+    with pytest.warns(DeprecationWarning):
+        lock = client.order_lock
+    with lock:
+        assert not client.order_sequencer.acquire(client.account, 0)
+    assert lock.acquire(blocking=False)
+    lock.release()
@@ -0,0 +1,28 @@
+import os
+import time
+
+from tradingTOT.utils.storage import LocalShotStorage, ShotPath, ShotPolicy, ShotSettings
+
+
+class FakeDriver:
+    def get_screenshot_as_png(self):
+        return b"png"
+
+
+def test_shot_policy_and_retention(tmp_path):
+    settings = ShotSettings(policy=ShotPolicy.ON_FAILURE, scale=1, max_count=2)
+    now = time.time()
+    for i, age_days in enumerate([30, 2, 1]):
+        old = tmp_path / f"old_{i}"
+        old.mkdir()
+        os.utime(old, (now - age_days * 86400, now - age_days * 86400))
+
+    storage = LocalShotStorage("login", tmp_path, settings)
+    assert storage.write(FakeDriver(), ShotPath.BEFORE_LOGIN) is None
+    storage.write(FakeDriver(), ShotPath.AFTER_LOGIN, failed=True).result()
+
+    assert (tmp_path / "login" / "failed_after_login.png").read_bytes() == b"png"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["login", "old_2"]
+
+    storage.delete()
+    assert list((tmp_path / "login").iterdir()) == []
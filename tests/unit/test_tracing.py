@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from tradingTOT.utils import tracing
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    yield path
+    tracing.configure(None)
+
+
+def test_nested_spans_are_exported_per_trace(trace_file):
+    tracing.configure(trace_file)
+
+    @tracing.traced
+    def operation():
+        with tracing.span("auth.check", attempt=1):
+            pass
+
+    operation()
+    with pytest.raises(ValueError):
+        with tracing.span("failing"):
+            raise ValueError("boom")
+
+    lines = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    assert len(lines) == 2
+
+    spans = lines[0]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    child, root = spans
+    assert root["name"].endswith("operation") and "parentSpanId" not in root
+    assert child["parentSpanId"] == root["spanId"] and child["traceId"] == root["traceId"]
+    assert child["attributes"] == [{"key": "attempt", "value": {"intValue": "1"}}]
+    assert lines[1]["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["status"]["code"] == 2
+
+
+def test_unsampled_traces_are_dropped(trace_file):
+    tracing.configure(trace_file, sample_rate=0)
+
+    with tracing.span("root") as root:
+        with tracing.span("child") as child:
+            assert root is None and child is None
+
+    assert not trace_file.exists()